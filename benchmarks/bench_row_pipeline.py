@@ -0,0 +1,105 @@
+"""Per-row overhead of the query row pipeline, before and after binary fetch.
+
+"before" reproduces the original path: a text-format client-side cursor,
+a per-cell Python conversion loop, and a validated QueryResult. "after"
+is execute_query as shipped (binary FETCH, compiled row factory,
+model_construct).
+
+Usage:
+    python -m benchmarks.bench_row_pipeline [--dsn DSN] [--rows 10000 100000]
+
+Without --dsn the connection comes from geo-post-mcp-settings.json and
+the keyring password, like the functional tests. The data lives in a
+temporary table sized to each row count, so both paths move the same
+rows and only TEMP privilege is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import psycopg
+
+from src.models.query import QueryResult
+from src.services.query import execute_query
+
+SETUP_SQL = """
+CREATE TEMP TABLE bench_rows AS
+SELECT g AS id,
+       g * 1.5::float8 AS score,
+       md5(g::text) AS label,
+       now() - g * interval '1 minute' AS seen_at,
+       (g %% 1000)::numeric(10, 2) AS amount
+FROM generate_series(1, %s) AS g
+"""
+
+QUERY = "SELECT id, score, label, seen_at, amount FROM bench_rows"
+
+
+async def _legacy(conn: psycopg.AsyncConnection, row_limit: int) -> QueryResult:
+    """The pre-binary pipeline, kept here only as a baseline."""
+    async with conn.cursor() as cur:
+        await cur.execute(QUERY)
+        assert cur.description is not None
+        columns = [desc.name for desc in cur.description]
+        rows_raw = await cur.fetchmany(row_limit + 1)
+        truncated = len(rows_raw) > row_limit
+        rows = []
+        for row in rows_raw[:row_limit]:
+            converted = []
+            for val in row:
+                converted.append(val)
+            rows.append(converted)
+    return QueryResult(
+        columns=columns, rows=rows, row_count=len(rows), truncated=truncated
+    )
+
+
+async def _current(conn: psycopg.AsyncConnection, row_limit: int) -> QueryResult:
+    return await execute_query(conn, QUERY, row_limit=row_limit)
+
+
+async def _time(fn, conn: psycopg.AsyncConnection, rows: int, repeat: int) -> float:
+    """Best-of-repeat wall time in microseconds per row."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await fn(conn, rows)
+        best = min(best, time.perf_counter() - start)
+        assert result.row_count == rows
+    return best / rows * 1e6
+
+
+async def _connect(dsn: str | None) -> psycopg.AsyncConnection:
+    if dsn is not None:
+        return await psycopg.AsyncConnection.connect(dsn, autocommit=True)
+    from src.config.settings import load_settings
+    from src.services.database import create_connection
+
+    return await create_connection(load_settings())
+
+
+async def main(dsn: str | None, sizes: list[int], repeat: int) -> None:
+    conn = await _connect(dsn)
+    try:
+        print(f"{'rows':>8}  {'before us/row':>14}  {'after us/row':>13}  speedup")
+        for rows in sizes:
+            # Size the table to the row count so both paths move the same rows
+            await conn.execute("DROP TABLE IF EXISTS bench_rows")
+            await conn.execute(SETUP_SQL, (rows,))
+            before = await _time(_legacy, conn, rows, repeat)
+            after = await _time(_current, conn, rows, repeat)
+            print(f"{rows:>8}  {before:>14.2f}  {after:>13.2f}  {before / after:6.2f}x")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", help="libpq connection string")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.dsn, args.rows, args.repeat))
@@ -0,0 +1,111 @@
+"""Cost of validating a query and extracting its tables, before and after the lexer.
+
+"before" reproduces the original path: comment stripping and a first-word
+check, then the FROM/JOIN and CTE regexes over the whole text. "cold" is
+parse_sql on a text it has not seen; "cached" is a resent query served
+from the parse cache. The generated queries mix CTEs, joins, subqueries,
+comments and long literal lists, as agent-written queries do.
+
+Usage:
+    python -m benchmarks.bench_sql_parse [--kib 2 8 32] [--repeat 200]
+
+No database is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from collections.abc import Callable
+
+from src.services.sql_parser import parse_sql
+from src.services.sql_validator import validate_select_only
+
+TABLE_NAME_PATTERN = re.compile(
+    r'\bFROM\s+((?:\w+\.)\w+|\w+)|\bJOIN\s+((?:\w+\.)\w+|\w+)',
+    re.IGNORECASE,
+)
+CTE_ALIAS_PATTERN = re.compile(
+    r'\bWITH\s+(\w+)\s+AS\b|\b,\s*(\w+)\s+AS\b',
+    re.IGNORECASE,
+)
+
+
+def _legacy(sql: str) -> list[str]:
+    """The regex pipeline, kept here only as a baseline."""
+    cleaned = sql.strip()
+    while cleaned.startswith(("--", "/*")):
+        if cleaned.startswith("--"):
+            cleaned = cleaned[cleaned.find("\n") + 1 :].strip()
+        else:
+            cleaned = cleaned[cleaned.find("*/") + 2 :].strip()
+    assert cleaned.split()[0].upper() in ("SELECT", "WITH")
+    ctes = {a or b for a, b in CTE_ALIAS_PATTERN.findall(sql) if a or b}
+    names = [a or b for a, b in TABLE_NAME_PATTERN.findall(sql)]
+    return [n.split(".")[-1] for n in names if n and n not in ctes]
+
+
+def _current(sql: str) -> list[str]:
+    return [relation.name for relation in validate_select_only(sql).relations]
+
+
+def _cold(sql: str) -> list[str]:
+    parse_sql.cache_clear()
+    return _current(sql)
+
+
+def generate_query(min_bytes: int, seed: int = 0) -> str:
+    """Build a SELECT of at least min_bytes; seed varies the text."""
+    parts = [
+        f"-- generated query {seed}\n"
+        "WITH recent AS (\n"
+        "    SELECT p.gid, p.geom FROM parcels p\n"
+        "    WHERE p.updated_at > now() - interval '30 days'\n"
+        ")"
+    ]
+    i = 0
+    while sum(map(len, parts)) < min_bytes:
+        ids = ", ".join(str(seed * 1000 + i * 20 + k) for k in range(20))
+        parts.append(
+            f",\n/* block {i} */ part_{i} AS (\n"
+            f"    SELECT b.bid, r.name, ST_Area(b.geom) AS area_{i}\n"
+            f"    FROM buildings b\n"
+            f"    JOIN roads r ON ST_DWithin(b.geom, r.geom, {i + 1}.5)\n"
+            f"    WHERE b.kind = 'type ''{i}''' AND b.bid IN ({ids})\n"
+            f"      AND EXISTS (SELECT 1 FROM zones z WHERE z.zid = b.zone_id)\n"
+            f")"
+        )
+        i += 1
+    unions = "\nUNION ALL ".join(f"SELECT bid, name FROM part_{k}" for k in range(i))
+    parts.append(f"\nSELECT * FROM recent, ({unions}) AS u ORDER BY 1")
+    return "".join(parts)
+
+
+def _time(fn: Callable[[str], list[str]], sql: str, repeat: int) -> float:
+    """Best-of-repeat wall time in microseconds per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(sql)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def main(sizes: list[int], repeat: int) -> None:
+    print(f"{'KiB':>5}  {'before us':>10}  {'cold us':>9}  {'cached us':>10}")
+    for kib in sizes:
+        sql = generate_query(kib * 1024, seed=kib)
+        before = _time(_legacy, sql, repeat)
+        cold = _time(_cold, sql, repeat)
+        parse_sql(sql)
+        cached = _time(_current, sql, repeat)
+        print(f"{len(sql) / 1024:>5.1f}  {before:>10.1f}  {cold:>9.1f}  {cached:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kib", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.kib, args.repeat)
@@ -6,8 +6,9 @@ import json
 import logging
 import os
 from pathlib import Path
+from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +27,50 @@ class Settings(BaseModel):
     allowed_tables: list[str] = Field(default_factory=list)
     log_level: str = Field(default="INFO")
     log_file: str = Field(default="")
+    pool_min_size: int = Field(default=1, ge=0)
+    pool_max_size: int = Field(default=10, ge=1)
+    pool_timeout: float = Field(default=30.0, gt=0)
+    pool_max_idle: float = Field(default=600.0, ge=0)
+    pool_max_lifetime: float = Field(default=3600.0, ge=0)
+    pool_check: bool = Field(default=True)
+    cursor_ttl: float = Field(default=120.0, gt=0)
+    cursor_max_open: int = Field(default=4, ge=1)
+    query_cache_max_bytes: int = Field(default=64 * 1024 * 1024, ge=0)
+    query_cache_ttl: float = Field(default=300.0, gt=0)
+    catalog_cache_ttl: float = Field(default=300.0, ge=0)
+    catalog_check_interval: float = Field(default=10.0, ge=0)
+    statement_timeout: float = Field(default=30.0, ge=0)
+    max_statement_timeout: float = Field(default=300.0, ge=0)
+    preflight: Literal["off", "warn", "reject"] = Field(default="off")
+    preflight_max_cost: float = Field(default=0.0, ge=0)
+    preflight_max_rows: int = Field(default=0, ge=0)
+    prepare_threshold: int = Field(default=5, ge=0)
+    tile_cache_max_bytes: int = Field(default=32 * 1024 * 1024, ge=0)
+    tile_cache_ttl: float = Field(default=300.0, gt=0)
+    stream_max_rows: int = Field(default=1_000_000, ge=0)
+    export_dir: str = Field(default="")
+    export_max_bytes: int = Field(default=1024 * 1024 * 1024, ge=0)
 
     model_config = {"populate_by_name": True}
 
+    @model_validator(mode="after")
+    def _check_pool_bounds(self) -> Settings:
+        if self.pool_min_size > self.pool_max_size:
+            raise ValueError("pool_min_size must not exceed pool_max_size.")
+        return self
+
+    @model_validator(mode="after")
+    def _check_timeouts(self) -> Settings:
+        if self.max_statement_timeout and not (
+            0 < self.statement_timeout <= self.max_statement_timeout
+        ):
+            raise ValueError(
+                "statement_timeout must be positive and at most "
+                "max_statement_timeout; set max_statement_timeout to 0 to allow "
+                "disabling it."
+            )
+        return self
+
 
 def load_settings(settings_path: Path | None = None) -> Settings:
     """Load settings from JSON file and environment variable.
@@ -56,7 +98,9 @@ def load_settings(settings_path: Path | None = None) -> Settings:
     with open(settings_path) as f:
         raw_data = json.load(f)
 
-    known_fields = {"host", "port", "user", "dbname", "schema", "allowed_tables", "log_level", "log_file"}
+    known_fields = {
+        field.alias or name for name, field in Settings.model_fields.items()
+    }
     extra_fields = set(raw_data.keys()) - known_fields
     for field_name in extra_fields:
         logger.warning("Unrecognized field in settings file: %s", field_name)
@@ -0,0 +1,30 @@
+"""Pydantic models for table metadata read from the system catalogs."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class ColumnMetadata(BaseModel):
+    """One column of a table, with spatial details for geometry columns."""
+
+    column_name: str
+    data_type: str
+    ordinal_position: int
+    is_nullable: bool
+    column_default: str | None
+    description: str | None
+    geometry_type: str | None = None
+    srid: int | None = None
+    coord_dimension: int | None = None
+
+
+class TableMetadata(BaseModel):
+    """A table's row estimate and columns in ordinal order."""
+
+    table_name: str
+    schema_: str
+    estimated_rows: int
+    columns: list[ColumnMetadata]
+
+    model_config = {"populate_by_name": True}
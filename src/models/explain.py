@@ -0,0 +1,19 @@
+"""Pydantic models for query plans."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class PlanSummary(BaseModel):
+    """Headline figures of an EXPLAIN plan, with the plan itself."""
+
+    plan: dict[str, object]
+    total_cost: float
+    estimated_rows: int
+    spatial_index_used: bool
+    spatial_indexes: list[str]
+    seq_scans: list[str]
+    actual_rows: int | None = None
+    planning_time_ms: float | None = None
+    execution_time_ms: float | None = None
@@ -0,0 +1,69 @@
+"""Pydantic models for the index_report MCP tool."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class IndexUsage(BaseModel):
+    """One index of a table, its size and how often it is scanned.
+
+    Bloat is estimated for B-tree and 2D GiST indexes on analyzed
+    tables, and None otherwise.
+    """
+
+    index_name: str
+    method: str
+    columns: list[str | None]
+    definition: str
+    is_unique: bool
+    is_primary: bool
+    is_valid: bool
+    size_bytes: int
+    scans: int | None
+    estimated_bloat_bytes: int | None = None
+    estimated_bloat_ratio: float | None = None
+
+
+class GeometryColumnIndex(BaseModel):
+    """A geometry column and the spatial index covering it, if any."""
+
+    column_name: str
+    geometry_type: str | None
+    srid: int | None
+    spatial_index: str | None
+
+
+class Finding(BaseModel):
+    """Something worth fixing, with the statement that would fix it."""
+
+    kind: str
+    message: str
+    suggestion: str | None = None
+
+
+class TableIndexReport(BaseModel):
+    """Scan and index statistics of one table."""
+
+    table: str
+    estimated_rows: int | None
+    size_bytes: int
+    seq_scans: int | None
+    index_scans: int | None
+    seq_scan_ratio: float | None
+    dead_tuple_ratio: float | None
+    geometry_columns: list[GeometryColumnIndex]
+    indexes: list[IndexUsage]
+    findings: list[Finding]
+
+
+class IndexReport(BaseModel):
+    """Complete index_report tool response."""
+
+    schema_: str
+    stats_since: datetime | None
+    tables: list[TableIndexReport]
+
+    model_config = {"populate_by_name": True}
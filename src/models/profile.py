@@ -0,0 +1,40 @@
+"""Pydantic models for the profile_table MCP tool."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class CommonValue(BaseModel):
+    """One of a column's most common values and its share of rows."""
+
+    value: str | None
+    frequency: float
+
+
+class ColumnProfile(BaseModel):
+    """A column's description and its planner statistics.
+
+    Statistics are None for a column ANALYZE has not sampled.
+    """
+
+    column_name: str
+    data_type: str
+    description: str | None
+    null_fraction: float | None = None
+    n_distinct: int | None = None
+    avg_width: int | None = None
+    most_common_values: list[CommonValue] | None = None
+    histogram_bounds: list[str] | None = None
+
+
+class TableProfile(BaseModel):
+    """Complete profile_table tool response."""
+
+    table: str
+    schema_: str
+    estimated_rows: int
+    analyzed: bool
+    columns: list[ColumnProfile]
+
+    model_config = {"populate_by_name": True}
@@ -12,3 +12,10 @@ class QueryResult(BaseModel):
     rows: list[list[object]]
     row_count: int
     truncated: bool
+
+
+class BatchStatement(BaseModel):
+    """One statement of a query batch, with optional bind parameters."""
+
+    sql: str
+    params: list[object] | dict[str, object] | None = None
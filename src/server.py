@@ -3,19 +3,66 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import logging
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import aclosing, asynccontextmanager, suppress
 from pathlib import Path
 
 import psycopg
 import structlog
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
+from fastmcp.resources import ResourceContent, ResourceResult
+from fastmcp.tools import ToolResult
+from mcp.types import TextContent
+from starlette.requests import Request
+from starlette.responses import (
+    FileResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 
 from src.config.logging import setup_logging
 from src.config.settings import Settings, load_settings
-from src.services.database import create_connection
+from src.models.query import BatchStatement
+from src.services.access_control import AccessDeniedError
+from src.services.catalog import TableNotFoundError
+from src.services.catalog_cache import CatalogCache
+from src.services.explain import CostLimits
+from src.services.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    MetricsMiddleware,
+    ToolMetrics,
+    handler_done,
+    phase,
+)
+from src.services.export import MEDIA_TYPES as EXPORT_MEDIA_TYPES, ExportFormat
+from src.services.extent import EXTENT_CACHE_MAX_BYTES, EXTENT_CACHE_TTL, ExtentCache
+from src.services.pagination import CursorStore
+from src.services.pool import ConnectionPool
+from src.services.prepared import PreparedStatements
+from src.services.query import QueryTimeoutError
+from src.services.query_cache import QueryCache
+from src.services.stream import MEDIA_TYPES
+from src.services.tiles import TileCache
+from src.tools.explain import explain_tool
+from src.tools.export import export_tool, locate_export, read_export
+from src.tools.extent import spatial_extent_tool
+from src.tools.features import features_in_bbox_tool
 from src.tools.fieldmeaning import fieldmeaning_tool
-from src.tools.query import query_tool
+from src.tools.indexes import index_report_tool
+from src.tools.profile import profile_table_tool
+from src.tools.query import (
+    PageOutput,
+    QueryOutput,
+    open_query_stream,
+    query_batch_tool,
+    query_next_tool,
+    query_tool,
+)
 from src.tools.schema import describe_table_tool, list_tables_tool
+from src.tools.tiles import MVT_MEDIA_TYPE, get_tile, tile_tool
 
 
 def _parse_settings_path() -> Path | None:
@@ -39,45 +86,378 @@ logger.info("------------------------------------SERVER STARTED-----------------
 if _cli_settings_path is not None:
     logger.info("settings_path_override", path=str(_cli_settings_path.resolve()))
 
-mcp = FastMCP("geo-post-mcp")
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Open the connection pool on startup and close it on shutdown.
+
+    A database that cannot be reached at startup is logged, not fatal:
+    connections are then opened on first use. Paginated cursors are swept
+    in the background while the server runs and closed on shutdown.
+    """
+    global _pool
+    if _conn is None:
+        try:
+            await _get_pool().open()
+        except psycopg.OperationalError as exc:
+            logger.warning("pool_open_failed", error=str(exc))
+    cursors = _get_cursors()
+    sweeper = asyncio.create_task(cursors.sweep_forever())
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+        with suppress(asyncio.CancelledError):
+            await sweeper
+        await cursors.close_all()
+        if _pool is not None:
+            pool, _pool = _pool, None
+            await pool.close()
+
+
+mcp = FastMCP("geo-post-mcp", lifespan=_lifespan)
+
+# Latency and size of every tool call, served at /metrics over HTTP.
+_metrics = ToolMetrics()
+mcp.add_middleware(MetricsMiddleware(_metrics))
 
 # Module-level state set during startup
 _settings: Settings | None = _initial_settings
 _conn: psycopg.AsyncConnection | None = None
+_pool: ConnectionPool | None = None
+_cursors: CursorStore | None = None
+_query_cache: QueryCache | None = None
+_catalog: CatalogCache | None = None
+_prepared: PreparedStatements | None = None
+_tiles: TileCache | None = None
+_extents: ExtentCache | None = None
 
 
 def configure(settings: Settings, conn: psycopg.AsyncConnection | None = None) -> None:
-    """Inject settings and optional connection (used by tests)."""
-    global _settings, _conn
+    """Inject settings and optional connection (used by tests).
+
+    An injected connection bypasses the pool and is shared by all tool calls.
+    """
+    global _settings, _conn, _pool, _cursors, _query_cache, _catalog, _prepared
+    global _tiles, _extents
     _settings = settings
     _conn = conn
-
-
-async def _get_connection() -> psycopg.AsyncConnection:
-    """Get or create the database connection."""
-    global _conn, _settings
+    _pool = None
+    _cursors = None
+    _query_cache = None
+    _catalog = None
+    _prepared = None
+    _tiles = None
+    _extents = None
+
+
+def _get_pool() -> ConnectionPool:
+    """Get or create the connection pool."""
+    global _pool, _settings
     if _settings is None:
         _settings = load_settings(_cli_settings_path)
-    if _conn is None or _conn.closed:
-        _conn = await create_connection(_settings)
-    return _conn
+    if _pool is None:
+        _pool = ConnectionPool(_settings)
+    return _pool
+
+
+def _get_cursors() -> CursorStore:
+    """Get or create the store of open paginated cursors."""
+    global _cursors
+    if _cursors is None:
+        settings = _settings or load_settings(_cli_settings_path)
+        _cursors = CursorStore(
+            ttl=settings.cursor_ttl,
+            max_open=settings.cursor_max_open,
+            release=_release,
+        )
+    return _cursors
+
+
+def _get_query_cache() -> QueryCache | None:
+    """Get or create the query result cache; None when it is disabled."""
+    global _query_cache
+    settings = _settings or load_settings(_cli_settings_path)
+    if settings.query_cache_max_bytes == 0:
+        return None
+    if _query_cache is None:
+        _query_cache = QueryCache(
+            max_bytes=settings.query_cache_max_bytes,
+            ttl=settings.query_cache_ttl,
+        )
+    return _query_cache
+
+
+def _get_catalog() -> CatalogCache | None:
+    """Get or create the schema metadata cache; None when it is disabled."""
+    global _catalog
+    settings = _settings or load_settings(_cli_settings_path)
+    if settings.catalog_cache_ttl == 0:
+        return None
+    if _catalog is None:
+        _catalog = CatalogCache(
+            schema=settings.schema_,
+            ttl=settings.catalog_cache_ttl,
+            check_interval=settings.catalog_check_interval,
+        )
+    return _catalog
+
+
+def _get_prepared() -> PreparedStatements | None:
+    """Get or create the prepared statement tracker; None when it is disabled."""
+    global _prepared
+    settings = _settings or load_settings(_cli_settings_path)
+    if settings.prepare_threshold == 0:
+        return None
+    if _prepared is None:
+        _prepared = PreparedStatements(settings.prepare_threshold)
+    return _prepared
+
+
+def _get_tile_cache() -> TileCache | None:
+    """Get or create the vector tile cache; None when it is disabled."""
+    global _tiles
+    settings = _settings or load_settings(_cli_settings_path)
+    if settings.tile_cache_max_bytes == 0:
+        return None
+    if _tiles is None:
+        _tiles = TileCache(
+            max_bytes=settings.tile_cache_max_bytes,
+            ttl=settings.tile_cache_ttl,
+        )
+    return _tiles
+
+
+def _get_extent_cache() -> ExtentCache:
+    """Get or create the cache of exactly computed table extents."""
+    global _extents
+    if _extents is None:
+        _extents = ExtentCache(EXTENT_CACHE_MAX_BYTES, EXTENT_CACHE_TTL)
+    return _extents
+
+
+def _get_cost_limits() -> CostLimits | None:
+    """Build the query preflight limits; None when the preflight is off."""
+    settings = _settings or load_settings(_cli_settings_path)
+    if settings.preflight == "off":
+        return None
+    if not settings.preflight_max_cost and not settings.preflight_max_rows:
+        return None
+    return CostLimits(
+        max_cost=settings.preflight_max_cost or None,
+        max_rows=settings.preflight_max_rows or None,
+        reject=settings.preflight == "reject",
+    )
+
+
+@asynccontextmanager
+async def _acquire() -> AsyncIterator[psycopg.AsyncConnection]:
+    """Check out a connection for the duration of one tool call.
+
+    A connection pinned by an open paginated cursor stays checked out
+    until the cursor store releases it. The tool body ends with the
+    block, so what its call spends afterwards is counted as serialization.
+    """
+    if _conn is not None and not _conn.closed:
+        yield _conn
+        handler_done()
+        return
+    with phase("acquire"):
+        conn = await _get_pool().acquire()
+    try:
+        yield conn
+    finally:
+        if _cursors is None or not _cursors.holds(conn):
+            await _release(conn)
+    handler_done()
+
+
+async def _release(conn: psycopg.AsyncConnection) -> None:
+    """Return a connection to the pool (no-op for an injected connection)."""
+    if conn is not _conn:
+        await _get_pool().release(conn)
 
 
 @mcp.tool()
-async def query(sql: str, row_limit: int = 1000) -> dict[str, object]:
+async def query(
+    sql: str,
+    row_limit: int = 1000,
+    paginate: bool = False,
+    output: QueryOutput = "rows",
+    dictionary_encode: bool = False,
+    timeout: float | None = None,
+    params: list[object] | dict[str, object] | None = None,
+    precision: int | None = None,
+    quantize: float | None = None,
+    ctx: Context | None = None,
+) -> dict[str, object] | ToolResult:
     """Execute a SQL SELECT query against the database.
 
     Only SELECT queries are permitted. Results are returned with
     column names, typed values, and a row count. Geometry columns
     are returned as GeoJSON. Results are truncated at row_limit.
+    Repeated queries are answered from a cache until a table they
+    read is modified. If the server has a cost preflight configured,
+    queries the planner estimates as too expensive are rejected or
+    answered with a "warning"; use explain to check a plan first.
+    For lookups repeated with different values, pass the values in
+    params: the database then reuses the statement's plan.
+    While rows are fetched, progress notifications report the rows
+    read so far to clients that request them. Over HTTP, large
+    results can instead be streamed from /query/stream.
 
     Args:
         sql: SQL SELECT statement to execute.
         row_limit: Maximum number of rows to return (default 1000).
+        paginate: Keep the result open when truncated and return a
+            next_token for query_next (tokens expire after a few minutes).
+        output: "rows" (default), "columnar" for a data object mapping
+            each column to its array of values (compact for wide or numeric
+            results), or "featurecollection" to get a GeoJSON
+            FeatureCollection built in the database, with the first geometry
+            column as geometry and the other columns as properties.
+        dictionary_encode: With output="columnar", send repetitive text
+            columns as {"dictionary": [...], "indices": [...]}.
+        timeout: Seconds the query may run before the database cancels it
+            (default: the server's statement_timeout, up to its maximum).
+            With paginate=True it applies to each page's fetch.
+        params: Values bound to placeholders in sql: a list for %s
+            placeholders or an object for %(name)s ones. With params,
+            write a literal % in sql as %%.
+        precision: Decimal digits to keep per geometry coordinate, e.g. 2
+            for centimetres in a metric SRID or 6 (about 10 cm) for
+            longitude/latitude. Reduces response size with no visible loss.
+        quantize: Snap geometries to a grid of this size, in their own
+            units (e.g. 0.01), in the database; vertices that fall on the
+            same grid point are merged.
+    """
+    cursors = _get_cursors()
+    await cursors.sweep()
+
+    async def progress(rows: int) -> None:
+        if ctx is not None:
+            await ctx.report_progress(rows, row_limit + 1)
+
+    async with _acquire() as conn:
+        assert _settings is not None
+        default_timeout = _settings.statement_timeout or None
+        result = await query_tool(
+            sql,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            row_limit,
+            cursors=cursors if paginate else None,
+            output=output,
+            dictionary_encode=dictionary_encode,
+            cache=_get_query_cache(),
+            timeout=timeout if timeout is not None else default_timeout,
+            max_timeout=_settings.max_statement_timeout or None,
+            limits=_get_cost_limits(),
+            params=params,
+            prepared=_get_prepared(),
+            precision=precision,
+            quantize=quantize,
+            progress=progress,
+        )
+    if isinstance(result, str):
+        return ToolResult(content=[TextContent(type="text", text=result)])
+    return result
+
+
+@mcp.tool()
+async def query_next(
+    token: str,
+    row_limit: int | None = None,
+    output: PageOutput = "rows",
+    dictionary_encode: bool = False,
+) -> dict[str, object]:
+    """Fetch the next page of a paginated query.
+
+    Continues reading the still-open result of a query run with
+    paginate=True, without re-executing it.
+
+    Args:
+        token: The next_token from a previous query or query_next response.
+        row_limit: Rows per page (default: the original query's row_limit).
+        output: "rows" (default) or "columnar", as for query.
+        dictionary_encode: With output="columnar", dictionary-encode
+            repetitive text columns.
+    """
+    result = await query_next_tool(
+        token, _get_cursors(), row_limit, output, dictionary_encode
+    )
+    handler_done()
+    return result
+
+
+@mcp.tool()
+async def query_batch(
+    statements: list[str | BatchStatement],
+    row_limit: int = 1000,
+    timeout: float | None = None,
+) -> dict[str, object]:
+    """Execute several SQL SELECT queries in one call.
+
+    Use it instead of consecutive query calls for independent lookups,
+    such as counts per table or features by id: all statements are sent
+    to the database together. Each one is checked and run on its own, so
+    a refused or failing statement returns an error entry without
+    affecting the others. Results are not cached or paginated.
+
+    Args:
+        statements: Up to 50 SQL SELECT statements, each either a string
+            or an object {"sql": ..., "params": [...] or {...}} with
+            placeholders as for query.
+        row_limit: Maximum number of rows per statement (default 1000).
+        timeout: Seconds each statement may run (default: the server's
+            statement_timeout, up to its maximum).
+    """
+    async with _acquire() as conn:
+        assert _settings is not None
+        default_timeout = _settings.statement_timeout or None
+        return await query_batch_tool(
+            statements,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            row_limit,
+            timeout=timeout if timeout is not None else default_timeout,
+            max_timeout=_settings.max_statement_timeout or None,
+            limits=_get_cost_limits(),
+        )
+
+
+@mcp.tool()
+async def explain(
+    sql: str,
+    analyze: bool = False,
+    params: list[object] | dict[str, object] | None = None,
+) -> dict[str, object]:
+    """Show the execution plan of a SQL SELECT query.
+
+    Use it to check a query before running it on large tables: the
+    response gives the planner's estimated cost and rows, whether a
+    spatial (GiST/SP-GiST/BRIN) index is used, and which tables are
+    read by sequential scan, along with the full JSON plan.
+
+    Args:
+        sql: SQL SELECT statement to explain.
+        analyze: Also execute the query (read-only, under the server's
+            statement timeout) and report actual rows and timings.
+        params: Values for placeholders in sql, as for query.
     """
-    conn = await _get_connection()
-    assert _settings is not None
-    return await query_tool(sql, conn, _settings.schema_, _settings.allowed_tables, row_limit)
+    async with _acquire() as conn:
+        assert _settings is not None
+        return await explain_tool(
+            sql,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            analyze,
+            _settings.statement_timeout or None,
+            params,
+        )
 
 
 @mcp.tool()
@@ -87,9 +467,11 @@ async def list_tables() -> list[dict[str, object]]:
     Returns table names, schemas, and estimated row counts.
     Only tables in the allowed list are returned.
     """
-    conn = await _get_connection()
-    assert _settings is not None
-    return await list_tables_tool(conn, _settings.schema_, _settings.allowed_tables)
+    async with _acquire() as conn:
+        assert _settings is not None
+        return await list_tables_tool(
+            conn, _settings.schema_, _settings.allowed_tables, _get_catalog()
+        )
 
 
 @mcp.tool()
@@ -102,11 +484,15 @@ async def describe_table(table_name: str) -> list[dict[str, object]]:
     Args:
         table_name: Name of the table to describe.
     """
-    conn = await _get_connection()
-    assert _settings is not None
-    return await describe_table_tool(
-        table_name, conn, _settings.schema_, _settings.allowed_tables
-    )
+    async with _acquire() as conn:
+        assert _settings is not None
+        return await describe_table_tool(
+            table_name,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            _get_catalog(),
+        )
 
 
 @mcp.tool()
@@ -120,11 +506,423 @@ async def fieldmeaning(table_name: str) -> dict[str, object]:
     Args:
         table_name: Bare table name (no schema qualifier like 'public.tablename').
     """
-    conn = await _get_connection()
-    assert _settings is not None
-    return await fieldmeaning_tool(
-        table_name, conn, _settings.schema_, _settings.allowed_tables
-    )
+    async with _acquire() as conn:
+        assert _settings is not None
+        return await fieldmeaning_tool(
+            table_name,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            _get_catalog(),
+        )
+
+
+@mcp.tool()
+async def profile_table(table_name: str) -> dict[str, object]:
+    """Summarize every column of a table in one cheap catalog query.
+
+    Use this instead of COUNT(DISTINCT ...), MIN/MAX or GROUP BY per
+    column when exploring a table: it reads the statistics PostgreSQL
+    keeps for the planner and scans nothing. For each column, returns
+    its data type and description (as fieldmeaning does), null_fraction,
+    n_distinct (estimated number of distinct values), avg_width in
+    bytes, most_common_values with their frequencies, and
+    histogram_bounds, which split the remaining values into equal-sized
+    buckets; the first and last bounds approximate MIN and MAX. All
+    figures are estimates from a sample taken at the last ANALYZE.
+
+    Args:
+        table_name: Table to profile.
+    """
+    async with _acquire() as conn:
+        assert _settings is not None
+        return await profile_table_tool(
+            table_name,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            _get_catalog(),
+        )
+
+
+@mcp.tool()
+async def spatial_extent(
+    table_name: str,
+    geom_column: str | None = None,
+    exact: bool = False,
+) -> dict[str, object]:
+    """Get a table's bounding box, row count and geometry types cheaply.
+
+    Use this instead of SELECT ST_Extent(...) to orient yourself: by
+    default the answer comes from the statistics PostgreSQL keeps for
+    the planner, in milliseconds whatever the table's size, and may lag
+    recent writes. extent is [xmin, ymin, xmax, ymax] in the column's
+    SRID. geometry_columns lists the declared type and SRID of every
+    geometry column of the table.
+
+    Args:
+        table_name: Table to measure.
+        geom_column: Geometry column (default: the table's first).
+        exact: Scan the whole table for the exact extent, row count and
+            per-type counts (geometry_types). Slow on large tables; the
+            result is cached until the table changes.
+    """
+    async with _acquire() as conn:
+        assert _settings is not None
+        return await spatial_extent_tool(
+            table_name,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            _get_catalog(),
+            _get_extent_cache(),
+            geom_column=geom_column,
+            exact=exact,
+            timeout=_settings.statement_timeout or None,
+        )
+
+
+@mcp.tool()
+async def features_in_bbox(
+    table_name: str,
+    minx: float,
+    miny: float,
+    maxx: float,
+    maxy: float,
+    srid: int = 4326,
+    zoom: int | None = None,
+    columns: list[str] | None = None,
+    geom_column: str | None = None,
+    row_limit: int = 1000,
+) -> ToolResult:
+    """Fetch a table's features inside a bounding box as GeoJSON.
+
+    Prefer this over hand-written bbox SQL: the filter is written so the
+    spatial index is used, and with zoom the geometries are simplified
+    to what is visible at that map zoom, which makes large polygons and
+    lines much smaller. Returns a GeoJSON FeatureCollection with the
+    selected columns as properties, truncated at row_limit.
+
+    Args:
+        table_name: Table to read.
+        minx: West edge (longitude for SRID 4326).
+        miny: South edge (latitude for SRID 4326).
+        maxx: East edge.
+        maxy: North edge.
+        srid: SRID of the box coordinates (default 4326).
+        zoom: Web Mercator zoom level (0-30) the features are shown at;
+            omit for full-resolution geometries.
+        columns: Property columns (default: every non-geometry column).
+        geom_column: Geometry column (default: the table's first).
+        row_limit: Maximum number of features (default 1000).
+    """
+    async with _acquire() as conn:
+        assert _settings is not None
+        document = await features_in_bbox_tool(
+            table_name,
+            minx,
+            miny,
+            maxx,
+            maxy,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            _get_catalog(),
+            srid=srid,
+            zoom=zoom,
+            columns=columns,
+            geom_column=geom_column,
+            row_limit=row_limit,
+            timeout=_settings.statement_timeout or None,
+        )
+    return ToolResult(content=[TextContent(type="text", text=document)])
+
+
+@mcp.tool()
+async def tile(
+    table_name: str,
+    z: int,
+    x: int,
+    y: int,
+    columns: list[str] | None = None,
+    geom_column: str | None = None,
+) -> dict[str, object]:
+    """Render one Mapbox Vector Tile of a table, built by PostGIS.
+
+    Tiles follow the Web Mercator XYZ scheme (y counted from the top).
+    The layer is named after the table; features carry the selected
+    columns as attributes. Prefer this over query for map display: the
+    database clips and simplifies geometries to the tile. When the
+    server runs over HTTP, the same tiles are served at
+    /tiles/{table_name}/{z}/{x}/{y}.mvt.
+
+    Args:
+        table_name: Table to render.
+        z: Zoom level (0-30).
+        x: Tile column.
+        y: Tile row.
+        columns: Attribute columns (default: every non-geometry column).
+        geom_column: Geometry column (default: the table's first).
+    """
+    async with _acquire() as conn:
+        assert _settings is not None
+        return await tile_tool(
+            table_name,
+            z,
+            x,
+            y,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            _get_catalog(),
+            _get_tile_cache(),
+            columns,
+            geom_column,
+            _settings.statement_timeout or None,
+        )
+
+
+@mcp.custom_route("/tiles/{table_name}/{z:int}/{x:int}/{y:int}.mvt", methods=["GET"])
+async def tile_route(request: Request) -> Response:
+    """Serve a vector tile over HTTP.
+
+    Query parameters: columns (comma-separated) and geom_column. Empty
+    tiles are answered with 204, as map clients expect.
+    """
+    path = request.path_params
+    columns = request.query_params.get("columns")
+    try:
+        async with _acquire() as conn:
+            assert _settings is not None
+            result = await get_tile(
+                path["table_name"],
+                path["z"],
+                path["x"],
+                path["y"],
+                conn,
+                _settings.schema_,
+                _settings.allowed_tables,
+                _get_catalog(),
+                _get_tile_cache(),
+                columns.split(",") if columns else None,
+                request.query_params.get("geom_column"),
+                _settings.statement_timeout or None,
+            )
+    except QueryTimeoutError as exc:
+        return PlainTextResponse(str(exc), status_code=504)
+    except (AccessDeniedError, TableNotFoundError) as exc:
+        return PlainTextResponse(str(exc), status_code=404)
+    except ValueError as exc:
+        return PlainTextResponse(str(exc), status_code=400)
+    if not result.data:
+        return Response(status_code=204)
+    return Response(result.data, media_type=MVT_MEDIA_TYPE)
+
+
+@mcp.custom_route("/query/stream", methods=["POST"])
+async def query_stream_route(request: Request) -> Response:
+    """Stream a query's rows over HTTP while they are fetched.
+
+    The JSON body takes sql and optionally params, output ("ndjson",
+    the default, or "geojsonseq") and timeout. Errors found before the
+    first rows are answered with a status code; later ones end the
+    stream with an {"error": ...} record.
+    """
+    settings = _settings or load_settings(_cli_settings_path)
+    if settings.stream_max_rows == 0:
+        return PlainTextResponse("Query streaming is disabled.", status_code=404)
+    try:
+        body = await request.json()
+        sql, output = body["sql"], body.get("output", "ndjson")
+        params, timeout = body.get("params"), body.get("timeout")
+        if not isinstance(sql, str):
+            raise TypeError
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return PlainTextResponse(
+            'Expected a JSON object with a "sql" string.', status_code=400
+        )
+
+    chunks = _stream_rows(sql, output, params, timeout)
+    try:
+        first = await anext(chunks)
+    except QueryTimeoutError as exc:
+        return PlainTextResponse(str(exc), status_code=504)
+    except AccessDeniedError as exc:
+        return PlainTextResponse(str(exc), status_code=403)
+    except (ValueError, psycopg.DatabaseError) as exc:
+        return PlainTextResponse(str(exc), status_code=400)
+    return StreamingResponse(_prepend(first, chunks), media_type=MEDIA_TYPES[output])
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_route(request: Request) -> Response:
+    """Serve tool call metrics in the Prometheus text format.
+
+    Per tool: calls by outcome, total duration and time per phase
+    (acquire, validation, execution, conversion, serialization) as
+    histograms, rows returned and truncated results of query calls,
+    and response sizes.
+    """
+    return PlainTextResponse(_metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+async def _stream_rows(
+    sql: str,
+    output: str,
+    params: list[object] | dict[str, object] | None,
+    timeout: float | None,
+) -> AsyncGenerator[bytes, None]:
+    """Stream a query on a connection held until the response is sent."""
+    async with _acquire() as conn:
+        assert _settings is not None
+        stream = open_query_stream(
+            sql,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            output,  # type: ignore[arg-type]
+            max_rows=_settings.stream_max_rows,
+            timeout=timeout if timeout is not None else (
+                _settings.statement_timeout or None
+            ),
+            max_timeout=_settings.max_statement_timeout or None,
+            params=params,
+        )
+        async with aclosing(stream):
+            async for chunk in stream:
+                yield chunk
+
+
+async def _prepend(
+    first: bytes, rest: AsyncGenerator[bytes, None]
+) -> AsyncGenerator[bytes, None]:
+    async with aclosing(rest):
+        yield first
+        async for chunk in rest:
+            yield chunk
+
+
+@mcp.tool()
+async def export(
+    sql: str,
+    format: ExportFormat,
+    path: str,
+    overwrite: bool = False,
+    timeout: float | None = None,
+    params: list[object] | dict[str, object] | None = None,
+) -> dict[str, object]:
+    """Write a query's full result to a file on the server.
+
+    Use this for results too large to return: rows are written while
+    they are fetched, with no row limit. The same checks as query apply.
+    Returns a resource uri (export://...) the file can be read from
+    while it is small, an HTTP url (/exports/...) that downloads it at
+    any size, its path on the server, and rows and bytes written. Exports that
+    grow past the server's size limit are abandoned.
+
+    Args:
+        sql: SQL SELECT statement.
+        format: "flatgeobuf" (binary, with a spatial index, for GIS
+            tools), "geojsonseq" (one GeoJSON Feature per line), "csv"
+            (geometries as WKT) or "arrow" (Arrow IPC file, geometries as
+            WKT, for dataframe tools).
+            flatgeobuf and geojsonseq use the first geometry column as the
+            geometry.
+        path: File path relative to the export directory, e.g.
+            "parcels/zurich"; the format's extension is added if missing.
+        overwrite: Replace an existing file.
+        timeout: Statement timeout in seconds for each batch fetched
+            (default: the server's statement_timeout).
+        params: Values for %s (list) or %(name)s (dict) placeholders in sql.
+    """
+    async with _acquire() as conn:
+        assert _settings is not None
+        return await export_tool(
+            sql,
+            format,
+            path,
+            conn,
+            _settings.schema_,
+            _settings.allowed_tables,
+            _settings.export_dir,
+            max_bytes=_settings.export_max_bytes or None,
+            overwrite=overwrite,
+            timeout=timeout if timeout is not None else (
+                _settings.statement_timeout or None
+            ),
+            max_timeout=_settings.max_statement_timeout or None,
+            params=params,
+        )
+
+
+@mcp.resource("export://{path*}")
+def exported_file(path: str) -> ResourceResult:
+    """A file written by the export tool, if it is small enough to return."""
+    settings = _settings or load_settings(_cli_settings_path)
+    data, media_type = read_export(settings.export_dir, path)
+    return ResourceResult([ResourceContent(data, mime_type=media_type)])
+
+
+@mcp.custom_route("/exports/{path:path}", methods=["GET"])
+async def export_route(request: Request) -> Response:
+    """Download a file written by the export tool, read in chunks."""
+    settings = _settings or load_settings(_cli_settings_path)
+    try:
+        target, output = locate_export(
+            settings.export_dir, request.path_params["path"]
+        )
+    except ValueError as exc:
+        return PlainTextResponse(str(exc), status_code=404)
+    return FileResponse(target, media_type=EXPORT_MEDIA_TYPES[output])
+
+
+@mcp.tool()
+async def index_report() -> dict[str, object]:
+    """Find missing, unused and bloated indexes on the allowed tables.
+
+    Reads only the catalogs and the statistics PostgreSQL collects, so
+    it is cheap on any table size. For each table, returns its
+    estimated_rows, seq_scans and index_scans with seq_scan_ratio,
+    dead_tuple_ratio, its geometry_columns with the spatial_index
+    covering each (null if none), and its indexes with method, columns,
+    size_bytes, scans and, for B-tree and GiST, estimated_bloat_ratio.
+    findings lists what is worth fixing (missing_spatial_index,
+    unused_index, invalid_index, bloated_index, high_seq_scan_ratio,
+    dead_tuples), most with a suggested statement for a database
+    administrator; this server never runs them. Scan counts accumulate
+    from stats_since, so a recent reset makes indexes look unused.
+    """
+    async with _acquire() as conn:
+        assert _settings is not None
+        return await index_report_tool(
+            conn, _settings.schema_, _settings.allowed_tables
+        )
+
+
+@mcp.tool()
+async def server_stats() -> dict[str, object]:
+    """Report connection pool statistics for tuning.
+
+    Returns pool size, idle and checked-out connections, and
+    cumulative counters for acquire requests, waits, timeouts,
+    and connections opened or closed, plus open paginated cursors
+    and query and catalog cache hits, misses, and invalidations,
+    how many query executions reused a prepared statement,
+    vector tile cache occupancy and hits, and exact extents cached.
+    """
+    cache = _get_query_cache()
+    catalog = _get_catalog()
+    prepared = _get_prepared()
+    tiles = _get_tile_cache()
+    return {
+        "pool": _get_pool().stats(),
+        "cursors": _get_cursors().stats(),
+        "query_cache": cache.stats() if cache is not None else None,
+        "catalog_cache": catalog.stats() if catalog is not None else None,
+        "prepared_statements": prepared.stats() if prepared is not None else None,
+        "tile_cache": tiles.stats() if tiles is not None else None,
+        "extent_cache": _get_extent_cache().stats(),
+    }
 
 
 if __name__ == "__main__":
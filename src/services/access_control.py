@@ -3,6 +3,10 @@
 from __future__ import annotations
 
 
+class AccessDeniedError(ValueError):
+    """Raised when a tool or statement reads a table outside the allowed list."""
+
+
 def is_table_allowed(table_name: str, schema: str, allowed_tables: list[str]) -> bool:
     """Check if a table name is in the allowed tables list.
 
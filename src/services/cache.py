@@ -0,0 +1,110 @@
+"""In-process LRU cache bounded by total byte size, with a TTL per entry."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Least-recently-used cache bounded by the summed size of its values.
+
+    Sizes come from the ``sizeof`` callable and need only be estimates.
+    A value larger than the whole budget is not stored. Expired entries
+    are dropped when looked up or when space is needed.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        sizeof: Callable[[V], int],
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._sizeof = sizeof
+        self._entries: OrderedDict[K, tuple[V, int, float]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        key: K,
+        validate: Callable[[V], bool] | None = None,
+    ) -> V | None:
+        """Return the cached value and mark it recently used, or None.
+
+        Args:
+            key: Cache key.
+            validate: Optional check of the cached value; if it returns
+                False the entry is dropped and counted as an invalidation.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.pop(key)
+            self.misses += 1
+            return None
+        if validate is not None and not validate(value):
+            self.pop(key)
+            self.misses += 1
+            self.invalidations += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """Store a value, evicting least-recently-used entries to fit it."""
+        self.pop(key)
+        size = self._sizeof(value)
+        if size > self._max_bytes:
+            return
+        now = time.monotonic()
+        while self._entries and self._bytes + size > self._max_bytes:
+            oldest, (_, _, expires_at) = next(iter(self._entries.items()))
+            self.pop(oldest)
+            if expires_at > now:
+                self.evictions += 1
+        self._entries[key] = (value, size, now + self._ttl)
+        self._bytes += size
+
+    def pop(self, key: K) -> V | None:
+        """Remove an entry without counting an eviction."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._bytes -= entry[1]
+        return entry[0]
+
+    def clear(self) -> None:
+        """Remove every entry; counters are kept."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, object]:
+        """Return occupancy and cumulative hit, miss, and eviction counters."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "ttl_seconds": self._ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,130 @@
+"""Single-query loader of table metadata from the PostgreSQL system catalogs."""
+
+from __future__ import annotations
+
+import psycopg
+from psycopg import sql as pgsql
+
+from src.models.catalog import TableMetadata
+from src.services.catalog_cache import CatalogCache
+from src.services.geometry import register_geometry_types
+from src.services.metrics import phase
+
+# Reads pg_class/pg_attribute/pg_description directly instead of
+# information_schema, whose views re-check privileges per row and are
+# among the slowest catalog paths. data_type follows information_schema:
+# built-in types by name, arrays as ARRAY, everything else USER-DEFINED,
+# with domains reported as their base type. Views, materialized views
+# and foreign tables are listed with tables, as information_schema did.
+TABLE_METADATA_QUERY = """
+SELECT json_build_object(
+    'table_name', c.relname,
+    'schema_', n.nspname,
+    'estimated_rows', pg_catalog.pg_stat_get_live_tuples(c.oid),
+    'columns', coalesce(cols.columns, '[]'::json)
+)
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN LATERAL (
+    SELECT json_agg(json_build_object(
+        'column_name', a.attname,
+        'data_type', CASE
+            WHEN t.typelem <> 0 AND t.typlen = -1 THEN 'ARRAY'
+            WHEN t.typnamespace = 'pg_catalog'::regnamespace
+                THEN pg_catalog.format_type(t.oid, NULL)
+            ELSE 'USER-DEFINED'
+        END,
+        'ordinal_position', a.attnum,
+        'is_nullable', NOT (a.attnotnull OR coalesce(dt.typnotnull, false)),
+        'column_default', CASE WHEN a.attgenerated = ''
+            THEN pg_catalog.pg_get_expr(ad.adbin, ad.adrelid) END,
+        'description', d.description{spatial_fields}
+    ) ORDER BY a.attnum) AS columns
+    FROM pg_catalog.pg_attribute a
+    LEFT JOIN pg_catalog.pg_type dt
+        ON dt.oid = a.atttypid AND dt.typtype = 'd'
+    JOIN pg_catalog.pg_type t
+        ON t.oid = coalesce(dt.typbasetype, a.atttypid)
+    LEFT JOIN pg_catalog.pg_attrdef ad
+        ON ad.adrelid = a.attrelid AND ad.adnum = a.attnum
+    LEFT JOIN pg_catalog.pg_description d
+        ON d.classoid = 'pg_catalog.pg_class'::regclass
+        AND d.objoid = a.attrelid
+        AND d.objsubid = a.attnum{spatial_join}
+    WHERE a.attrelid = c.oid
+        AND a.attnum > 0
+        AND NOT a.attisdropped
+) AS cols ON true
+WHERE n.nspname = %(schema)s
+    AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+    AND (%(tables)s::text[] IS NULL OR c.relname = ANY(%(tables)s::text[]))
+ORDER BY c.relname
+"""
+
+# Spatial details come from PostGIS's geometry_columns view, which also
+# covers pre-typmod columns constrained by CHECKs; added only when
+# PostGIS is installed.
+SPATIAL_FIELDS = """,
+        'geometry_type', g.type,
+        'srid', g.srid,
+        'coord_dimension', g.coord_dimension"""
+
+SPATIAL_JOIN = """
+    LEFT JOIN geometry_columns g
+        ON g.f_table_schema = n.nspname
+        AND g.f_table_name = c.relname
+        AND g.f_geometry_column = a.attname"""
+
+
+class TableNotFoundError(ValueError):
+    """Raised when a table is not in the catalog of its schema."""
+
+
+async def load_tables(
+    conn: psycopg.AsyncConnection,
+    schema: str,
+    tables: list[str] | None = None,
+) -> dict[str, TableMetadata]:
+    """Load metadata for tables in a schema in one round trip.
+
+    Args:
+        conn: Database connection.
+        schema: Schema name.
+        tables: Bare table names to load; None loads every table.
+
+    Returns:
+        Metadata keyed by table name, for the tables that exist.
+    """
+    spatial = bool(await register_geometry_types(conn))
+    query = pgsql.SQL(TABLE_METADATA_QUERY).format(
+        spatial_fields=pgsql.SQL(SPATIAL_FIELDS if spatial else ""),
+        spatial_join=pgsql.SQL(SPATIAL_JOIN if spatial else ""),
+    )
+    async with conn.cursor() as cur:
+        with phase("execution"):
+            await cur.execute(query, {"schema": schema, "tables": tables})
+        rows = await cur.fetchall()
+
+    with phase("conversion"):
+        loaded = [TableMetadata.model_validate(row[0]) for row in rows]
+    return {table.table_name: table for table in loaded}
+
+
+async def get_table(
+    conn: psycopg.AsyncConnection,
+    schema: str,
+    table_name: str,
+    cache: CatalogCache | None = None,
+) -> TableMetadata | None:
+    """Load one table's metadata, from cache when one is given.
+
+    Returns:
+        The table's metadata, or None if it does not exist in the schema.
+    """
+    if cache is not None:
+        return await cache.get_or_load(
+            conn,
+            ("table", schema, table_name),
+            lambda: get_table(conn, schema, table_name),
+        )
+    return (await load_tables(conn, schema, [table_name])).get(table_name)
@@ -0,0 +1,124 @@
+"""Cache of schema metadata, invalidated by a catalog version check."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar, cast
+
+import psycopg
+import structlog
+
+from src.services.cache import LRUCache
+
+logger = structlog.get_logger(__name__)
+
+# Fingerprint of the schema's DDL state. Any CREATE, ALTER, DROP or
+# COMMENT rewrites a pg_class, pg_attribute or pg_description row and so
+# changes its xmin; VACUUM and ANALYZE update pg_class in place and do not.
+CATALOG_VERSION_QUERY = """
+WITH rels AS (
+    SELECT c.oid, c.xmin
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %(schema)s
+        AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+)
+SELECT md5(concat_ws('|',
+    (SELECT string_agg(oid || ':' || xmin, ',' ORDER BY oid) FROM rels),
+    (SELECT string_agg(a.attrelid || ':' || a.attnum || ':' || a.xmin, ','
+                       ORDER BY a.attrelid, a.attnum)
+     FROM pg_catalog.pg_attribute a
+     WHERE a.attrelid IN (SELECT oid FROM rels) AND a.attnum > 0),
+    (SELECT string_agg(d.objoid || ':' || d.objsubid || ':' || d.xmin, ','
+                       ORDER BY d.objoid, d.objsubid)
+     FROM pg_catalog.pg_description d
+     WHERE d.classoid = 'pg_catalog.pg_class'::regclass
+        AND d.objoid IN (SELECT oid FROM rels))
+))
+"""
+
+# Metadata for a whole schema is small; this only guards against callers
+# probing many nonexistent table names.
+CATALOG_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+T = TypeVar("T")
+
+
+class CatalogCache:
+    """Serves schema metadata from memory while the catalog is unchanged.
+
+    Before answering from memory the cache compares a fingerprint of the
+    schema's catalog rows with the one its entries were built against,
+    but at most once per ``check_interval`` seconds; calls in between
+    make no catalog queries. A changed fingerprint drops every entry.
+    Entries also expire after ``ttl`` seconds, which bounds how stale
+    the statistics-based row estimates from list_tables can get.
+    """
+
+    def __init__(self, schema: str, ttl: float, check_interval: float) -> None:
+        self._schema = schema
+        self._check_interval = check_interval
+        self._entries: LRUCache[Hashable, tuple[object]] = LRUCache(
+            CATALOG_CACHE_MAX_BYTES, ttl, sizeof=lambda value: len(repr(value))
+        )
+        self._version: str | None = None
+        self._checked_at = float("-inf")
+        self.version_checks = 0
+
+    async def get_or_load(
+        self,
+        conn: psycopg.AsyncConnection,
+        key: Hashable,
+        load: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Return the cached value for key, or load and cache it.
+
+        Args:
+            conn: Database connection for the version check.
+            key: Identifies the metadata, e.g. ("describe_table", name).
+            load: Coroutine function that reads the metadata on a miss.
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        await self._validate(conn)
+        # Values are boxed so that a cached None (e.g. a missing table)
+        # is told apart from a miss. Each key is only ever loaded by the
+        # same function, so its box holds the type that function returns.
+        cached = self._entries.get(key)
+        if cached is not None:
+            return cast(T, cached[0])
+        value = await load()
+        self._entries.put(key, (value,))
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry and force a version check on the next call."""
+        self._entries.clear()
+        self._version = None
+        self._checked_at = float("-inf")
+
+    def stats(self) -> dict[str, object]:
+        """Return occupancy, hit and miss counters, and version checks."""
+        return {
+            **self._entries.stats(),
+            "check_interval_seconds": self._check_interval,
+            "version_checks": self.version_checks,
+        }
+
+    async def _validate(self, conn: psycopg.AsyncConnection) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self._check_interval:
+            return
+        async with conn.cursor() as cur:
+            await cur.execute(CATALOG_VERSION_QUERY, {"schema": self._schema})
+            row = await cur.fetchone()
+        version = row[0] if row is not None else None
+        self.version_checks += 1
+        self._checked_at = now
+        if version != self._version:
+            if self._version is not None:
+                logger.info("catalog_changed", schema=self._schema)
+            self._entries.clear()
+            self._version = version
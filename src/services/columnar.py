@@ -0,0 +1,69 @@
+"""Column-oriented encoding of query results."""
+
+from __future__ import annotations
+
+from src.models.query import QueryResult
+
+# A text column is dictionary-encoded when it has at most this many
+# distinct values and they repeat on average at least twice.
+DICTIONARY_MAX_CARDINALITY = 256
+
+
+def to_columnar(
+    result: QueryResult,
+    dictionary_encode: bool = False,
+) -> dict[str, object]:
+    """Transpose result rows into one array of values per column.
+
+    Args:
+        result: Query result with row-major values.
+        dictionary_encode: Replace low-cardinality text columns with
+            ``{"dictionary": [...], "indices": [...]}``, where each index
+            points into the dictionary and null stays null.
+
+    Returns:
+        Mapping of column name to its values, in column order.
+
+    Raises:
+        ValueError: If two result columns share a name.
+    """
+    seen: set[str] = set()
+    for name in result.columns:
+        if name in seen:
+            raise ValueError(
+                f"Duplicate column name '{name}'. "
+                f"Alias the columns to use output='columnar'."
+            )
+        seen.add(name)
+
+    if result.rows:
+        arrays = [list(values) for values in zip(*result.rows)]
+    else:
+        arrays = [[] for _ in result.columns]
+
+    data: dict[str, object] = {}
+    for name, values in zip(result.columns, arrays):
+        encoded = _dictionary_encode(values) if dictionary_encode else None
+        data[name] = encoded if encoded is not None else values
+    return data
+
+
+def _dictionary_encode(values: list[object]) -> dict[str, object] | None:
+    """Dictionary-encode a text column, or return None if it does not pay off."""
+    index: dict[str, int] = {}
+    indices: list[int | None] = []
+    for value in values:
+        if value is None:
+            indices.append(None)
+            continue
+        if not isinstance(value, str):
+            return None
+        position = index.get(value)
+        if position is None:
+            if len(index) >= DICTIONARY_MAX_CARDINALITY:
+                return None
+            position = index[value] = len(index)
+        indices.append(position)
+    if not index or len(index) * 2 > len(values):
+        return None
+    return {"dictionary": list(index), "indices": indices}
@@ -6,6 +6,7 @@ import structlog
 import psycopg
 
 from src.config.settings import Settings, get_password
+from src.services.geometry import register_geometry_types
 
 logger = structlog.get_logger(__name__)
 
@@ -13,6 +14,8 @@ logger = structlog.get_logger(__name__)
 async def create_connection(settings: Settings) -> psycopg.AsyncConnection:
     """Create an async database connection from settings.
 
+    PostGIS geometry/geography loaders are registered on the new connection.
+
     Args:
         settings: Server settings with DB connection params.
 
@@ -31,6 +34,7 @@ async def create_connection(settings: Settings) -> psycopg.AsyncConnection:
         dbname=settings.dbname,
         autocommit=True,
     )
+    await register_geometry_types(conn)
     logger.info(
         "database_connected",
         host=settings.host,
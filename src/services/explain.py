@@ -0,0 +1,209 @@
+"""EXPLAIN-based plan summaries and the cost preflight for queries."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+import psycopg
+import structlog
+from psycopg import sql as pgsql
+
+from src.models.explain import PlanSummary
+from src.services.portal import Params
+from src.services.query import set_local_timeout, timeout_errors
+from src.services.sql_parser import parse_sql
+
+logger = structlog.get_logger(__name__)
+
+# Indexes whose operator class indexes a PostGIS type, i.e. the GiST,
+# SP-GiST or BRIN indexes that serve &&, ST_Intersects, ST_DWithin etc.
+# EXPLAIN names indexes without their schema, so they are only looked
+# up in the schemas the query reads from.
+SPATIAL_INDEXES_QUERY = """
+SELECT DISTINCT c.relname
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_catalog.pg_index i ON i.indexrelid = c.oid
+JOIN pg_catalog.pg_opclass oc ON oc.oid = ANY(i.indclass::oid[])
+JOIN pg_catalog.pg_type t ON t.oid = oc.opcintype
+WHERE c.relname = ANY(%(indexes)s)
+    AND n.nspname = ANY(%(schemas)s)
+    AND t.typname IN ('geometry', 'geography')
+ORDER BY c.relname
+"""
+
+
+@dataclass(frozen=True)
+class CostLimits:
+    """Preflight thresholds on a query's estimated cost and row count."""
+
+    max_cost: float | None
+    max_rows: int | None
+    reject: bool
+
+
+async def explain_query(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    schema: str,
+    analyze: bool = False,
+    timeout: float | None = None,
+    params: Params | None = None,
+) -> PlanSummary:
+    """Plan a SELECT and summarize its estimated cost and index use.
+
+    With analyze the query is executed, in a read-only transaction that
+    is rolled back, and the summary adds actual rows and timings.
+
+    Args:
+        conn: Database connection.
+        sql: Validated SELECT SQL statement.
+        schema: Schema of the query's unqualified table names.
+        analyze: Run EXPLAIN ANALYZE instead of only planning.
+        timeout: Statement timeout in seconds for EXPLAIN ANALYZE.
+        params: Values for the statement's placeholders.
+
+    Returns:
+        The plan summary.
+
+    Raises:
+        QueryTimeoutError: If the statement timeout cancels EXPLAIN ANALYZE.
+    """
+    options = "FORMAT JSON, ANALYZE, BUFFERS" if analyze else "FORMAT JSON"
+    statement = pgsql.SQL("EXPLAIN ({}) {}").format(
+        pgsql.SQL(options), pgsql.SQL(sql.rstrip().rstrip(";"))
+    )
+    if analyze:
+        async with timeout_errors(timeout), conn.transaction(force_rollback=True):
+            await conn.execute("SET TRANSACTION READ ONLY")
+            if timeout is not None:
+                await set_local_timeout(conn, timeout)
+            document = await _run_explain(conn, statement, params)
+    else:
+        document = await _run_explain(conn, statement, params)
+
+    root = document["Plan"]
+    nodes = list(_walk(root))
+    index_names = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+    schemas = {schema} | {
+        r.schema for r in parse_sql(sql).relations if r.schema is not None
+    }
+    spatial = await _spatial_indexes(conn, index_names, sorted(schemas))
+    timings: dict[str, Any] = {}
+    if analyze:
+        timings = {
+            "actual_rows": root.get("Actual Rows"),
+            "planning_time_ms": document.get("Planning Time"),
+            "execution_time_ms": document.get("Execution Time"),
+        }
+    summary = PlanSummary(
+        plan=document,
+        total_cost=root["Total Cost"],
+        estimated_rows=root["Plan Rows"],
+        spatial_index_used=bool(spatial),
+        spatial_indexes=spatial,
+        seq_scans=sorted(
+            {n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"}
+        ),
+        **timings,
+    )
+    logger.info(
+        "query_explained",
+        sql=sql[:200],
+        analyze=analyze,
+        total_cost=summary.total_cost,
+        estimated_rows=summary.estimated_rows,
+        spatial_index_used=summary.spatial_index_used,
+    )
+    return summary
+
+
+async def check_cost(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    schema: str,
+    limits: CostLimits,
+    params: Params | None = None,
+) -> str | None:
+    """Plan a query and compare its estimates with the preflight limits.
+
+    Estimates come from the planner's statistics and can be far off on
+    tables that were never analyzed.
+
+    Returns:
+        A warning when a limit is exceeded in warn mode, else None.
+
+    Raises:
+        ValueError: If a limit is exceeded and limits.reject is set.
+    """
+    summary = await explain_query(conn, sql, schema, params=params)
+    exceeded = []
+    if limits.max_cost is not None and summary.total_cost > limits.max_cost:
+        exceeded.append(
+            f"estimated cost {summary.total_cost:.0f} exceeds {limits.max_cost:g}"
+        )
+    if limits.max_rows is not None and summary.estimated_rows > limits.max_rows:
+        exceeded.append(
+            f"estimated rows {summary.estimated_rows} exceed {limits.max_rows}"
+        )
+    if not exceeded:
+        return None
+
+    scans = (
+        f" Sequential scans on: {', '.join(summary.seq_scans)}."
+        if summary.seq_scans
+        else ""
+    )
+    reason = "; ".join(exceeded)
+    message = (
+        f"{reason[0].upper()}{reason[1:]}.{scans} Add a selective filter "
+        f"(e.g. a bounding box on an indexed geometry column) or a LIMIT, "
+        f"and use explain to inspect the plan."
+    )
+    logger.warning(
+        "query_preflight_exceeded",
+        sql=sql[:200],
+        total_cost=summary.total_cost,
+        estimated_rows=summary.estimated_rows,
+        rejected=limits.reject,
+    )
+    if limits.reject:
+        raise ValueError(f"Query rejected: {message}")
+    return message
+
+
+async def _run_explain(
+    conn: psycopg.AsyncConnection,
+    statement: pgsql.Composed,
+    params: Params | None,
+) -> dict[str, Any]:
+    # binary=True forces the extended protocol, which refuses a second
+    # statement smuggled in after a semicolon.
+    async with conn.cursor(binary=True) as cur:
+        await cur.execute(statement, params)
+        row = await cur.fetchone()
+    assert row is not None
+    document: dict[str, Any] = row[0][0]
+    return document
+
+
+def _walk(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Yield a plan node and all of its descendants."""
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _walk(child)
+
+
+async def _spatial_indexes(
+    conn: psycopg.AsyncConnection, index_names: list[str], schemas: list[str]
+) -> list[str]:
+    if not index_names:
+        return []
+    async with conn.cursor() as cur:
+        await cur.execute(
+            SPATIAL_INDEXES_QUERY, {"indexes": index_names, "schemas": schemas}
+        )
+        rows = await cur.fetchall()
+    return [row[0] for row in rows]
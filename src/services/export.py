@@ -0,0 +1,430 @@
+"""Query results written to files in the export directory."""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextlib import aclosing
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import BinaryIO, Literal, TypeVar, cast
+
+import psycopg
+import structlog
+from pydantic_core import to_json
+
+from src.services.flatgeobuf import FlatGeobufWriter
+from src.services.geometry import geojson_to_wkt, register_geometry_types
+from src.services.portal import Params, Portal
+from src.services.query import fetch_batches, set_local_timeout, timeout_errors
+from src.services.stream import row_encoder
+
+try:
+    import pyarrow as pa  # type: ignore[import-untyped]
+except ImportError:  # pyarrow is the optional "arrow" extra
+    pa = None
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+# NamedTemporaryFile creates files readable by their owner only; exports
+# get the mode open() would have given them.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+ExportFormat = Literal["flatgeobuf", "geojsonseq", "csv", "arrow"]
+
+EXTENSIONS: dict[str, str] = {
+    "flatgeobuf": ".fgb",
+    "geojsonseq": ".geojsons",
+    "csv": ".csv",
+    "arrow": ".arrow",
+}
+
+MEDIA_TYPES: dict[str, str] = {
+    "flatgeobuf": "application/flatgeobuf",
+    "geojsonseq": "application/geo+json-seq",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+# Formats read back as bytes rather than text.
+BINARY_FORMATS = frozenset({"flatgeobuf", "arrow"})
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    """A finished export.
+
+    Attributes:
+        path: Absolute path of the written file.
+        format: Format it was written in.
+        rows: Rows written.
+        size: File size in bytes.
+    """
+
+    path: Path
+    format: ExportFormat
+    rows: int
+    size: int
+
+
+def export_path(
+    export_dir: Path, path: str, output: ExportFormat | None = None
+) -> Path:
+    """Resolve a caller's relative file path inside the export directory.
+
+    With output, the format's extension is added when the path has none.
+
+    Raises:
+        ValueError: If the path is absolute or leads outside export_dir.
+    """
+    relative = Path(path)
+    if not path.strip() or relative.name in ("", "..") or relative.is_absolute():
+        raise ValueError("path must be a file path relative to the export directory.")
+    if output is not None and not relative.suffix:
+        relative = relative.with_suffix(EXTENSIONS[output])
+    root = export_dir.resolve()
+    target = (root / relative).resolve()
+    if not target.is_relative_to(root) or target == root:
+        raise ValueError(f"path '{path}' leads outside the export directory.")
+    return target
+
+
+async def export_query(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    target: Path,
+    output: ExportFormat,
+    max_bytes: int | None = None,
+    timeout: float | None = None,
+    params: Params | None = None,
+    overwrite: bool = False,
+) -> ExportResult:
+    """Run a SELECT and write its rows to a file, batch by batch.
+
+    Rows go through a server-side cursor in a read-only transaction and
+    are written as they are fetched, so memory use does not grow with
+    the result. The file is written under a unique temporary name and
+    moved into place once complete; a failed export leaves nothing
+    behind. Whether target already exists is decided by that move, so
+    concurrent exports to one path cannot both write it.
+
+    With flatgeobuf and geojsonseq the first geometry column is the
+    feature geometry and the other columns are properties. CSV has a
+    header row and geometries as WKT. arrow is an Arrow IPC file with
+    one record batch per FETCH and geometries as WKT; it needs pyarrow.
+
+    Args:
+        conn: Database connection.
+        sql: Validated SELECT statement.
+        target: File to write, inside the export directory.
+        output: "flatgeobuf", "geojsonseq", "csv" or "arrow".
+        max_bytes: Size at which the export is abandoned; None for no limit.
+        timeout: Statement timeout in seconds for the DECLARE and each
+            FETCH; None keeps the session's.
+        params: Values for %s or %(name)s placeholders in sql.
+        overwrite: Replace target if it exists.
+
+    Raises:
+        ValueError: If flatgeobuf or geojsonseq is requested for a result
+            without a geometry column, arrow without pyarrow installed,
+            or the file outgrows max_bytes.
+        FileExistsError: If target exists and overwrite is false.
+        QueryTimeoutError: If the statement timeout cancels the query.
+    """
+    if output == "arrow" and pa is None:
+        raise ValueError("format='arrow' needs pyarrow; install geo-post-mcp[arrow].")
+    start = time.monotonic()
+    geometry_oids = await register_geometry_types(conn)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    sink: _Sink | None = None
+    partial: Path | None = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            dir=target.parent,
+            prefix=f".{target.name}.",
+            suffix=".partial",
+            delete=False,
+        ) as tmp:
+            partial = Path(tmp.name)
+            out = cast(BinaryIO, tmp)
+            async with timeout_errors(timeout), conn.transaction():
+                await conn.execute("SET TRANSACTION READ ONLY")
+                if timeout is not None:
+                    await set_local_timeout(conn, timeout)
+                portal = Portal(conn)
+                await portal.declare(sql, params)
+                async with aclosing(fetch_batches(portal, sys.maxsize)) as batches:
+                    async for batch in batches:
+                        if sink is None:
+                            sink = _sink(output, out, portal, geometry_oids, target)
+                        # Encoding and writing a batch blocks; keep it off
+                        # the event loop so other requests are served.
+                        await _in_thread(sink.write, batch)
+                        rows += len(batch)
+                        _check_size(sink.size(), max_bytes, rows)
+            assert sink is not None
+            # Sorting and indexing FlatGeobuf features takes a while on
+            # large results; keep it off the event loop as well.
+            size = await _in_thread(sink.close)
+        os.chmod(partial, 0o666 & ~_UMASK)
+        if overwrite:
+            partial.replace(target)
+        else:
+            # Unlike a rename, a hard link fails if target exists.
+            os.link(partial, target)
+            partial.unlink()
+    except BaseException:
+        if sink is not None:
+            sink.discard()
+        if partial is not None:
+            partial.unlink(missing_ok=True)
+        raise
+
+    logger.info(
+        "query_exported",
+        sql=sql[:200],
+        format=output,
+        path=str(target),
+        row_count=rows,
+        size=size,
+        elapsed_seconds=round(time.monotonic() - start, 3),
+    )
+    return ExportResult(path=target, format=output, rows=rows, size=size)
+
+
+async def _in_thread(func: Callable[..., T], *args: object) -> T:
+    """Run func in a worker thread and wait for it even when cancelled.
+
+    A cancelled export closes and removes its file, which must not
+    happen while a write to it is still running.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+
+def _check_size(size: int, max_bytes: int | None, rows: int) -> None:
+    if max_bytes is not None and size > max_bytes:
+        raise ValueError(
+            f"Export exceeds the server limit of {max_bytes} bytes after "
+            f"{rows} rows; narrow the query."
+        )
+
+
+class _Sink(ABC):
+    """Writes batches of rows to the open export file.
+
+    write and close run in a worker thread, one call at a time.
+    """
+
+    def __init__(self, out: BinaryIO) -> None:
+        self._out = out
+
+    @abstractmethod
+    def write(self, batch: list[list[object]]) -> None:
+        """Encode a batch of rows and append it to the file."""
+
+    def size(self) -> int:
+        """Bytes written so far."""
+        return self._out.tell()
+
+    def close(self) -> int:
+        """Finish the file and return its size."""
+        return self._out.tell()
+
+    def discard(self) -> None:
+        """Release anything held for an export that failed."""
+
+
+class _GeoJSONSeqSink(_Sink):
+    def __init__(
+        self, out: BinaryIO, portal: Portal, geometry_oids: frozenset[int]
+    ) -> None:
+        super().__init__(out)
+        self._encode = row_encoder(portal, "geojsonseq", geometry_oids)
+
+    def write(self, batch: list[list[object]]) -> None:
+        self._out.write(b"".join(map(self._encode, batch)))
+
+
+class _CsvSink(_Sink):
+    def __init__(
+        self, out: BinaryIO, portal: Portal, geometry_oids: frozenset[int]
+    ) -> None:
+        super().__init__(out)
+        self._geometries = [
+            i for i, oid in enumerate(portal.type_codes) if oid in geometry_oids
+        ]
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._writer.writerow(portal.columns)
+
+    def write(self, batch: list[list[object]]) -> None:
+        for row in batch:
+            for i in self._geometries:
+                if isinstance(row[i], dict):
+                    row[i] = geojson_to_wkt(row[i])  # type: ignore[arg-type]
+            self._writer.writerow(map(_csv_value, row))
+        self._out.write(self._buffer.getvalue().encode())
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+
+class _FlatGeobufSink(_Sink):
+    def __init__(
+        self,
+        out: BinaryIO,
+        portal: Portal,
+        geometry_oids: frozenset[int],
+        name: str,
+    ) -> None:
+        super().__init__(out)
+        type_codes = portal.type_codes
+        geometry = next(
+            (i for i, oid in enumerate(type_codes) if oid in geometry_oids), None
+        )
+        if geometry is None:
+            raise ValueError(
+                "format='flatgeobuf' needs a geometry column in the result."
+            )
+        self._geometry = geometry
+        self._properties = [i for i in range(len(type_codes)) if i != geometry]
+        self._writer = FlatGeobufWriter(
+            out, name, [(portal.columns[i], type_codes[i]) for i in self._properties]
+        )
+        self._spooled = 0
+
+    def write(self, batch: list[list[object]]) -> None:
+        for row in batch:
+            self._writer.add(row[self._geometry], [row[i] for i in self._properties])
+        self._spooled = self._writer.spooled_bytes()
+
+    def size(self) -> int:
+        return self._spooled
+
+    def close(self) -> int:
+        return self._writer.close()
+
+    def discard(self) -> None:
+        self._writer.discard()
+
+
+class _ArrowSink(_Sink):
+    """Writes each batch of rows as one record batch of an Arrow IPC file.
+
+    Column types come from the type OIDs, so every batch has the schema
+    of the first; types without an Arrow counterpart are written as
+    strings, the way the CSV sink writes them.
+    """
+
+    def __init__(
+        self, out: BinaryIO, portal: Portal, geometry_oids: frozenset[int]
+    ) -> None:
+        super().__init__(out)
+        types = {
+            16: pa.bool_(),
+            21: pa.int16(),
+            23: pa.int32(),
+            20: pa.int64(),
+            26: pa.int64(),
+            700: pa.float32(),
+            701: pa.float64(),
+            1700: pa.float64(),
+            17: pa.binary(),
+            1082: pa.date32(),
+            1083: pa.time64("us"),
+            1114: pa.timestamp("us"),
+            1184: pa.timestamp("us", tz="UTC"),
+        }
+        fields = []
+        self._converters: list[Callable[[object], object] | None] = []
+        for name, oid in zip(portal.columns, portal.type_codes):
+            fields.append(pa.field(name, types.get(oid, pa.string())))
+            if oid in geometry_oids:
+                self._converters.append(_wkt_value)
+            elif oid == 1700:
+                self._converters.append(_numeric_value)
+            elif oid == 17:
+                self._converters.append(_bytea_value)
+            elif oid not in types:
+                self._converters.append(_string_value)
+            else:
+                self._converters.append(None)
+        self._schema = pa.schema(fields)
+        self._writer = pa.ipc.new_file(out, self._schema)
+
+    def write(self, batch: list[list[object]]) -> None:
+        columns = zip(*batch) if batch else [()] * len(self._converters)
+        arrays = []
+        for values, convert, field in zip(columns, self._converters, self._schema):
+            if convert is not None:
+                values = tuple(None if v is None else convert(v) for v in values)
+            arrays.append(pa.array(values, type=field.type))
+        self._writer.write_batch(
+            pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+        )
+
+    def close(self) -> int:
+        self._writer.close()
+        return self._out.tell()
+
+
+def _sink(
+    output: ExportFormat,
+    out: BinaryIO,
+    portal: Portal,
+    geometry_oids: frozenset[int],
+    target: Path,
+) -> _Sink:
+    """Pick the writer for a format once the portal has described its columns."""
+    if output == "flatgeobuf":
+        return _FlatGeobufSink(out, portal, geometry_oids, target.stem)
+    if output == "geojsonseq":
+        return _GeoJSONSeqSink(out, portal, geometry_oids)
+    if output == "arrow":
+        return _ArrowSink(out, portal, geometry_oids)
+    return _CsvSink(out, portal, geometry_oids)
+
+
+def _csv_value(value: object) -> object:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return to_json(value).decode()
+    return value
+
+
+def _wkt_value(value: object) -> object:
+    return geojson_to_wkt(value) if isinstance(value, dict) else value
+
+
+def _numeric_value(value: object) -> object:
+    assert isinstance(value, Decimal)
+    return float(value)
+
+
+def _bytea_value(value: object) -> object:
+    # The portal renders bytea as hex text for JSON; Arrow stores the bytes.
+    assert isinstance(value, str)
+    return bytes.fromhex(value[2:])
+
+
+def _string_value(value: object) -> str:
+    if isinstance(value, (dict, list)):
+        return to_json(value).decode()
+    return str(value)
@@ -0,0 +1,214 @@
+"""Spatial extent of a table, estimated from statistics or computed exactly."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import psycopg
+import structlog
+from psycopg import sql as pgsql
+
+from src.models.catalog import TableMetadata
+from src.services.cache import LRUCache
+from src.services.query import set_local_timeout, timeout_errors
+from src.services.query_cache import TableVersions, table_versions
+
+logger = structlog.get_logger(__name__)
+
+# Exact extents are a few hundred bytes each; entries stay valid until
+# their table is written to, the TTL only ages out tables no one asks for.
+EXTENT_CACHE_MAX_BYTES = 1024 * 1024
+EXTENT_CACHE_TTL = 3600.0
+
+# Answers from the statistics ANALYZE stores, without reading the table:
+# reltuples for the row count (-1 before the first ANALYZE), pg_stats for
+# the share of NULL geometries, and the bounds of the PostGIS histogram
+# for the extent, which is NULL when there is none.
+ESTIMATE_QUERY = """
+SELECT c.reltuples::bigint, s.null_frac,
+       ST_XMin(e.box), ST_YMin(e.box), ST_XMax(e.box), ST_YMax(e.box)
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_catalog.pg_stats s
+    ON s.schemaname = n.nspname
+    AND s.tablename = c.relname
+    AND s.attname = %(column)s
+    AND NOT s.inherited
+CROSS JOIN LATERAL (
+    SELECT ST_EstimatedExtent(%(schema)s, %(table)s, %(column)s) AS box
+) AS e
+WHERE n.nspname = %(schema)s AND c.relname = %(table)s
+"""
+
+# One scan computing the extent and row count per geometry type; the
+# group with a NULL type holds the NULL geometries.
+EXACT_QUERY = """
+SELECT g.type, g.n, ST_XMin(g.box), ST_YMin(g.box), ST_XMax(g.box), ST_YMax(g.box)
+FROM (
+    SELECT GeometryType(t.{geom}) AS type, count(*) AS n, ST_Extent(t.{geom}) AS box
+    FROM {table} AS t
+    GROUP BY 1
+) AS g
+"""
+
+Box = tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class SpatialExtent:
+    """Bounds and size of one geometry column.
+
+    Attributes:
+        extent: (xmin, ymin, xmax, ymax) in the column's SRID, or None if
+            unknown (no statistics yet) or the column holds no geometry.
+        rows: Row count, or None when there are no statistics.
+        null_fraction: Share of rows whose geometry is NULL, or None.
+        geometry_types: Rows per geometry type (e.g. {"POLYGON": 10}),
+            only known when computed exactly.
+        exact: Whether the values were computed from the rows rather
+            than estimated from statistics.
+    """
+
+    extent: Box | None
+    rows: int | None
+    null_fraction: float | None
+    geometry_types: dict[str, int] | None
+    exact: bool
+
+
+ExtentKey = tuple[str, str, str]
+
+
+class ExtentCache:
+    """Cache of exactly computed extents, checked against table versions.
+
+    An entry is dropped once its table is modified, as in the query cache.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self._cache: LRUCache[ExtentKey, tuple[TableVersions, SpatialExtent]] = (
+            LRUCache(max_bytes, ttl, sizeof=lambda entry: len(repr(entry)))
+        )
+
+    async def get_or_compute(
+        self,
+        conn: psycopg.AsyncConnection,
+        table: TableMetadata,
+        geom_column: str,
+        timeout: float | None = None,
+    ) -> SpatialExtent:
+        """Return the cached exact extent, computing and caching it on a miss."""
+        key = (table.schema_, table.table_name, geom_column)
+        versions = await table_versions(conn, [(table.schema_, table.table_name)])
+        if versions is not None:
+            entry = self._cache.get(key, validate=lambda e: e[0] == versions)
+            if entry is not None:
+                return entry[1]
+        extent = await exact_extent(conn, table, geom_column, timeout)
+        if versions is not None:
+            self._cache.put(key, (versions, extent))
+        return extent
+
+    def stats(self) -> dict[str, object]:
+        """Return occupancy and hit, miss, eviction, and invalidation counters."""
+        return self._cache.stats()
+
+
+async def estimated_extent(
+    conn: psycopg.AsyncConnection, table: TableMetadata, geom_column: str
+) -> SpatialExtent:
+    """Estimate a geometry column's extent and row count from statistics.
+
+    Costs one catalog lookup whatever the table's size. The figures are
+    as of the table's last ANALYZE (or autovacuum's), so rows written
+    since are not reflected.
+    """
+    params = {
+        "schema": table.schema_,
+        "table": table.table_name,
+        "column": geom_column,
+    }
+    async with conn.cursor() as cur:
+        await cur.execute(ESTIMATE_QUERY, params)
+        row = await cur.fetchone()
+    if row is None:
+        return SpatialExtent(None, None, None, None, exact=False)
+    reltuples, null_frac, *box = row
+    return SpatialExtent(
+        extent=_box(box),
+        rows=reltuples if reltuples >= 0 else None,
+        null_fraction=null_frac,
+        geometry_types=None,
+        exact=False,
+    )
+
+
+async def exact_extent(
+    conn: psycopg.AsyncConnection,
+    table: TableMetadata,
+    geom_column: str,
+    timeout: float | None = None,
+) -> SpatialExtent:
+    """Compute a geometry column's extent and type mix by scanning the table.
+
+    Args:
+        conn: Database connection.
+        table: Metadata of an allowed table.
+        geom_column: Geometry column to measure.
+        timeout: Statement timeout in seconds; None keeps the session's.
+
+    Raises:
+        QueryTimeoutError: If the statement timeout cancels the scan.
+    """
+    query = pgsql.SQL(EXACT_QUERY).format(
+        geom=pgsql.Identifier(geom_column),
+        table=pgsql.Identifier(table.schema_, table.table_name),
+    )
+    start = time.monotonic()
+    async with timeout_errors(timeout), conn.transaction():
+        await conn.execute("SET TRANSACTION READ ONLY")
+        if timeout is not None:
+            await set_local_timeout(conn, timeout)
+        async with conn.cursor() as cur:
+            await cur.execute(query)
+            rows = await cur.fetchall()
+
+    total = sum(row[1] for row in rows)
+    nulls = sum(row[1] for row in rows if row[0] is None)
+    boxes = [box for row in rows if (box := _box(row[2:])) is not None]
+    extent = None
+    if boxes:
+        extent = (
+            min(b[0] for b in boxes),
+            min(b[1] for b in boxes),
+            max(b[2] for b in boxes),
+            max(b[3] for b in boxes),
+        )
+    result = SpatialExtent(
+        extent=extent,
+        rows=total,
+        null_fraction=nulls / total if total else None,
+        geometry_types={
+            row[0]: row[1]
+            for row in sorted(rows, key=lambda r: -r[1])
+            if row[0] is not None
+        },
+        exact=True,
+    )
+    logger.info(
+        "extent_computed",
+        table=table.table_name,
+        geom_column=geom_column,
+        rows=total,
+        elapsed_seconds=round(time.monotonic() - start, 3),
+    )
+    return result
+
+
+def _box(values: Sequence[object]) -> Box | None:
+    if any(v is None for v in values):
+        return None
+    xmin, ymin, xmax, ymax = (float(v) for v in values)  # type: ignore[arg-type]
+    return (xmin, ymin, xmax, ymax)
@@ -0,0 +1,96 @@
+"""Bounding-box feature queries with zoom-dependent simplification."""
+
+from __future__ import annotations
+
+import psycopg
+from psycopg import sql as pgsql
+
+from src.models.catalog import ColumnMetadata, TableMetadata
+
+# Ground size of one pixel of a 256-pixel Web Mercator tile at zoom 0;
+# it halves with each zoom level.
+ZOOM0_METRES_PER_PIXEL = 156543.03392804097
+# Metres per degree along the equator, for SRIDs in longitude/latitude.
+METRES_PER_DEGREE = 111319.49079327357
+MAX_ZOOM = 30
+
+# The envelope is transformed to the column's SRID so that && runs
+# against the column as stored and can use its spatial index;
+# ST_Intersects then drops features whose bounding box only overlaps.
+# The geometry comes first: ST_AsGeoJSON takes the first geometry column
+# of a row as the Feature geometry, and attributes may include others.
+BBOX_QUERY = """
+SELECT {geometry} AS {geom}{attributes}
+FROM {table} AS t,
+    (SELECT ST_Transform(
+        ST_MakeEnvelope(%(minx)s, %(miny)s, %(maxx)s, %(maxy)s, %(srid)s::int),
+        {column_srid}
+    ) AS env) AS bbox
+WHERE t.{geom} && bbox.env AND ST_Intersects(t.{geom}, bbox.env)
+"""
+
+# One pixel at the requested zoom, in the column's units: degrees for
+# geographic SRIDs, otherwise the projection's linear unit, taken as metres.
+SIMPLIFIED_GEOMETRY = """ST_SimplifyPreserveTopology(t.{geom}, %(pixel_metres)s / (
+        SELECT CASE WHEN proj4text LIKE '%%+proj=longlat%%'
+            THEN {metres_per_degree} ELSE 1 END
+        FROM spatial_ref_sys WHERE srid = {column_srid}
+    ))"""
+
+
+def check_bbox(minx: float, miny: float, maxx: float, maxy: float) -> None:
+    """Raise ValueError unless the box has a positive width and height."""
+    if not (minx < maxx and miny < maxy):
+        raise ValueError(
+            "Bounding box must have minx < maxx and miny < maxy; "
+            f"got ({minx}, {miny}, {maxx}, {maxy})."
+        )
+
+
+def pixel_size(zoom: int) -> float:
+    """Return the ground size of one Web Mercator pixel at zoom, in metres."""
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ValueError(f"Zoom must be between 0 and {MAX_ZOOM}; got {zoom}.")
+    return ZOOM0_METRES_PER_PIXEL / (1 << zoom)
+
+
+def bbox_query(
+    conn: psycopg.AsyncConnection,
+    table: TableMetadata,
+    column: ColumnMetadata,
+    attributes: list[str],
+    zoom: int | None = None,
+) -> str:
+    """Build the SELECT for the features of a table inside a bounding box.
+
+    The statement takes minx, miny, maxx, maxy and srid parameters, plus
+    pixel_metres when zoom is given, and returns the geometry,
+    simplified to one pixel at that zoom, followed by the attributes.
+
+    Args:
+        conn: Connection whose encoding is used to render identifiers.
+        table: Table metadata.
+        column: Geometry column with a known SRID.
+        attributes: Attribute columns to select.
+        zoom: Web Mercator zoom level the features are shown at; None
+            returns geometries at full resolution.
+    """
+    geom = pgsql.Identifier(column.column_name)
+    column_srid = pgsql.Literal(column.srid)
+    geometry: pgsql.Composable = pgsql.SQL("t.{}").format(geom)
+    if zoom is not None:
+        geometry = pgsql.SQL(SIMPLIFIED_GEOMETRY).format(
+            geom=geom,
+            metres_per_degree=pgsql.Literal(METRES_PER_DEGREE),
+            column_srid=column_srid,
+        )
+    query = pgsql.SQL(BBOX_QUERY).format(
+        attributes=pgsql.SQL("").join(
+            pgsql.SQL(", t.{}").format(pgsql.Identifier(name)) for name in attributes
+        ),
+        geometry=geometry,
+        geom=geom,
+        table=pgsql.Identifier(table.schema_, table.table_name),
+        column_srid=column_srid,
+    )
+    return query.as_string(conn)
@@ -0,0 +1,484 @@
+"""FlatGeobuf writer with the packed Hilbert R-tree spatial index.
+
+Implements the parts of the FlatGeobuf format (https://flatgeobuf.org)
+needed to write query results: the header, features carrying 2D or 3D
+geometries and typed properties, and the index readers use for bbox
+queries. The few FlatBuffers tables involved are encoded here directly.
+"""
+
+from __future__ import annotations
+
+import datetime
+import math
+import struct
+import tempfile
+from array import array
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any, BinaryIO, cast
+
+from pydantic_core import to_json
+
+MAGIC = b"fgb\x03fgb\x00"
+INDEX_NODE_SIZE = 16
+HILBERT_MAX = (1 << 16) - 1
+
+# GeometryType enum of the FlatGeobuf schema.
+GEOMETRY_TYPES = {
+    "Point": 1,
+    "LineString": 2,
+    "Polygon": 3,
+    "MultiPoint": 4,
+    "MultiLineString": 5,
+    "MultiPolygon": 6,
+    "GeometryCollection": 7,
+}
+
+# ColumnType enum values, keyed by the Postgres type OIDs they store.
+_BOOL, _SHORT, _INT, _LONG, _FLOAT, _DOUBLE = 2, 3, 5, 7, 9, 10
+_STRING, _JSON, _DATETIME = 11, 12, 13
+_COLUMN_TYPES = {
+    16: _BOOL,
+    21: _SHORT,
+    23: _INT,
+    20: _LONG,
+    700: _FLOAT,
+    701: _DOUBLE,
+    1700: _DOUBLE,
+    114: _JSON,
+    3802: _JSON,
+    1082: _DATETIME,
+    1114: _DATETIME,
+    1184: _DATETIME,
+}
+_FIXED_FORMATS = {_BOOL: "<?", _SHORT: "<h", _INT: "<i", _LONG: "<q"}
+_FIXED_FORMATS |= {_FLOAT: "<f", _DOUBLE: "<d"}
+
+# A node of the index: bounds as four doubles, then a uint64 offset.
+_NODE = struct.Struct("<4dQ")
+_EMPTY_BOX = (math.inf, math.inf, -math.inf, -math.inf)
+
+# An encoded FlatBuffers object: 8-aligned bytes and where the object
+# (the target of offsets to it) starts in them.
+_Object = tuple[bytes, int]
+# A bounding box: min x, min y, max x, max y.
+_Box = tuple[float, float, float, float]
+# A table field: slot, struct format or "" for an offset, value.
+_Field = tuple[int, str, object]
+
+
+class FlatGeobufWriter:
+    """Write features to a FlatGeobuf file with a spatial index.
+
+    The index must precede the features in the file and lists them in
+    Hilbert order of their bounding boxes, so features are first
+    spooled to a temporary file next to the target; close() then
+    writes header, index and sorted features. Memory use is about
+    100 bytes per feature for bounds and offsets, whatever the size of
+    the geometries.
+
+    Geometries are GeoJSON dicts as loaded from the database. The first
+    non-empty geometry decides whether Z values are written. Those
+    without a ``crs`` member are taken to be in EPSG:4326, as GeoJSON
+    assumes.
+
+    Args:
+        out: Binary file the result is written to.
+        name: Dataset name stored in the header.
+        columns: Property names, with the Postgres type OID of each.
+    """
+
+    def __init__(
+        self, out: BinaryIO, name: str, columns: Sequence[tuple[str, int]]
+    ) -> None:
+        self._out = out
+        self._name = name
+        self._columns = [
+            (column, _COLUMN_TYPES.get(type_code, _STRING))
+            for column, type_code in columns
+        ]
+        target = getattr(out, "name", None)
+        spool_dir = Path(target).parent if isinstance(target, str) else None
+        self._spool = tempfile.TemporaryFile(dir=spool_dir)
+        self._bounds = array("d")
+        self._offsets = array("Q")
+        self._sizes = array("I")
+        self._types: set[int] = set()
+        self._has_z: bool | None = None
+        self._srid: int | None = None
+
+    def add(self, geometry: object, properties: Sequence[object]) -> None:
+        """Spool one feature; properties follow the order of the columns."""
+        box = list(_EMPTY_BOX)
+        fields: list[_Field] = []
+        if isinstance(geometry, dict) and geometry.get("type") in GEOMETRY_TYPES:
+            encoded = self._geometry(geometry, box)
+            # Readers reject geometries without coordinates; empty ones
+            # are written as missing, like NULLs.
+            if box[0] <= box[2]:
+                if self._srid is None:
+                    self._srid = _srid(geometry)
+                self._types.add(GEOMETRY_TYPES[geometry["type"]])
+                fields.append((0, "", encoded))
+        values = self._properties(properties)
+        if values:
+            fields.append((1, "", _vector("B", values)))
+        feature = _finish(_table(fields))
+
+        self._offsets.append(self._spool.tell())
+        self._sizes.append(len(feature) + 4)
+        self._bounds.extend(box)
+        self._spool.write(struct.pack("<I", len(feature)))
+        self._spool.write(feature)
+
+    def spooled_bytes(self) -> int:
+        """Size of the features spooled so far."""
+        return self._spool.tell()
+
+    def close(self) -> int:
+        """Write the file from the spooled features and return its size in bytes."""
+        try:
+            return self._assemble()
+        finally:
+            self._spool.close()
+
+    def discard(self) -> None:
+        """Drop the spooled features without writing the file."""
+        self._spool.close()
+
+    def _assemble(self) -> int:
+        count = len(self._sizes)
+        bounds = self._bounds
+        extent = _extent(bounds)
+        order = hilbert_order(bounds, extent) if count else []
+
+        written = self._out.write(MAGIC)
+        header = _finish(self._header(count, extent))
+        written += self._out.write(struct.pack("<I", len(header)))
+        written += self._out.write(header)
+        if count:
+            written += self._write_index(order)
+        for i in order:
+            self._spool.seek(self._offsets[i])
+            written += self._out.write(self._spool.read(self._sizes[i]))
+        return written
+
+    def _header(self, count: int, extent: tuple[float, ...]) -> _Object:
+        geometry_type = self._types.pop() if len(self._types) == 1 else 0
+        columns = [
+            _table([(0, "", _string(name)), (1, "B", column_type)])
+            for name, column_type in self._columns
+        ]
+        fields: list[_Field] = [
+            (0, "", _string(self._name)),
+            (2, "B", geometry_type),
+            (3, "?", bool(self._has_z)),
+            (7, "", _table_vector(columns)),
+            (8, "Q", count),
+            (9, "H", INDEX_NODE_SIZE if count else 0),
+        ]
+        if count and math.isfinite(extent[0]):
+            fields.append((1, "", _vector("d", extent)))
+        if self._srid:
+            crs = _table([(0, "", _string("EPSG")), (1, "i", self._srid)])
+            fields.append((10, "", crs))
+        return _table(fields)
+
+    def _write_index(self, order: Sequence[int]) -> int:
+        """Write the packed R-tree: upper levels from the root, then the leaves."""
+        bounds = self._bounds
+        levels = level_bounds(len(order), INDEX_NODE_SIZE)
+
+        # Each parent covers INDEX_NODE_SIZE consecutive nodes of the level
+        # below and points at the first of them by node index. Leaf bounds
+        # are read from the spooled arrays; only upper levels are built.
+        groups: Iterable[Sequence[Sequence[float]]] = (
+            [bounds[4 * i : 4 * i + 4] for i in order[first : first + INDEX_NODE_SIZE]]
+            for first in range(0, len(order), INDEX_NODE_SIZE)
+        )
+        upper: list[list[tuple[_Box, int]]] = []
+        for start, _ in levels[:-1]:
+            parents = [
+                (_union(group), start + j * INDEX_NODE_SIZE)
+                for j, group in enumerate(groups)
+            ]
+            upper.append(parents)
+            boxes = [box for box, _ in parents]
+            groups = [
+                boxes[first : first + INDEX_NODE_SIZE]
+                for first in range(0, len(boxes), INDEX_NODE_SIZE)
+            ]
+
+        written = 0
+        for parents in reversed(upper):
+            for box, offset in parents:
+                written += self._out.write(_NODE.pack(*box, offset))
+        offset = 0
+        for i in order:
+            written += self._out.write(_NODE.pack(*bounds[4 * i : 4 * i + 4], offset))
+            offset += self._sizes[i]
+        return written
+
+    def _geometry(self, geometry: dict[str, Any], box: list[float]) -> _Object:
+        """Encode a geometry, widening box to its bounds."""
+        kind = str(geometry["type"])
+        if kind == "GeometryCollection":
+            parts = [
+                self._geometry(member, box)
+                for member in geometry.get("geometries") or []
+                if isinstance(member, dict) and member.get("type") in GEOMETRY_TYPES
+            ]
+            return _table([(6, "B", 7), (7, "", _table_vector(parts))])
+        coordinates: Any = geometry.get("coordinates") or []
+        if kind == "MultiPolygon":
+            parts = [self._rings(3, polygon, box) for polygon in coordinates]
+            return _table([(6, "B", 6), (7, "", _table_vector(parts))])
+        if kind in ("Point", "LineString", "MultiPoint"):
+            points = [coordinates] if kind == "Point" and coordinates else coordinates
+            return self._rings(GEOMETRY_TYPES[kind], [points], box)
+        return self._rings(GEOMETRY_TYPES[kind], coordinates, box)
+
+    def _rings(
+        self,
+        geometry_type: int,
+        rings: Sequence[Sequence[Sequence[float]]],
+        box: list[float],
+    ) -> _Object:
+        """Encode a geometry whose coordinates are flattened over rings or lines."""
+        xy: list[float] = []
+        z: list[float] = []
+        ends: list[int] = []
+        for ring in rings:
+            for point in ring:
+                if self._has_z is None:
+                    self._has_z = len(point) > 2
+                x, y = point[0], point[1]
+                xy += (x, y)
+                if self._has_z:
+                    z.append(point[2] if len(point) > 2 else 0.0)
+                box[0], box[1] = min(box[0], x), min(box[1], y)
+                box[2], box[3] = max(box[2], x), max(box[3], y)
+            ends.append(len(xy) // 2)
+        fields: list[_Field] = [(6, "B", geometry_type)]
+        if xy:
+            fields.append((1, "", _vector("d", xy)))
+        if z:
+            fields.append((2, "", _vector("d", z)))
+        if len(ends) > 1:
+            fields.append((0, "", _vector("I", ends)))
+        return _table(fields)
+
+    def _properties(self, values: Sequence[object]) -> bytes:
+        """Encode properties as (uint16 column index, value) pairs, skipping NULLs."""
+        encoded = bytearray()
+        for index, (value, (_, column_type)) in enumerate(zip(values, self._columns)):
+            if value is None:
+                continue
+            encoded += struct.pack("<H", index)
+            fixed = _FIXED_FORMATS.get(column_type)
+            if fixed is not None:
+                encoded += struct.pack(fixed, value)
+                continue
+            data = _text(value).encode()
+            encoded += struct.pack("<I", len(data)) + data
+        return bytes(encoded)
+
+
+def hilbert_order(bounds: Sequence[float], extent: Sequence[float]) -> list[int]:
+    """Order boxes, given as flat (xmin, ymin, xmax, ymax) runs, along a Hilbert curve.
+
+    Box centers are placed on a 2^16 grid over extent. Empty boxes (those
+    of features without geometry) sort first.
+    """
+    minx, miny, maxx, maxy = extent
+    width = maxx - minx or 1.0
+    height = maxy - miny or 1.0
+    keys = array("Q")
+    for i in range(0, len(bounds), 4):
+        if bounds[i] > bounds[i + 2]:
+            keys.append(0)
+            continue
+        x = int(HILBERT_MAX * ((bounds[i] + bounds[i + 2]) / 2 - minx) / width)
+        y = int(HILBERT_MAX * ((bounds[i + 1] + bounds[i + 3]) / 2 - miny) / height)
+        keys.append(hilbert(x, y))
+    return sorted(range(len(keys)), key=keys.__getitem__)
+
+
+def hilbert(x: int, y: int) -> int:
+    """Position of grid cell (x, y), each below 2^16, along the Hilbert curve."""
+    a = x ^ y
+    b = 0xFFFF ^ a
+    c = 0xFFFF ^ (x | y)
+    d = x & (y ^ 0xFFFF)
+
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 2)) ^ (b & (b >> 2))
+    B = (a & (b >> 2)) ^ (b & ((a ^ b) >> 2))
+    C ^= (a & (c >> 2)) ^ (b & (d >> 2))
+    D ^= (b & (c >> 2)) ^ ((a ^ b) & (d >> 2))
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 4)) ^ (b & (b >> 4))
+    B = (a & (b >> 4)) ^ (b & ((a ^ b) >> 4))
+    C ^= (a & (c >> 4)) ^ (b & (d >> 4))
+    D ^= (b & (c >> 4)) ^ ((a ^ b) & (d >> 4))
+
+    a, b, c, d = A, B, C, D
+    C ^= (a & (c >> 8)) ^ (b & (d >> 8))
+    D ^= (b & (c >> 8)) ^ ((a ^ b) & (d >> 8))
+
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+
+    i0 = x ^ y
+    i1 = b | (0xFFFF ^ (i0 | a))
+    return (_interleave(i1) << 1) | _interleave(i0)
+
+
+def level_bounds(count: int, node_size: int) -> list[tuple[int, int]]:
+    """Node index ranges of each R-tree level, leaves first, root last.
+
+    The tree is stored root first, so the leaves occupy the end of it.
+    """
+    sizes = [count]
+    n = count
+    while True:
+        n = -(-n // node_size)
+        sizes.append(n)
+        if n == 1:
+            break
+    end = sum(sizes)
+    levels = []
+    for size in sizes:
+        levels.append((end - size, end))
+        end -= size
+    return levels
+
+
+def _interleave(value: int) -> int:
+    """Spread the 16 low bits of value over the even bits of the result."""
+    value = (value | (value << 8)) & 0x00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F
+    value = (value | (value << 2)) & 0x33333333
+    return (value | (value << 1)) & 0x55555555
+
+
+def _union(boxes: Sequence[Sequence[float]]) -> _Box:
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
+
+
+def _extent(bounds: Sequence[float]) -> tuple[float, float, float, float]:
+    extent = list(_EMPTY_BOX)
+    for i in range(0, len(bounds), 4):
+        if bounds[i] <= bounds[i + 2]:
+            extent[0] = min(extent[0], bounds[i])
+            extent[1] = min(extent[1], bounds[i + 1])
+            extent[2] = max(extent[2], bounds[i + 2])
+            extent[3] = max(extent[3], bounds[i + 3])
+    return extent[0], extent[1], extent[2], extent[3]
+
+
+def _srid(geometry: dict[str, object]) -> int:
+    crs = geometry.get("crs")
+    if isinstance(crs, dict):
+        name = str(crs.get("properties", {}).get("name", ""))
+        code = name.rpartition(":")[2]
+        if code.isdigit():
+            return int(code)
+    return 4326
+
+
+def _text(value: object) -> str:
+    """Render a String, Json or DateTime property value."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return to_json(value).decode()
+    return str(value)
+
+
+# FlatBuffers encoding. Objects are built bottom-up as 8-aligned blobs
+# whose children follow them, so every offset points forward as the
+# format requires. Tables start with their vtable.
+
+
+def _pad(data: bytes | bytearray) -> bytes:
+    return bytes(data) + bytes(-len(data) % 8)
+
+
+def _string(text: str) -> _Object:
+    data = text.encode()
+    return _pad(struct.pack("<I", len(data)) + data + b"\0"), 0
+
+
+def _vector(code: str, values: Sequence[object] | bytes) -> _Object:
+    """Encode a vector of scalars, aligning the elements to their size."""
+    if isinstance(values, bytes):
+        return _pad(struct.pack("<I", len(values)) + values), 0
+    body = struct.pack(f"<I{len(values)}{code}", len(values), *values)
+    if struct.calcsize(code) == 8:
+        return _pad(bytes(4) + body), 4
+    return _pad(body), 0
+
+
+def _table_vector(items: Sequence[_Object]) -> _Object:
+    blob = bytearray(struct.pack("<I", len(items)) + bytes(4 * len(items)))
+    for i, (child, root) in enumerate(items):
+        blob += bytes(-len(blob) % 8)
+        slot = 4 + 4 * i
+        struct.pack_into("<I", blob, slot, len(blob) + root - slot)
+        blob += child
+    return _pad(blob), 0
+
+
+def _table(fields: Sequence[_Field]) -> _Object:
+    """Encode a table from (slot, struct format, value) fields.
+
+    A format of "" marks an offset to an encoded child object.
+    """
+    slots = max((slot for slot, _, _ in fields), default=-1) + 1
+    positions = [0] * slots
+    inline = bytearray(4)
+    children: list[tuple[int, _Object]] = []
+    # Widest fields first keeps alignment padding to a minimum.
+    for slot, code, value in sorted(fields, key=lambda f: -_width(f[1])):
+        width = _width(code)
+        inline += bytes(-len(inline) % width)
+        positions[slot] = len(inline)
+        if code:
+            inline += struct.pack("<" + code, value)
+        else:
+            children.append((len(inline), cast(_Object, value)))
+            inline += bytes(4)
+    vtable = struct.pack(f"<HH{slots}H", 4 + 2 * slots, len(inline), *positions)
+    start = len(vtable) + (-len(vtable) % 8)
+    blob = bytearray(vtable) + bytes(start - len(vtable)) + inline
+    struct.pack_into("<i", blob, start, start)
+    for position, (child, root) in children:
+        blob += bytes(-len(blob) % 8)
+        field = start + position
+        struct.pack_into("<I", blob, field, len(blob) + root - field)
+        blob += child
+    return _pad(blob), start
+
+
+def _width(code: str) -> int:
+    return struct.calcsize(code) if code else 4
+
+
+def _finish(root: _Object) -> bytes:
+    """Prefix the root object with its offset, making a complete buffer."""
+    blob, start = root
+    return struct.pack("<I", 8 + start) + bytes(4) + blob
@@ -0,0 +1,302 @@
+"""PostGIS geometry support — type OID lookup and EWKB-to-GeoJSON loaders."""
+
+from __future__ import annotations
+
+import math
+import struct
+import weakref
+from typing import Any
+
+import psycopg
+import structlog
+from psycopg import sql as pgsql
+from psycopg.adapt import Buffer, Loader
+from psycopg.pq import Format
+
+from src.services.portal import Params
+
+logger = structlog.get_logger(__name__)
+
+GEOMETRY_TYPES_QUERY = """
+SELECT t.oid, t.typname
+FROM pg_catalog.pg_type t
+WHERE t.typname IN ('geometry', 'geography')
+"""
+
+_GEOJSON_TYPES = {
+    1: "Point",
+    2: "LineString",
+    3: "Polygon",
+    4: "MultiPoint",
+    5: "MultiLineString",
+    6: "MultiPolygon",
+    7: "GeometryCollection",
+}
+
+_WKB_Z = 0x80000000
+_WKB_M = 0x40000000
+_WKB_SRID = 0x20000000
+_WKB_TYPE_MASK = 0x0FFFFFFF
+
+# Geometry type OIDs found on each connection; PostGIS assigns them at
+# CREATE EXTENSION time, so they differ between databases.
+_registered: weakref.WeakKeyDictionary[psycopg.AsyncConnection, frozenset[int]] = (
+    weakref.WeakKeyDictionary()
+)
+_geography: weakref.WeakKeyDictionary[psycopg.AsyncConnection, frozenset[int]] = (
+    weakref.WeakKeyDictionary()
+)
+
+# Wraps a SELECT to learn its result columns without producing rows.
+DESCRIBE_QUERY = "SELECT * FROM ({query}\n) AS q LIMIT 0"
+MAX_PRECISION = 15
+
+
+class UnsupportedGeometryError(ValueError):
+    """Raised for EWKB geometry types that have no GeoJSON equivalent."""
+
+
+async def register_geometry_types(conn: psycopg.AsyncConnection) -> frozenset[int]:
+    """Look up geometry/geography OIDs and register GeoJSON loaders for them.
+
+    The lookup runs once per connection; later calls return the cached OIDs.
+    Databases without PostGIS yield an empty set.
+
+    Args:
+        conn: Database connection.
+
+    Returns:
+        OIDs of the geometry and geography types.
+    """
+    oids = _registered.get(conn)
+    if oids is not None:
+        return oids
+
+    async with conn.cursor() as cur:
+        await cur.execute(GEOMETRY_TYPES_QUERY)
+        rows = await cur.fetchall()
+    oids = frozenset(row[0] for row in rows)
+
+    for oid in oids:
+        conn.adapters.register_loader(oid, GeometryTextLoader)
+        conn.adapters.register_loader(oid, GeometryBinaryLoader)
+    _registered[conn] = oids
+    _geography[conn] = frozenset(row[0] for row in rows if row[1] == "geography")
+    logger.debug("geometry_types_registered", oids=sorted(oids))
+    return oids
+
+
+async def reduce_coordinates(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    params: Params | None = None,
+    precision: int | None = None,
+    quantize: float | None = None,
+) -> str:
+    """Wrap a SELECT so that its geometry columns carry fewer coordinate digits.
+
+    The statement is first described, with LIMIT 0, to find its geometry
+    and geography columns. In the returned SELECT, geometry columns are
+    snapped to a grid of size quantize with ST_ReducePrecision, which
+    also removes vertices that collapse onto each other; with precision,
+    geometry and geography columns are sent as ST_AsGeoJSON text
+    rounded to that many decimals instead of EWKB. Other columns and
+    all column names are unchanged.
+
+    Args:
+        conn: Database connection.
+        sql: Validated SELECT statement.
+        params: Values for the statement's placeholders.
+        precision: Decimal digits to keep per coordinate.
+        quantize: Grid size in the geometry's units, e.g. 0.01 for
+            centimetres in a metric SRID. Geography columns are not snapped.
+
+    Returns:
+        The wrapping SELECT, taking the same parameters.
+    """
+    oids = await register_geometry_types(conn)
+    query = pgsql.SQL(sql.rstrip().rstrip(";").rstrip())
+    async with conn.cursor(binary=True) as cur:
+        await cur.execute(pgsql.SQL(DESCRIBE_QUERY).format(query=query), params)
+        description = cur.description or []
+
+    geography = _geography.get(conn, frozenset())
+    # Positional aliases keep duplicate output names (e.g. two "id"
+    # columns from a join) addressable.
+    aliases = [pgsql.Identifier(f"c{i}") for i in range(len(description))]
+    select = []
+    for alias, column in zip(aliases, description):
+        expr: pgsql.Composable = pgsql.SQL("q.{}").format(alias)
+        if column.type_code in oids:
+            if quantize is not None and column.type_code not in geography:
+                expr = pgsql.SQL("ST_ReducePrecision({}, {})").format(
+                    expr, pgsql.Literal(quantize)
+                )
+            if precision is not None:
+                expr = pgsql.SQL("ST_AsGeoJSON({}, {})::json").format(
+                    expr, pgsql.Literal(precision)
+                )
+        select.append(
+            pgsql.SQL("{} AS {}").format(expr, pgsql.Identifier(column.name))
+        )
+    wrapped = pgsql.SQL("SELECT {} FROM ({}\n) AS q ({})").format(
+        pgsql.SQL(", ").join(select), query, pgsql.SQL(", ").join(aliases)
+    )
+    return wrapped.as_string(conn)
+
+
+def check_precision(precision: int | None, quantize: float | None) -> None:
+    """Raise ValueError for out-of-range precision or quantize values."""
+    if precision is not None and not 0 <= precision <= MAX_PRECISION:
+        raise ValueError(
+            f"precision must be between 0 and {MAX_PRECISION} decimal digits."
+        )
+    if quantize is not None and quantize <= 0:
+        raise ValueError("quantize must be a positive grid size.")
+
+
+class GeometryBinaryLoader(Loader):
+    """Load binary geometry/geography values (EWKB) as GeoJSON dicts."""
+
+    format = Format.BINARY
+
+    def load(self, data: Buffer) -> object:
+        raw = bytes(data)
+        try:
+            return ewkb_to_geojson(raw)
+        except UnsupportedGeometryError:
+            return raw.hex().upper()
+
+
+class GeometryTextLoader(Loader):
+    """Load text geometry/geography values (hex EWKB) as GeoJSON dicts."""
+
+    format = Format.TEXT
+
+    def load(self, data: Buffer) -> object:
+        text = bytes(data).decode("ascii")
+        try:
+            return ewkb_to_geojson(bytes.fromhex(text))
+        except UnsupportedGeometryError:
+            return text
+
+
+def ewkb_to_geojson(data: bytes) -> dict[str, object]:
+    """Decode (E)WKB into a GeoJSON geometry dict.
+
+    Z is kept, M is dropped. A non-default SRID is reported as a short
+    ``crs`` member, as ST_AsGeoJSON does.
+
+    Raises:
+        UnsupportedGeometryError: For curve, surface and TIN types.
+    """
+    geometry, srid, _ = _read_geometry(data, 0)
+    if srid not in (0, 4326):
+        geometry["crs"] = {"type": "name", "properties": {"name": f"EPSG:{srid}"}}
+    return geometry
+
+
+def geojson_to_wkt(geometry: dict[str, object]) -> str:
+    """Write a GeoJSON geometry dict as WKT, e.g. "POINT Z (1 2 3)".
+
+    The SRID of a ``crs`` member is not carried over.
+    """
+    kind = str(geometry["type"])
+    if kind == "GeometryCollection":
+        members = geometry.get("geometries") or []
+        body = ", ".join(map(geojson_to_wkt, members))  # type: ignore[call-overload]
+        return f"GEOMETRYCOLLECTION ({body})" if body else "GEOMETRYCOLLECTION EMPTY"
+    coordinates = geometry.get("coordinates") or []
+    if not coordinates:
+        return f"{kind.upper()} EMPTY"
+    depth = {"Point": 0, "LineString": 1, "MultiPoint": 1, "Polygon": 2}
+    depth |= {"MultiLineString": 2, "MultiPolygon": 3}
+    point = coordinates
+    for _ in range(depth[kind]):
+        point = point[0]  # type: ignore[index]
+    tag = " Z" if len(point) > 2 else ""  # type: ignore[arg-type]
+    return f"{kind.upper()}{tag} {_wkt_text(coordinates, depth[kind])}"
+
+
+def _wkt_text(coordinates: Any, depth: int) -> str:
+    """Write coordinates nested depth lists deep as a parenthesized WKT list."""
+    if depth == 0:
+        return "(" + " ".join(map(repr, coordinates)) + ")"
+    if depth == 1:
+        points = (" ".join(map(repr, point)) for point in coordinates)
+        return "(" + ", ".join(points) + ")"
+    parts = (_wkt_text(part, depth - 1) for part in coordinates)
+    return "(" + ", ".join(parts) + ")"
+
+
+def _read_geometry(data: bytes, pos: int) -> tuple[dict[str, object], int, int]:
+    """Read one geometry at pos; return (geojson, srid, position after it)."""
+    endian = "<" if data[pos] == 1 else ">"
+    (type_word,) = struct.unpack_from(endian + "I", data, pos + 1)
+    pos += 5
+    srid = 0
+    if type_word & _WKB_SRID:
+        (srid,) = struct.unpack_from(endian + "I", data, pos)
+        pos += 4
+
+    base = type_word & _WKB_TYPE_MASK
+    has_z = bool(type_word & _WKB_Z)
+    has_m = bool(type_word & _WKB_M)
+    if base >= 1000:
+        # ISO WKB encodes dimensions as 1000 (Z), 2000 (M), 3000 (ZM)
+        has_z = base // 1000 in (1, 3)
+        has_m = base // 1000 in (2, 3)
+        base %= 1000
+
+    geojson_type = _GEOJSON_TYPES.get(base)
+    if geojson_type is None:
+        raise UnsupportedGeometryError(f"WKB geometry type {base} has no GeoJSON form.")
+    dims = 2 + has_z + has_m
+    keep = 3 if has_z else 2
+
+    if base == 7:
+        (count,) = struct.unpack_from(endian + "I", data, pos)
+        pos += 4
+        members = []
+        for _ in range(count):
+            member, _, pos = _read_geometry(data, pos)
+            members.append(member)
+        return {"type": geojson_type, "geometries": members}, srid, pos
+
+    if base in (4, 5, 6):
+        (count,) = struct.unpack_from(endian + "I", data, pos)
+        pos += 4
+        parts = []
+        for _ in range(count):
+            part, _, pos = _read_geometry(data, pos)
+            parts.append(part["coordinates"])
+        return {"type": geojson_type, "coordinates": parts}, srid, pos
+
+    coordinates: object
+    if base == 1:
+        values = struct.unpack_from(f"{endian}{dims}d", data, pos)
+        pos += 8 * dims
+        coordinates = [] if all(math.isnan(v) for v in values) else list(values[:keep])
+    elif base == 2:
+        coordinates, pos = _read_points(data, pos, endian, dims, keep)
+    else:
+        (ring_count,) = struct.unpack_from(endian + "I", data, pos)
+        pos += 4
+        rings = []
+        for _ in range(ring_count):
+            ring, pos = _read_points(data, pos, endian, dims, keep)
+            rings.append(ring)
+        coordinates = rings
+    return {"type": geojson_type, "coordinates": coordinates}, srid, pos
+
+
+def _read_points(
+    data: bytes, pos: int, endian: str, dims: int, keep: int
+) -> tuple[list[list[float]], int]:
+    """Read a point count followed by that many packed coordinates."""
+    (count,) = struct.unpack_from(endian + "I", data, pos)
+    pos += 4
+    values = struct.unpack_from(f"{endian}{count * dims}d", data, pos)
+    pos += 8 * count * dims
+    points = [list(values[i : i + keep]) for i in range(0, count * dims, dims)]
+    return points, pos
@@ -0,0 +1,378 @@
+"""Index advice from the catalogs and the cumulative statistics views."""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import psycopg
+from psycopg import sql as pgsql
+
+from src.models.indexes import (
+    Finding,
+    GeometryColumnIndex,
+    IndexReport,
+    IndexUsage,
+    TableIndexReport,
+)
+from src.services.geometry import register_geometry_types
+
+# Thresholds for findings. Sequential scans of small tables are cheaper
+# than any index, and a few MB of bloat or dead rows are not worth a
+# maintenance window.
+SEQ_SCAN_RATIO_THRESHOLD = 0.5
+SEQ_SCAN_MIN_ROWS = 10_000
+BLOAT_RATIO_THRESHOLD = 0.5
+BLOAT_MIN_BYTES = 1024 * 1024
+DEAD_TUPLE_RATIO_THRESHOLD = 0.2
+DEAD_TUPLE_MIN_ROWS = 1000
+
+# Access methods PostGIS provides geometry operator classes for.
+SPATIAL_METHODS = frozenset({"gist", "spgist", "brin"})
+
+# Key widths of index operator classes whose keys differ from the column
+# values: the 2D GiST class stores a float4 bounding box per geometry.
+OPCLASS_KEY_WIDTHS = {"gist_geometry_ops_2d": 16}
+
+# Page layout constants: page header, index tuple header, line pointer
+# and the special space B-tree and GiST keep at the end of each page.
+PAGE_HEADER = 24
+INDEX_TUPLE_HEADER = 8
+LINE_POINTER = 4
+SPECIAL_SPACE = 16
+DEFAULT_FILLFACTOR = 90
+
+# One round trip for every table: its scan counters from
+# pg_stat_user_tables, and per index the key columns, operator classes,
+# size and scan count from pg_stat_user_indexes, with the average width
+# of the key columns from pg_stats for the bloat estimate. key_width is
+# NULL when a key is an expression or a column has no statistics.
+# Identifiers come back quoted for the suggested statements.
+INDEX_REPORT_QUERY = """
+SELECT json_build_object(
+    'table', c.relname,
+    'quoted_name', format('%%I.%%I', n.nspname, c.relname),
+    'reltuples', c.reltuples,
+    'size_bytes', pg_catalog.pg_table_size(c.oid),
+    'seq_scans', s.seq_scan,
+    'index_scans', s.idx_scan,
+    'live_tuples', s.n_live_tup,
+    'dead_tuples', s.n_dead_tup,
+    'indexes', coalesce(ix.indexes, '[]'::json),
+    'geometry_columns', {geometry_columns}
+),
+    current_setting('block_size')::int,
+    (SELECT d.stats_reset FROM pg_catalog.pg_stat_database d
+     WHERE d.datname = current_database())
+FROM pg_catalog.pg_class c
+JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_catalog.pg_stat_user_tables s ON s.relid = c.oid
+LEFT JOIN LATERAL (
+    SELECT json_agg(json_build_object(
+        'index_name', i.relname,
+        'quoted_name', format('%%I.%%I', n.nspname, i.relname),
+        'method', am.amname,
+        'columns', k.columns,
+        'key_width', k.key_width,
+        'opclasses', (
+            SELECT json_agg(oc.opcname ORDER BY o.n)
+            FROM unnest(x.indclass) WITH ORDINALITY AS o(oid, n)
+            JOIN pg_catalog.pg_opclass oc ON oc.oid = o.oid
+        ),
+        'definition', pg_catalog.pg_get_indexdef(x.indexrelid),
+        'is_unique', x.indisunique,
+        'is_primary', x.indisprimary,
+        'is_valid', x.indisvalid,
+        'is_partial', x.indpred IS NOT NULL,
+        'enforces_constraint', EXISTS (
+            SELECT 1 FROM pg_catalog.pg_constraint co
+            WHERE co.conindid = x.indexrelid
+        ),
+        'size_bytes', pg_catalog.pg_relation_size(x.indexrelid),
+        'pages', i.relpages,
+        'fillfactor', (
+            SELECT split_part(opt, '=', 2)::int
+            FROM unnest(i.reloptions) AS opt
+            WHERE opt LIKE 'fillfactor=%%'
+        ),
+        'scans', si.idx_scan
+    ) ORDER BY i.relname) AS indexes
+    FROM pg_catalog.pg_index x
+    JOIN pg_catalog.pg_class i ON i.oid = x.indexrelid
+    JOIN pg_catalog.pg_am am ON am.oid = i.relam
+    LEFT JOIN pg_catalog.pg_stat_user_indexes si ON si.indexrelid = x.indexrelid
+    CROSS JOIN LATERAL (
+        SELECT json_agg(a.attname ORDER BY ik.n) AS columns,
+               CASE WHEN count(st.avg_width) = count(*)
+                   THEN sum(st.avg_width) END AS key_width
+        FROM unnest(x.indkey::int2[]) WITH ORDINALITY AS ik(attnum, n)
+        LEFT JOIN pg_catalog.pg_attribute a
+            ON a.attrelid = c.oid AND a.attnum = ik.attnum
+        LEFT JOIN pg_catalog.pg_stats st
+            ON st.schemaname = n.nspname
+            AND st.tablename = c.relname
+            AND st.attname = a.attname
+            AND st.inherited = (c.relkind = 'p')
+    ) AS k
+    WHERE x.indrelid = c.oid
+) AS ix ON true{geometry_join}
+WHERE n.nspname = %(schema)s
+    AND c.relkind IN ('r', 'p')
+    AND c.relname = ANY(%(tables)s::text[])
+ORDER BY c.relname
+"""
+
+# Geometry columns come from PostGIS's geometry_columns view; added only
+# when PostGIS is installed.
+GEOMETRY_COLUMNS = "coalesce(gc.columns, '[]'::json)"
+
+GEOMETRY_JOIN = """
+LEFT JOIN LATERAL (
+    SELECT json_agg(json_build_object(
+        'column_name', g.f_geometry_column,
+        'quoted_name', quote_ident(g.f_geometry_column),
+        'geometry_type', g.type,
+        'srid', g.srid
+    ) ORDER BY g.f_geometry_column) AS columns
+    FROM geometry_columns g
+    WHERE g.f_table_schema = n.nspname AND g.f_table_name = c.relname
+) AS gc ON true"""
+
+
+async def index_report(
+    conn: psycopg.AsyncConnection, schema: str, tables: list[str]
+) -> IndexReport:
+    """Report index coverage, usage and bloat of tables, reading no table data.
+
+    Scan counts accumulate from the last statistics reset (stats_since)
+    and bloat estimates from the last ANALYZE, so both describe the
+    workload and the data as of then.
+
+    Args:
+        conn: Database connection.
+        schema: Schema of the tables.
+        tables: Bare names of the tables to report on.
+
+    Returns:
+        One entry per existing table, with findings ordered as the
+        checks are run.
+    """
+    spatial = bool(await register_geometry_types(conn))
+    query = pgsql.SQL(INDEX_REPORT_QUERY).format(
+        geometry_columns=pgsql.SQL(GEOMETRY_COLUMNS if spatial else "'[]'::json"),
+        geometry_join=pgsql.SQL(GEOMETRY_JOIN if spatial else ""),
+    )
+    async with conn.cursor() as cur:
+        await cur.execute(query, {"schema": schema, "tables": tables})
+        rows = await cur.fetchall()
+
+    stats_since = rows[0][2] if rows else None
+    return IndexReport(
+        schema_=schema,
+        stats_since=stats_since,
+        tables=[table_report(row[0], row[1]) for row in rows],
+    )
+
+
+def table_report(table: dict[str, Any], block_size: int) -> TableIndexReport:
+    """Build a table's report and findings from its INDEX_REPORT_QUERY row."""
+    rows = round(table["reltuples"]) if table["reltuples"] >= 0 else None
+    indexes = [_index_usage(index, rows, block_size) for index in table["indexes"]]
+    spatial = {
+        index["columns"][0]: index["index_name"]
+        for index in table["indexes"]
+        if index["method"] in SPATIAL_METHODS
+        and index["is_valid"]
+        and not index["is_partial"]
+    }
+    geometry_columns = [
+        GeometryColumnIndex(
+            column_name=column["column_name"],
+            geometry_type=column["geometry_type"],
+            srid=column["srid"],
+            spatial_index=spatial.get(column["column_name"]),
+        )
+        for column in table["geometry_columns"]
+    ]
+
+    seq_scans, index_scans = table["seq_scans"], table["index_scans"]
+    scans = (seq_scans or 0) + (index_scans or 0)
+    seq_scan_ratio = seq_scans / scans if scans else None
+    live, dead = table["live_tuples"] or 0, table["dead_tuples"] or 0
+    dead_tuple_ratio = dead / (live + dead) if live + dead else None
+
+    findings: list[Finding] = []
+    name = table["quoted_name"]
+    for column, raw in zip(geometry_columns, table["geometry_columns"]):
+        if column.spatial_index is None:
+            findings.append(
+                Finding(
+                    kind="missing_spatial_index",
+                    message=(
+                        f"Geometry column '{column.column_name}' has no spatial "
+                        f"index; bounding-box filters on it read the whole table."
+                    ),
+                    suggestion=(
+                        f"CREATE INDEX CONCURRENTLY ON {name} "
+                        f"USING gist ({raw['quoted_name']})"
+                    ),
+                )
+            )
+    for index, raw in zip(indexes, table["indexes"]):
+        quoted = raw["quoted_name"]
+        if not index.is_valid:
+            findings.append(
+                Finding(
+                    kind="invalid_index",
+                    message=(
+                        f"Index '{index.index_name}' is invalid, left by a failed "
+                        f"concurrent build; writes maintain it but queries never "
+                        f"use it."
+                    ),
+                    suggestion=f"REINDEX INDEX CONCURRENTLY {quoted}",
+                )
+            )
+        elif (
+            index.scans == 0
+            and not index.is_unique
+            and not raw["enforces_constraint"]
+        ):
+            findings.append(
+                Finding(
+                    kind="unused_index",
+                    message=(
+                        f"Index '{index.index_name}' ({index.size_bytes} bytes) has "
+                        f"not been scanned since statistics were reset; it slows "
+                        f"every write."
+                    ),
+                    suggestion=f"DROP INDEX CONCURRENTLY {quoted}",
+                )
+            )
+        if (
+            index.estimated_bloat_ratio is not None
+            and index.estimated_bloat_bytes is not None
+            and index.estimated_bloat_ratio >= BLOAT_RATIO_THRESHOLD
+            and index.estimated_bloat_bytes >= BLOAT_MIN_BYTES
+        ):
+            findings.append(
+                Finding(
+                    kind="bloated_index",
+                    message=(
+                        f"Index '{index.index_name}' is about "
+                        f"{index.estimated_bloat_ratio:.0%} empty space "
+                        f"({index.estimated_bloat_bytes} bytes)."
+                    ),
+                    suggestion=f"REINDEX INDEX CONCURRENTLY {quoted}",
+                )
+            )
+    if (
+        seq_scan_ratio is not None
+        and seq_scan_ratio > SEQ_SCAN_RATIO_THRESHOLD
+        and (rows or 0) >= SEQ_SCAN_MIN_ROWS
+    ):
+        findings.append(
+            Finding(
+                kind="high_seq_scan_ratio",
+                message=(
+                    f"{seq_scans} of {scans} scans ({seq_scan_ratio:.0%}) read all "
+                    f"~{rows} rows; explain the frequent queries on this table to "
+                    f"find the filter an index is missing for."
+                ),
+            )
+        )
+    if (
+        dead_tuple_ratio is not None
+        and dead_tuple_ratio > DEAD_TUPLE_RATIO_THRESHOLD
+        and dead >= DEAD_TUPLE_MIN_ROWS
+    ):
+        findings.append(
+            Finding(
+                kind="dead_tuples",
+                message=(
+                    f"{dead} dead rows ({dead_tuple_ratio:.0%}) waiting for "
+                    f"vacuum; scans still read them."
+                ),
+                suggestion=f"VACUUM (ANALYZE) {name}",
+            )
+        )
+
+    return TableIndexReport(
+        table=table["table"],
+        estimated_rows=rows,
+        size_bytes=table["size_bytes"],
+        seq_scans=seq_scans,
+        index_scans=index_scans,
+        seq_scan_ratio=seq_scan_ratio,
+        dead_tuple_ratio=dead_tuple_ratio,
+        geometry_columns=geometry_columns,
+        indexes=indexes,
+        findings=findings,
+    )
+
+
+def estimate_index_pages(
+    rows: float,
+    key_width: int,
+    method: str,
+    block_size: int = 8192,
+    fillfactor: int = DEFAULT_FILLFACTOR,
+) -> int | None:
+    """Pages a freshly built index of rows keys of key_width bytes would take.
+
+    Leaf pages are filled to fillfactor, as CREATE INDEX and REINDEX
+    leave them; inner levels and the B-tree metapage are added on top.
+
+    Returns:
+        The page count, or None for access methods other than B-tree
+        and GiST.
+    """
+    if method not in ("btree", "gist"):
+        return None
+    item = _maxalign(INDEX_TUPLE_HEADER + key_width) + LINE_POINTER
+    usable = (block_size - PAGE_HEADER - SPECIAL_SPACE) * fillfactor / 100
+    per_page = max(2, int(usable // item))
+    pages = level = max(1, math.ceil(rows / per_page))
+    while level > 1:
+        level = math.ceil(level / per_page)
+        pages += level
+    return pages + (1 if method == "btree" else 0)
+
+
+def _index_usage(
+    index: dict[str, Any], rows: int | None, block_size: int
+) -> IndexUsage:
+    usage = IndexUsage(
+        index_name=index["index_name"],
+        method=index["method"],
+        columns=index["columns"],
+        definition=index["definition"],
+        is_unique=index["is_unique"],
+        is_primary=index["is_primary"],
+        is_valid=index["is_valid"],
+        size_bytes=index["size_bytes"],
+        scans=index["scans"],
+    )
+    key_width = index["key_width"]
+    opclasses = index["opclasses"] or []
+    if index["method"] == "gist":
+        # GiST keys are the opclass's, not the column values.
+        key_width = OPCLASS_KEY_WIDTHS.get(opclasses[0]) if opclasses else None
+    if rows is None or key_width is None or index["is_partial"] or not index["pages"]:
+        return usage
+    expected = estimate_index_pages(
+        rows,
+        key_width,
+        index["method"],
+        block_size,
+        index["fillfactor"] or DEFAULT_FILLFACTOR,
+    )
+    if expected is None:
+        return usage
+    actual = index["pages"]
+    usage.estimated_bloat_bytes = max(0, actual - expected) * block_size
+    usage.estimated_bloat_ratio = max(0.0, 1 - expected / actual)
+    return usage
+
+
+def _maxalign(size: int) -> int:
+    return (size + 7) & ~7
@@ -0,0 +1,275 @@
+"""Per-tool latency histograms and counters in the Prometheus text format.
+
+A MetricsMiddleware opens a ToolCall for every MCP tool call and keeps it
+in a context variable, so code anywhere below the tool can attribute its
+time to a phase with ``with phase("execution"):`` without the call being
+threaded through. Outside a tool call phase() records nothing.
+
+Phases:
+    acquire: waiting for a pooled connection.
+    validation: SQL parsing, SELECT-only and access checks.
+    execution: waiting for the database to run a statement and send rows.
+    conversion: turning received rows into JSON-ready values.
+    serialization: encoding the tool's return value into the MCP response,
+        measured from the end of the tool body (see handler_done).
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools import ToolResult
+from mcp.types import CallToolRequestParams, TextContent
+
+PREFIX = "geo_post_mcp"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0,
+)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10_000, 100_000, 1_000_000)
+BYTE_BUCKETS = tuple(float(1024 * 4**i) for i in range(9))  # 1 KiB .. 64 MiB
+
+Labels = tuple[str, ...]
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}_total", self.labelnames, labels, value
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: a count per bucket (non-cumulative, the
+        # last one for +Inf), then the sum of observations.
+        self.values: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts, total = self.values.setdefault(
+            labels, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if value <= bound),
+            len(self.buckets),
+        )
+        counts[index] += 1
+        total[0] += value
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                bucket = (*labels, _number(bound))
+                yield f"{self.name}_bucket", names, bucket, cumulative
+            yield f"{self.name}_sum", self.labelnames, labels, total[0]
+            yield f"{self.name}_count", self.labelnames, labels, cumulative
+
+
+@dataclass
+class ToolCall:
+    """What one tool call has measured so far."""
+
+    tool: str
+    phases: dict[str, float] = field(default_factory=dict)
+    rows: int | None = None
+    truncated: bool = False
+    handler_end: float | None = None
+
+
+_current: ContextVar[ToolCall | None] = ContextVar("tool_call", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to the current tool call's phase."""
+    call = _current.get()
+    if call is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        call.phases[name] = call.phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def record_rows(rows: int, truncated: bool) -> None:
+    """Note the rows the current tool call returns and whether it was cut short."""
+    call = _current.get()
+    if call is not None:
+        call.rows = rows
+        call.truncated = truncated
+
+
+def handler_done() -> None:
+    """Mark the end of the tool body; what follows is serialization."""
+    call = _current.get()
+    if call is not None:
+        call.handler_end = time.perf_counter()
+
+
+class ToolMetrics:
+    """The metrics kept for MCP tool calls."""
+
+    def __init__(self) -> None:
+        self.calls = Counter(
+            f"{PREFIX}_tool_calls", "Tool calls by outcome.", ("tool", "outcome")
+        )
+        self.duration = Histogram(
+            f"{PREFIX}_tool_duration_seconds",
+            "Wall time of a tool call, including serialization.",
+            LATENCY_BUCKETS,
+            ("tool",),
+        )
+        self.phases = Histogram(
+            f"{PREFIX}_tool_phase_seconds",
+            "Time a tool call spent in each phase.",
+            LATENCY_BUCKETS,
+            ("tool", "phase"),
+        )
+        self.rows = Histogram(
+            f"{PREFIX}_tool_rows_returned",
+            "Rows returned per query call.",
+            ROW_BUCKETS,
+            ("tool",),
+        )
+        self.truncated = Counter(
+            f"{PREFIX}_tool_truncated",
+            "Query calls whose result was cut at row_limit.",
+            ("tool",),
+        )
+        self.response_bytes = Histogram(
+            f"{PREFIX}_tool_response_bytes",
+            "Size of the text content of a tool response.",
+            BYTE_BUCKETS,
+            ("tool",),
+        )
+        self.metrics: list[Counter | Histogram] = [
+            self.calls,
+            self.duration,
+            self.phases,
+            self.rows,
+            self.truncated,
+            self.response_bytes,
+        ]
+
+    def observe(
+        self, call: ToolCall, seconds: float, error: bool, response_bytes: int | None
+    ) -> None:
+        """Record a finished tool call."""
+        self.calls.inc(call.tool, "error" if error else "ok")
+        self.duration.observe(seconds, call.tool)
+        for name, spent in call.phases.items():
+            self.phases.observe(spent, call.tool, name)
+        if call.rows is not None:
+            self.rows.observe(call.rows, call.tool)
+            if call.truncated:
+                self.truncated.inc(call.tool)
+        if response_bytes is not None:
+            self.response_bytes.observe(response_bytes, call.tool)
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labelnames, labels, value in metric.samples():
+                lines.append(f"{name}{_labels(labelnames, labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware(Middleware):
+    """Times every tool call and records it in a ToolMetrics."""
+
+    def __init__(self, metrics: ToolMetrics) -> None:
+        self.metrics = metrics
+
+    async def on_call_tool(
+        self,
+        context: MiddlewareContext[CallToolRequestParams],
+        call_next: CallNext[CallToolRequestParams, ToolResult],
+    ) -> ToolResult:
+        call = ToolCall(context.message.name)
+        token = _current.set(call)
+        start = time.perf_counter()
+        result = None
+        try:
+            result = await call_next(context)
+            return result
+        finally:
+            end = time.perf_counter()
+            _current.reset(token)
+            if call.handler_end is not None and result is not None:
+                call.phases["serialization"] = end - call.handler_end
+            self.metrics.observe(
+                call,
+                end - start,
+                error=result is None,
+                response_bytes=None if result is None else _content_bytes(result),
+            )
+
+
+def _content_bytes(result: ToolResult) -> int:
+    size = 0
+    for block in result.content:
+        if isinstance(block, TextContent):
+            text = block.text
+            size += len(text) if text.isascii() else len(text.encode())
+    return size
+
+
+def _labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
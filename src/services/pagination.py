@@ -0,0 +1,143 @@
+"""Registry of open server-side cursors behind query continuation tokens."""
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import psycopg
+import structlog
+
+from src.services.portal import Portal
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class OpenCursor:
+    """A server-side portal kept open between pages of one query."""
+
+    portal: Portal
+    row_limit: int
+    owns_transaction: bool
+    timeout: float | None = None
+    pending: list[list[object]] = field(default_factory=list)
+    rows_served: int = 0
+    expires_at: float = 0.0
+
+
+class CursorStore:
+    """Hands out tokens for open cursors and closes them after a TTL.
+
+    Each open cursor pins one connection (and its transaction), so the
+    number of open cursors is capped; registering beyond the cap closes
+    the entry closest to expiry. Expired entries are swept whenever the
+    store is used, and by sweep_forever while the server runs, so an
+    abandoned cursor is closed even when no further query arrives.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_open: int,
+        release: Callable[[psycopg.AsyncConnection], Awaitable[None]],
+    ) -> None:
+        self._ttl = ttl
+        self._max_open = max_open
+        self._release = release
+        self._entries: dict[str, OpenCursor] = {}
+
+    def holds(self, conn: psycopg.AsyncConnection) -> bool:
+        """Whether an open cursor currently pins this connection."""
+        return any(entry.portal.conn is conn for entry in self._entries.values())
+
+    async def register(self, entry: OpenCursor) -> str:
+        """Store an open cursor and return its continuation token."""
+        await self.sweep()
+        while self._entries and len(self._entries) >= self._max_open:
+            oldest = min(self._entries, key=lambda t: self._entries[t].expires_at)
+            logger.info("cursor_evicted", rows_served=self._entries[oldest].rows_served)
+            await self.close(self._entries.pop(oldest))
+        token = secrets.token_urlsafe(16)
+        entry.expires_at = time.monotonic() + self._ttl
+        self._entries[token] = entry
+        return token
+
+    async def take(self, token: str) -> OpenCursor:
+        """Remove and return the cursor for a token.
+
+        Raises:
+            ValueError: If the token is unknown, exhausted, or expired.
+        """
+        await self.sweep()
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            raise ValueError(
+                "Unknown or expired continuation token. Re-run the query."
+            )
+        return entry
+
+    async def discard(self, token: str, release: bool = True) -> None:
+        """Close the cursor for a token whose page could not be served.
+
+        Args:
+            token: Continuation token; unknown tokens are ignored.
+            release: As for close.
+        """
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            await self.close(entry, release)
+
+    async def sweep(self) -> None:
+        """Close every cursor whose TTL has passed."""
+        now = time.monotonic()
+        expired = [t for t, e in self._entries.items() if e.expires_at <= now]
+        for token in expired:
+            entry = self._entries.pop(token, None)
+            if entry is not None:
+                await self.close(entry)
+
+    async def sweep_forever(self) -> None:
+        """Sweep every half TTL until cancelled; a cursor lives 1.5 TTL at most."""
+        while True:
+            await asyncio.sleep(self._ttl / 2)
+            try:
+                await self.sweep()
+            except Exception as exc:
+                logger.warning("cursor_sweep_failed", error=str(exc))
+
+    async def close(self, entry: OpenCursor, release: bool = True) -> None:
+        """Close the portal and end its transaction.
+
+        Args:
+            entry: Cursor to close; must already be removed from the store.
+            release: Also hand the connection back via the release callback.
+                False when the caller's own checkout still covers it.
+        """
+        conn = entry.portal.conn
+        try:
+            await entry.portal.close()
+            if entry.owns_transaction and not conn.closed:
+                await conn.execute("COMMIT")
+        except psycopg.Error as exc:
+            logger.warning("cursor_close_failed", error=str(exc))
+        finally:
+            if release and not self.holds(conn):
+                await self._release(conn)
+
+    async def close_all(self) -> None:
+        """Close every open cursor."""
+        while self._entries:
+            _, entry = self._entries.popitem()
+            await self.close(entry)
+
+    def stats(self) -> dict[str, object]:
+        """Return the number of open cursors and the configured limits."""
+        return {
+            "open_cursors": len(self._entries),
+            "max_open_cursors": self._max_open,
+            "ttl_seconds": self._ttl,
+        }
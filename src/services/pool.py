@@ -0,0 +1,295 @@
+"""Async connection pool built on create_connection."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+import psycopg
+import structlog
+from psycopg.pq import TransactionStatus
+
+from src.config.settings import Settings
+from src.services.database import create_connection
+
+logger = structlog.get_logger(__name__)
+
+
+class PoolTimeout(psycopg.OperationalError):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+@dataclass
+class _PooledConnection:
+    """A pooled connection with its lifecycle timestamps."""
+
+    conn: psycopg.AsyncConnection
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    """Bounded pool of async connections.
+
+    Connections are opened lazily up to ``pool_max_size``, returned
+    connections are reused LIFO, and idle or aged connections are
+    closed on the next acquire/release rather than by a background task.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+        self._idle: deque[_PooledConnection] = deque()
+        self._in_use: dict[int, _PooledConnection] = {}
+        self._size = 0
+        self._cond = asyncio.Condition()
+        self._closed = False
+        self._counters: dict[str, float] = {
+            "requests": 0,
+            "requests_waiting": 0,
+            "wait_seconds_total": 0.0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "health_check_failures": 0,
+        }
+
+    async def open(self) -> None:
+        """Open connections until ``pool_min_size`` are idle."""
+        while self._size < self._settings.pool_min_size:
+            self._size += 1
+            try:
+                entry = await self._connect()
+            except BaseException:
+                self._size -= 1
+                raise
+            self._idle.append(entry)
+
+    async def close(self) -> None:
+        """Close all idle connections and refuse further acquires.
+
+        Connections still checked out are closed when they are released.
+        """
+        self._closed = True
+        idle = list(self._idle)
+        self._idle.clear()
+        for entry in idle:
+            self._forget(entry)
+        async with self._cond:
+            self._cond.notify_all()
+        for entry in idle:
+            await self._close(entry)
+
+    async def acquire(self) -> psycopg.AsyncConnection:
+        """Check out a connection, waiting up to ``pool_timeout`` seconds.
+
+        Raises:
+            PoolTimeout: If the pool stays exhausted for the whole timeout.
+        """
+        if self._closed:
+            raise psycopg.OperationalError("Connection pool is closed.")
+        start = time.monotonic()
+        self._counters["requests"] += 1
+        while True:
+            entry = await self._checkout(start)
+            if entry is None:
+                entry = await self._connect_reserved()
+            else:
+                healthy = False
+                try:
+                    healthy = await self._healthy(entry)
+                finally:
+                    if not healthy:
+                        # Failed or cancelled mid-check: the entry is neither
+                        # idle nor in use, so give its slot back exactly once.
+                        self._forget(entry)
+                        await asyncio.shield(self._close(entry))
+                if not healthy:
+                    continue
+            waited = time.monotonic() - start
+            self._counters["wait_seconds_total"] += waited
+            self._in_use[id(entry.conn)] = entry
+            return entry.conn
+
+    async def release(self, conn: psycopg.AsyncConnection) -> None:
+        """Return a connection to the pool, discarding it if unusable."""
+        entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            return
+        try:
+            reusable = not self._closed and await self._reset(entry)
+        except BaseException:
+            await self._discard(entry)
+            raise
+        if reusable:
+            entry.last_used = time.monotonic()
+            self._idle.append(entry)
+        else:
+            await self._discard(entry)
+        await self._prune_idle()
+        async with self._cond:
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        """Check out a connection for the duration of the ``async with`` block."""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    def stats(self) -> dict[str, object]:
+        """Return current pool size and cumulative usage counters."""
+        return {
+            "pool_min": self._settings.pool_min_size,
+            "pool_max": self._settings.pool_max_size,
+            "pool_size": self._size,
+            "pool_available": len(self._idle),
+            "pool_in_use": len(self._in_use),
+            "requests": int(self._counters["requests"]),
+            "requests_waiting": int(self._counters["requests_waiting"]),
+            "wait_seconds_total": round(self._counters["wait_seconds_total"], 3),
+            "timeouts": int(self._counters["timeouts"]),
+            "connections_created": int(self._counters["connections_created"]),
+            "connections_closed": int(self._counters["connections_closed"]),
+            "health_check_failures": int(self._counters["health_check_failures"]),
+        }
+
+    async def _checkout(self, start: float) -> _PooledConnection | None:
+        """Pop a reusable idle entry, or reserve a slot and return None.
+
+        Stale idle entries met on the way are closed once the condition's
+        lock is released, so waiters are not held up by the network.
+        """
+        stale: list[_PooledConnection] = []
+        try:
+            return await self._checkout_locked(start, stale)
+        finally:
+            for entry in stale:
+                await self._close(entry)
+
+    async def _checkout_locked(
+        self, start: float, stale: list[_PooledConnection]
+    ) -> _PooledConnection | None:
+        waited = False
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg.OperationalError("Connection pool is closed.")
+                entry = self._pop_idle(stale)
+                if entry is not None:
+                    return entry
+                if self._size < self._settings.pool_max_size:
+                    self._size += 1
+                    return None
+                if not waited:
+                    waited = True
+                    self._counters["requests_waiting"] += 1
+                remaining = self._settings.pool_timeout - (time.monotonic() - start)
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout=max(remaining, 0))
+                except TimeoutError:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available after "
+                        f"{self._settings.pool_timeout}s "
+                        f"(pool_max_size={self._settings.pool_max_size})."
+                    ) from None
+
+    def _pop_idle(self, stale: list[_PooledConnection]) -> _PooledConnection | None:
+        """Pop the most recently used idle entry that is still within its limits.
+
+        Entries past their limits are given up and added to stale for the
+        caller to close.
+        """
+        while self._idle:
+            entry = self._idle.pop()
+            if entry.conn.closed or self._expired(entry):
+                self._forget(entry)
+                stale.append(entry)
+                continue
+            return entry
+        return None
+
+    async def _connect_reserved(self) -> _PooledConnection:
+        """Open a connection for a slot already reserved in ``_size``."""
+        try:
+            return await self._connect()
+        except BaseException:
+            self._size -= 1
+            async with self._cond:
+                self._cond.notify()
+            raise
+
+    async def _connect(self) -> _PooledConnection:
+        conn = await create_connection(self._settings)
+        self._counters["connections_created"] += 1
+        return _PooledConnection(conn=conn)
+
+    async def _healthy(self, entry: _PooledConnection) -> bool:
+        """Run a trivial query on checkout when ``pool_check`` is enabled.
+
+        Only reports health; the caller gives up an unhealthy entry.
+        """
+        if not self._settings.pool_check:
+            return True
+        try:
+            await entry.conn.execute("SELECT 1")
+        except psycopg.Error:
+            self._counters["health_check_failures"] += 1
+            logger.warning("pool_health_check_failed")
+            return False
+        return True
+
+    async def _reset(self, entry: _PooledConnection) -> bool:
+        """Bring a returned connection back to idle state; False if unusable."""
+        conn = entry.conn
+        if conn.closed or self._expired(entry):
+            return False
+        status = conn.info.transaction_status
+        if status == TransactionStatus.IDLE:
+            return True
+        if status in (TransactionStatus.INTRANS, TransactionStatus.INERROR):
+            try:
+                await conn.rollback()
+            except psycopg.Error:
+                return False
+            return True
+        return False
+
+    def _expired(self, entry: _PooledConnection) -> bool:
+        max_lifetime = self._settings.pool_max_lifetime
+        return max_lifetime > 0 and time.monotonic() - entry.created_at > max_lifetime
+
+    async def _prune_idle(self) -> None:
+        """Close connections idle longer than ``pool_max_idle`` above the minimum."""
+        max_idle = self._settings.pool_max_idle
+        if max_idle <= 0:
+            return
+        now = time.monotonic()
+        # Oldest idle entries sit at the left end of the deque.
+        while (
+            self._idle
+            and self._size > self._settings.pool_min_size
+            and now - self._idle[0].last_used > max_idle
+        ):
+            await self._discard(self._idle.popleft())
+
+    async def _discard(self, entry: _PooledConnection) -> None:
+        self._forget(entry)
+        await self._close(entry)
+
+    def _forget(self, entry: _PooledConnection) -> None:
+        """Give up an entry's slot; synchronous, so a cancellation cannot skip it."""
+        self._size -= 1
+        self._counters["connections_closed"] += 1
+
+    async def _close(self, entry: _PooledConnection) -> None:
+        try:
+            await entry.conn.close()
+        except psycopg.Error:
+            pass
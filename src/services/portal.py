@@ -0,0 +1,131 @@
+"""Named server-side cursor with a per-FETCH choice of text or binary transfer."""
+
+from __future__ import annotations
+
+import itertools
+from collections.abc import Callable, Mapping, Sequence
+
+import psycopg
+from psycopg import sql as pgsql
+from psycopg.pq import Format, TransactionStatus
+from psycopg.pq.abc import PGresult
+from psycopg.rows import RowMaker
+
+from src.services.metrics import phase
+
+_portal_ids = itertools.count(1)
+
+# bytea values are rendered as hex text, since JSON has no binary type.
+_BYTEA_OID = 17
+
+# Types whose binary loader is slower than parsing text: binary numeric
+# arrives as base-10000 digit groups that Decimal must reassemble.
+TEXT_PREFERRED_OIDS = frozenset({1700})
+
+ValueConverter = Callable[[object], object]
+
+# Bind parameters for %s or %(name)s placeholders, as psycopg takes them.
+Params = Sequence[object] | Mapping[str, object]
+
+
+class Portal:
+    """A cursor driven with explicit DECLARE and FETCH statements.
+
+    psycopg's server-side cursor fixes the result format at DECLARE time,
+    before the column types are known. Here the first FETCH arrives as
+    text and carries the column description; later FETCHes switch to
+    binary when every column has a binary loader on the connection and
+    none is of a type that decodes faster from text.
+    Rows come out as lists already converted for JSON.
+    """
+
+    def __init__(self, conn: psycopg.AsyncConnection) -> None:
+        self.conn = conn
+        self.name = f"geo_post_mcp_{next(_portal_ids)}"
+        self.columns: list[str] = []
+        self.type_codes: list[int] = []
+        self.binary = False
+        self.pgresult: PGresult | None = None
+        self._described = False
+        self._cursor = conn.cursor(row_factory=json_row)
+
+    async def declare(self, sql: str, params: Params | None = None) -> None:
+        """Open the portal for a validated SELECT inside the current transaction."""
+        declare = pgsql.SQL("DECLARE {} NO SCROLL CURSOR FOR ").format(
+            pgsql.Identifier(self.name)
+        )
+        # binary=True forces the extended query protocol, which rejects a
+        # second statement smuggled in after a semicolon; DECLARE returns no rows.
+        with phase("execution"):
+            await self._cursor.execute(declare + pgsql.SQL(sql), params, binary=True)
+
+    async def fetch(self, size: int) -> list[list[object]]:
+        """FETCH up to size rows."""
+        fetch = pgsql.SQL("FETCH FORWARD {} FROM {}").format(
+            pgsql.Literal(size), pgsql.Identifier(self.name)
+        )
+        with phase("execution"):
+            await self._cursor.execute(fetch, binary=self.binary)
+        with phase("conversion"):
+            rows = await self._cursor.fetchall()
+        self.pgresult = self._cursor.pgresult
+        if not self._described:
+            self._describe()
+        return rows
+
+    async def close(self) -> None:
+        """CLOSE the portal if its transaction is still usable."""
+        if self.conn.closed:
+            return
+        if self.conn.info.transaction_status != TransactionStatus.INTRANS:
+            return
+        await self.conn.execute(
+            pgsql.SQL("CLOSE {}").format(pgsql.Identifier(self.name))
+        )
+
+    def _describe(self) -> None:
+        description = self._cursor.description or []
+        self.columns = [col.name for col in description]
+        self.type_codes = [col.type_code for col in description]
+        adapters = self.conn.adapters
+        self.binary = all(
+            col.type_code not in TEXT_PREFERRED_OIDS
+            and adapters.get_loader(col.type_code, Format.BINARY) is not None
+            for col in description
+        )
+        self._described = True
+
+
+def json_row(cursor: psycopg.AsyncCursor[object]) -> RowMaker[list[object]]:
+    """Row factory returning lists, with converters compiled from the description.
+
+    psycopg calls this once per result set, so the per-column converter
+    list is built once and the per-row work is a single list construction.
+    """
+    converters = [
+        _converter_for(col.type_code) for col in cursor.description or []
+    ]
+    if not any(converters):
+        return list
+    plan = [(i, conv) for i, conv in enumerate(converters) if conv is not None]
+
+    def make_row(values: Sequence[object]) -> list[object]:
+        row = list(values)
+        for i, conv in plan:
+            if row[i] is not None:
+                row[i] = conv(row[i])
+        return row
+
+    return make_row
+
+
+def _converter_for(type_code: int) -> ValueConverter | None:
+    if type_code == _BYTEA_OID:
+        return _bytea_to_text
+    return None
+
+
+def _bytea_to_text(value: object) -> object:
+    """Render bytea the way Postgres does in text format (hex escape)."""
+    assert isinstance(value, bytes)
+    return "\\x" + value.hex()
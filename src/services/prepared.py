@@ -0,0 +1,71 @@
+"""Per-connection usage counts that decide which statements to prepare."""
+
+from __future__ import annotations
+
+import weakref
+from collections import OrderedDict
+from collections.abc import Hashable
+
+import psycopg
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Statement shapes tracked per connection, matching psycopg's default
+# prepared_max: a shape evicted here is also the one psycopg deallocates.
+MAX_SHAPES_PER_CONNECTION = 100
+
+
+class PreparedStatements:
+    """Counts statement shapes per connection and prepares the hot ones.
+
+    A shape identifies the statement text as sent, placeholders included,
+    so lookups that only differ in bound ids or bounding boxes share one.
+    Once a shape has run ``threshold`` times on a connection, later runs
+    there use a prepared statement and skip parsing and planning. Prepared
+    statements belong to one server session, hence the per-connection
+    counts.
+    """
+
+    def __init__(self, threshold: int) -> None:
+        self._threshold = threshold
+        self._counts: weakref.WeakKeyDictionary[
+            psycopg.AsyncConnection, OrderedDict[Hashable, int]
+        ] = weakref.WeakKeyDictionary()
+        self.executions = 0
+        self.prepares = 0
+        self.hits = 0
+
+    def should_prepare(self, conn: psycopg.AsyncConnection, shape: Hashable) -> bool:
+        """Record one execution of a shape on conn; True if it should run prepared."""
+        counts = self._counts.get(conn)
+        if counts is None:
+            counts = self._counts[conn] = OrderedDict()
+        seen = counts.pop(shape, 0) + 1
+        counts[shape] = seen
+        if len(counts) > MAX_SHAPES_PER_CONNECTION:
+            counts.popitem(last=False)
+
+        self.executions += 1
+        if seen < self._threshold:
+            return False
+        if seen == self._threshold:
+            self.prepares += 1
+            logger.debug("statement_prepared", shape=str(shape)[:200])
+        else:
+            self.hits += 1
+        return True
+
+    def stats(self) -> dict[str, object]:
+        """Return prepare counts and the share of executions that reused a plan."""
+        return {
+            "threshold": self._threshold,
+            "connections": len(self._counts),
+            "tracked_shapes": sum(len(c) for c in self._counts.values()),
+            "executions": self.executions,
+            "statements_prepared": self.prepares,
+            "prepared_hits": self.hits,
+            "hit_rate": (
+                round(self.hits / self.executions, 3) if self.executions else 0.0
+            ),
+        }
@@ -0,0 +1,116 @@
+"""Column profiles read from the planner statistics in pg_stats."""
+
+from __future__ import annotations
+
+import psycopg
+
+from src.models.catalog import TableMetadata
+from src.models.profile import ColumnProfile, CommonValue, TableProfile
+
+# Caps on what is sent per column. ANALYZE keeps up to
+# default_statistics_target (100) common values and histogram bounds;
+# a handful of each describes the distribution as well.
+MAX_COMMON_VALUES = 10
+HISTOGRAM_BOUNDS = 11
+MAX_VALUE_LENGTH = 80
+
+# Sample values are anyarray columns; going through text gives them one
+# type whatever the column's. n_distinct can be relative to reltuples,
+# the row count ANALYZE saw, so that is read too. A partitioned table's
+# own statistics are the inherited ones, covering all partitions.
+COLUMN_STATS_QUERY = """
+SELECT s.attname, c.reltuples::bigint, s.null_frac, s.n_distinct, s.avg_width,
+       s.most_common_vals::text::text[], s.most_common_freqs,
+       s.histogram_bounds::text::text[]
+FROM pg_catalog.pg_stats s
+JOIN pg_catalog.pg_namespace n ON n.nspname = s.schemaname
+JOIN pg_catalog.pg_class c ON c.relnamespace = n.oid AND c.relname = s.tablename
+WHERE s.schemaname = %(schema)s
+    AND s.tablename = %(table)s
+    AND s.inherited = (c.relkind = 'p')
+"""
+
+
+async def profile_table(
+    conn: psycopg.AsyncConnection, table: TableMetadata
+) -> TableProfile:
+    """Summarize every column of a table from its statistics, without scanning it.
+
+    Statistics date from the table's last ANALYZE, which samples rather
+    than reads every row, so all figures are estimates. The histogram
+    describes the values outside the most common ones.
+
+    Args:
+        conn: Database connection.
+        table: Metadata of an allowed table, supplying column types and
+            descriptions.
+
+    Returns:
+        The profile; analyzed is False, and statistics are None, if the
+        table has never been analyzed.
+    """
+    params = {"schema": table.schema_, "table": table.table_name}
+    async with conn.cursor() as cur:
+        await cur.execute(COLUMN_STATS_QUERY, params)
+        stats = {row[0]: row[1:] for row in await cur.fetchall()}
+    rows = next(iter(stats.values()))[0] if stats else table.estimated_rows
+
+    columns = []
+    for column in table.columns:
+        profile = ColumnProfile(
+            column_name=column.column_name,
+            data_type=column.data_type,
+            description=column.description,
+        )
+        row = stats.get(column.column_name)
+        if row is not None:
+            _, null_frac, n_distinct, avg_width, values, freqs, bounds = row
+            profile.null_fraction = null_frac
+            profile.n_distinct = _distinct_count(n_distinct, rows)
+            profile.avg_width = avg_width
+            if values is not None:
+                profile.most_common_values = [
+                    CommonValue(value=_shorten(value), frequency=freq)
+                    for value, freq in zip(
+                        values[:MAX_COMMON_VALUES], freqs[:MAX_COMMON_VALUES]
+                    )
+                ]
+            if bounds is not None:
+                profile.histogram_bounds = [
+                    _shorten(b) or "" for b in _spread(bounds, HISTOGRAM_BOUNDS)
+                ]
+        columns.append(profile)
+
+    return TableProfile(
+        table=table.table_name,
+        schema_=table.schema_,
+        estimated_rows=rows,
+        analyzed=bool(stats),
+        columns=columns,
+    )
+
+
+def _distinct_count(n_distinct: float, rows: int) -> int:
+    """Turn pg_stats.n_distinct into a count of distinct values.
+
+    A negative n_distinct is minus a fraction of the row count, used
+    when the number of distinct values grows with the table; -1 means
+    every value is distinct.
+    """
+    if n_distinct >= 0:
+        return round(n_distinct)
+    return round(-n_distinct * rows)
+
+
+def _spread(bounds: list[str], count: int) -> list[str]:
+    """Pick count evenly spaced bounds, keeping the first and the last."""
+    if len(bounds) <= count:
+        return bounds
+    step = (len(bounds) - 1) / (count - 1)
+    return [bounds[round(i * step)] for i in range(count)]
+
+
+def _shorten(value: str | None) -> str | None:
+    if value is None or len(value) <= MAX_VALUE_LENGTH:
+        return value
+    return value[: MAX_VALUE_LENGTH - 1] + "…"
@@ -2,60 +2,132 @@
 
 from __future__ import annotations
 
-import json
 import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable, Sequence
+from contextlib import aclosing, asynccontextmanager
 
 import psycopg
 import structlog
+from psycopg import sql as pgsql
+from psycopg.pq import TransactionStatus
+from psycopg.pq.abc import PGresult
 
 from src.models.query import QueryResult
+from src.services.geometry import register_geometry_types
+from src.services.metrics import phase
+from src.services.pagination import CursorStore, OpenCursor
+from src.services.portal import Params, Portal, json_row
 
 logger = structlog.get_logger(__name__)
 
 DEFAULT_ROW_LIMIT = 1000
 
+# Called with the number of rows fetched so far, after each FETCH.
+Progress = Callable[[int], Awaitable[None]]
+
+# Server-side cursor fetch sizing: the first FETCH is small, later ones are
+# sized so that one batch carries roughly FETCH_BATCH_BYTES of row data.
+INITIAL_FETCH_SIZE = 100
+MIN_FETCH_SIZE = 10
+MAX_FETCH_SIZE = 10_000
+FETCH_BATCH_BYTES = 1 << 20
+
+# Wraps a validated SELECT so PostGIS builds the whole FeatureCollection.
+# The CTE keeps one look-ahead row to detect truncation without a second scan.
+FEATURE_COLLECTION_QUERY = """
+WITH q AS (
+    SELECT * FROM ({query}
+    ) AS src LIMIT {probe_limit}
+)
+SELECT json_build_object(
+    'type', 'FeatureCollection',
+    'features', coalesce(
+        json_agg(ST_AsGeoJSON(t.*, '', {max_digits})::json), '[]'::json
+    ),
+    'numberReturned', count(*),
+    'truncated', (SELECT count(*) FROM q) > {row_limit}
+)::text
+FROM (SELECT * FROM q LIMIT {row_limit}) AS t
+"""
+
+# ST_AsGeoJSON's default number of decimal digits per coordinate.
+DEFAULT_GEOJSON_DIGITS = 9
+
+# Bounds a prepared query's result on the server, as the cursor does for
+# streamed ones; a prepared statement cannot be DECLAREd.
+LIMITED_QUERY = "SELECT * FROM ({query}\n) AS q LIMIT {limit}"
+
+
+class QueryTimeoutError(ValueError):
+    """Raised when Postgres cancels a statement for exceeding its timeout."""
+
+    def __init__(self, elapsed: float, timeout: float | None) -> None:
+        self.elapsed = elapsed
+        self.timeout = timeout
+        limit = f" of {timeout:g} s" if timeout is not None else ""
+        super().__init__(
+            f"Query cancelled after {elapsed:.2f} s: statement timeout{limit} "
+            f"exceeded. Add filters or a LIMIT, or pass a larger timeout."
+        )
+
 
 async def execute_query(
     conn: psycopg.AsyncConnection,
     sql: str,
     row_limit: int = DEFAULT_ROW_LIMIT,
+    stream: bool = True,
+    timeout: float | None = None,
+    params: Params | None = None,
+    prepare: bool = False,
+    progress: Progress | None = None,
 ) -> QueryResult:
     """Execute a SELECT query and return structured results.
 
-    Geometry columns are automatically converted to GeoJSON.
+    Geometry columns are automatically converted to GeoJSON by the
+    loaders registered for the connection's PostGIS type OIDs.
 
     Args:
         conn: Database connection.
         sql: Validated SELECT SQL statement.
         row_limit: Maximum rows to return.
+        stream: Fetch through a named server-side cursor so that at most
+            row_limit + 1 rows leave the server, switching to binary
+            transfer after the first batch where every column allows it.
+            If False, a client-side cursor receives the full result set first.
+        timeout: Statement timeout in seconds for this query; None keeps
+            the session's statement_timeout.
+        params: Values for %s or %(name)s placeholders in sql.
+        prepare: Run the query as a prepared statement on the connection
+            instead of through a cursor, wrapped in a LIMIT so that at
+            most row_limit + 1 rows are sent. Reusing the plan saves
+            parse and planning time for statements run repeatedly.
+        progress: Awaited with the rows fetched so far after each batch
+            of a streamed fetch.
 
     Returns:
         QueryResult with columns, rows, count, and truncation flag.
+
+    Raises:
+        QueryTimeoutError: If the statement timeout cancels the query.
     """
     start = time.monotonic()
-    async with conn.cursor() as cur:
-        await cur.execute(sql)
-
-        if cur.description is None:
-            return QueryResult(columns=[], rows=[], row_count=0, truncated=False)
-
-        columns = [desc.name for desc in cur.description]
-        type_codes = [desc.type_code for desc in cur.description]
-
-        rows_raw = await cur.fetchmany(row_limit + 1)
-        truncated = len(rows_raw) > row_limit
-        if truncated:
-            rows_raw = rows_raw[:row_limit]
-
-        rows = []
-        for row in rows_raw:
-            converted = []
-            for i, val in enumerate(row):
-                if val is not None and _is_geometry_type(type_codes[i], conn):
-                    converted.append(_try_geojson(val))
-                else:
-                    converted.append(val)
-            rows.append(converted)
+    await register_geometry_types(conn)
+    async with timeout_errors(timeout):
+        if prepare:
+            fetched = await _fetch_prepared(conn, sql, row_limit + 1, timeout, params)
+        elif stream:
+            fetched = await _fetch_streaming(
+                conn, sql, row_limit + 1, timeout, params, progress
+            )
+        else:
+            fetched = await _fetch_buffered(conn, sql, row_limit + 1, timeout, params)
+    if fetched is None:
+        return QueryResult(columns=[], rows=[], row_count=0, truncated=False)
+
+    columns, rows = fetched
+    truncated = len(rows) > row_limit
+    if truncated:
+        del rows[row_limit:]
 
     elapsed = time.monotonic() - start
     logger.info(
@@ -63,10 +135,13 @@ async def execute_query(
         sql=sql[:200],
         row_count=len(rows),
         truncated=truncated,
+        streamed=stream and not prepare,
+        prepared=prepare,
         elapsed_seconds=round(elapsed, 3),
     )
 
-    return QueryResult(
+    # Rows are already JSON-ready lists; skip pydantic's per-value validation.
+    return QueryResult.model_construct(
         columns=columns,
         rows=rows,
         row_count=len(rows),
@@ -74,18 +149,467 @@ async def execute_query(
     )
 
 
-def _is_geometry_type(type_code: int, conn: psycopg.AsyncConnection) -> bool:
-    """Check if a column type code corresponds to a geometry type."""
-    # PostGIS geometry OID is dynamically assigned; we check common patterns
-    # A more robust approach queries pg_type, but for now we handle at
-    # serialization time
-    return False  # Handled by _try_geojson on value inspection
+async def execute_feature_collection(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    row_limit: int = DEFAULT_ROW_LIMIT,
+    timeout: float | None = None,
+    params: Params | None = None,
+    prepare: bool = False,
+    precision: int | None = None,
+) -> str:
+    """Execute a SELECT and return its rows as a serialized GeoJSON FeatureCollection.
+
+    The database encodes every row with ST_AsGeoJSON(record): the first
+    geometry column becomes the feature geometry and the remaining columns
+    its properties. The document carries ``numberReturned`` and
+    ``truncated`` as foreign members.
+
+    Args:
+        conn: Database connection.
+        sql: Validated SELECT SQL statement with at least one geometry column.
+        row_limit: Maximum features to return.
+        timeout: Statement timeout in seconds; None keeps the session's.
+        params: Values for %s or %(name)s placeholders in sql.
+        prepare: Run it as a prepared statement on the connection.
+        precision: Decimal digits per coordinate; None for ST_AsGeoJSON's
+            default of 9.
+
+    Returns:
+        The FeatureCollection as JSON text, ready to send as-is.
+
+    Raises:
+        QueryTimeoutError: If the statement timeout cancels the query.
+    """
+    start = time.monotonic()
+    query = pgsql.SQL(FEATURE_COLLECTION_QUERY).format(
+        query=pgsql.SQL(_strip_trailing_semicolons(sql)),
+        probe_limit=pgsql.Literal(row_limit + 1),
+        row_limit=pgsql.Literal(row_limit),
+        max_digits=pgsql.Literal(
+            DEFAULT_GEOJSON_DIGITS if precision is None else precision
+        ),
+    )
+    async with timeout_errors(timeout), _timeout_scope(conn, timeout):
+        async with conn.cursor() as cur:
+            with phase("execution"):
+                await cur.execute(query, params, prepare=prepare)
+            row = await cur.fetchone()
+    assert row is not None
+    document: str = row[0]
+
+    elapsed = time.monotonic() - start
+    logger.info(
+        "query_executed",
+        sql=sql[:200],
+        output="featurecollection",
+        response_bytes=len(document),
+        elapsed_seconds=round(elapsed, 3),
+    )
+    return document
+
+
+def _strip_trailing_semicolons(sql: str) -> str:
+    """Drop trailing semicolons so the statement can be nested as a subquery."""
+    return sql.rstrip().rstrip(";").rstrip()
+
+
+def _limited(sql: str, max_rows: int) -> pgsql.Composed:
+    """Wrap a SELECT in LIMITED_QUERY."""
+    return pgsql.SQL(LIMITED_QUERY).format(
+        query=pgsql.SQL(_strip_trailing_semicolons(sql)),
+        limit=pgsql.Literal(max_rows),
+    )
+
+
+async def execute_batch(
+    conn: psycopg.AsyncConnection,
+    statements: Sequence[tuple[str, Params | None]],
+    row_limit: int = DEFAULT_ROW_LIMIT,
+    timeout: float | None = None,
+) -> list[QueryResult | Exception]:
+    """Execute several SELECTs in pipeline mode and return each one's outcome.
+
+    All statements are sent together and their results read back
+    together, so the batch costs one network round trip instead of one
+    per statement. They run in a single read-only transaction; when one
+    fails, Postgres skips the rest of the pipeline, so the statements
+    after it are sent again in a new pass. Every failure therefore costs
+    one more round trip but only fails its own statement.
 
+    Args:
+        conn: Database connection.
+        statements: Validated SELECT statements with their bind parameters.
+        row_limit: Maximum rows to return per statement.
+        timeout: Statement timeout in seconds for each statement; None
+            keeps the session's statement_timeout.
 
-def _try_geojson(val: object) -> object:
-    """Attempt to convert a geometry value to GeoJSON string."""
-    if isinstance(val, str):
-        if val.startswith("{") and '"type"' in val:
-            return val  # Already GeoJSON
-        # Could be WKB hex; for now return as-is
-    return val
+    Returns:
+        One entry per statement, in order: its QueryResult, or the error
+        it raised (a QueryTimeoutError for a statement timeout).
+
+    Raises:
+        psycopg.OperationalError: If the connection is lost.
+    """
+    start = time.monotonic()
+    await register_geometry_types(conn)
+    outcomes: list[QueryResult | Exception] = []
+    pending = list(statements)
+    passes = 0
+    while pending:
+        passes += 1
+        fetched, error = await _pipeline_pass(conn, pending, row_limit + 1, timeout)
+        for columns, rows in fetched:
+            truncated = len(rows) > row_limit
+            if truncated:
+                del rows[row_limit:]
+            outcomes.append(
+                QueryResult(
+                    columns=columns, rows=rows, row_count=len(rows), truncated=truncated
+                )
+            )
+        if error is None:
+            break
+        outcomes.append(error)
+        pending = pending[len(fetched) + 1 :]
+
+    elapsed = time.monotonic() - start
+    logger.info(
+        "query_batch_executed",
+        statements=len(statements),
+        failed=sum(isinstance(o, Exception) for o in outcomes),
+        passes=passes,
+        elapsed_seconds=round(elapsed, 3),
+    )
+    return outcomes
+
+
+async def _pipeline_pass(
+    conn: psycopg.AsyncConnection,
+    statements: Sequence[tuple[str, Params | None]],
+    max_rows: int,
+    timeout: float | None,
+) -> tuple[list[_Fetched], Exception | None]:
+    """Pipeline statements until the first failure.
+
+    Returns:
+        The rows of the statements that ran before the first failure, and
+        that failure, or None if all of them succeeded.
+    """
+    cursors: list[psycopg.AsyncCursor[list[object]]] = []
+    error: Exception | None = None
+    try:
+        async with timeout_errors(timeout), conn.pipeline(), conn.transaction():
+            await conn.execute("SET TRANSACTION READ ONLY")
+            if timeout is not None:
+                await set_local_timeout(conn, timeout)
+            for sql, params in statements:
+                cur = conn.cursor(row_factory=json_row)
+                cursors.append(cur)
+                await cur.execute(_limited(sql, max_rows), params)
+    except (psycopg.DatabaseError, QueryTimeoutError) as exc:
+        if conn.broken:
+            raise
+        error = exc
+
+    fetched: list[_Fetched] = []
+    for cur in cursors:
+        # A statement that failed or was skipped after a failure has no result.
+        if cur.pgresult is None:
+            break
+        columns = [desc.name for desc in cur.description or ()]
+        fetched.append((columns, await cur.fetchall()))
+    if error is None and len(fetched) < len(statements):
+        error = psycopg.InterfaceError("Statement returned no result.")
+    return fetched, error
+
+
+async def execute_paged_query(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    row_limit: int,
+    cursors: CursorStore,
+    timeout: float | None = None,
+    params: Params | None = None,
+) -> tuple[QueryResult, str | None]:
+    """Execute a SELECT and keep its cursor open while rows remain.
+
+    The cursor is declared in a read-only transaction that stays open on
+    ``conn`` until the last page is served or the token expires.
+
+    Args:
+        conn: Database connection; pinned by ``cursors`` if a token is issued.
+        sql: Validated SELECT SQL statement.
+        row_limit: Rows per page.
+        cursors: Store that owns cursors between pages.
+        timeout: Statement timeout in seconds for the DECLARE and each
+            page's FETCH; None keeps the session's.
+        params: Values for %s or %(name)s placeholders in sql.
+
+    Returns:
+        The first page and a continuation token, or None if it was the last.
+
+    Raises:
+        QueryTimeoutError: If the statement timeout cancels a statement.
+    """
+    await register_geometry_types(conn)
+    owns_transaction = conn.info.transaction_status == TransactionStatus.IDLE
+    if owns_transaction:
+        await conn.execute("BEGIN READ ONLY")
+    entry = OpenCursor(
+        portal=Portal(conn),
+        row_limit=row_limit,
+        owns_transaction=owns_transaction,
+        timeout=timeout,
+    )
+    try:
+        async with timeout_errors(timeout):
+            if timeout is not None:
+                await set_local_timeout(conn, timeout)
+            await entry.portal.declare(sql, params)
+    except BaseException:
+        await cursors.close(entry, release=False)
+        raise
+    return await _serve_page(entry, cursors, sql[:200], release=False)
+
+
+async def fetch_next_page(
+    cursors: CursorStore,
+    token: str,
+    row_limit: int | None = None,
+) -> tuple[QueryResult, str | None]:
+    """Fetch the next page of a query opened by execute_paged_query.
+
+    Args:
+        cursors: Store holding the open cursor.
+        token: Continuation token from the previous page.
+        row_limit: Rows per page; defaults to the original query's limit.
+
+    Returns:
+        The next page and a new continuation token, or None if it was the last.
+
+    Raises:
+        ValueError: If the token is unknown or expired.
+    """
+    entry = await cursors.take(token)
+    if row_limit is not None:
+        entry.row_limit = row_limit
+    return await _serve_page(entry, cursors, "<continuation>", release=True)
+
+
+async def _serve_page(
+    entry: OpenCursor,
+    cursors: CursorStore,
+    sql: str,
+    release: bool,
+) -> tuple[QueryResult, str | None]:
+    """Fetch one page plus a look-ahead row, then re-register or close the cursor."""
+    start = time.monotonic()
+    wanted = entry.row_limit + 1 - len(entry.pending)
+    try:
+        async with timeout_errors(entry.timeout):
+            fetched = entry.pending + (
+                await _fetch_rows(entry.portal, wanted) if wanted > 0 else []
+            )
+    except BaseException:
+        await cursors.close(entry, release=release)
+        raise
+    page, entry.pending = fetched[: entry.row_limit], fetched[entry.row_limit :]
+    entry.rows_served += len(page)
+
+    token = None
+    if entry.pending:
+        token = await cursors.register(entry)
+    else:
+        await cursors.close(entry, release=release)
+
+    elapsed = time.monotonic() - start
+    logger.info(
+        "query_page_served",
+        sql=sql,
+        row_count=len(page),
+        rows_served=entry.rows_served,
+        has_more=token is not None,
+        elapsed_seconds=round(elapsed, 3),
+    )
+    result = QueryResult.model_construct(
+        columns=entry.portal.columns,
+        rows=page,
+        row_count=len(page),
+        truncated=token is not None,
+    )
+    return result, token
+
+
+_Fetched = tuple[list[str], list[list[object]]]
+
+
+async def _fetch_buffered(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    max_rows: int,
+    timeout: float | None = None,
+    params: Params | None = None,
+) -> _Fetched | None:
+    """Run the query on a client-side cursor and keep the first max_rows rows."""
+    async with _timeout_scope(conn, timeout):
+        async with conn.cursor(row_factory=json_row) as cur:
+            with phase("execution"):
+                await cur.execute(sql, params)
+            if cur.description is None:
+                return None
+            columns = [desc.name for desc in cur.description]
+            with phase("conversion"):
+                rows = await cur.fetchmany(max_rows)
+    return columns, rows
+
+
+async def _fetch_streaming(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    max_rows: int,
+    timeout: float | None = None,
+    params: Params | None = None,
+    progress: Progress | None = None,
+) -> _Fetched | None:
+    """Pull at most max_rows rows through a named server-side cursor.
+
+    The cursor lives in its own transaction (a savepoint if one is already
+    open), since autocommit connections cannot hold a cursor without one;
+    ending the transaction closes it. Fetching stops as soon as max_rows
+    rows have arrived.
+    """
+    async with conn.transaction():
+        if timeout is not None:
+            await set_local_timeout(conn, timeout)
+        portal = Portal(conn)
+        await portal.declare(sql, params)
+        rows = await _fetch_rows(portal, max_rows, progress)
+    return portal.columns, rows
+
+
+async def _fetch_prepared(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    max_rows: int,
+    timeout: float | None = None,
+    params: Params | None = None,
+) -> _Fetched | None:
+    """Run the query as a prepared statement limited to max_rows rows.
+
+    psycopg keeps the statement prepared on the connection, keyed by its
+    text, and reuses it on later calls with any parameter values.
+    """
+    async with _timeout_scope(conn, timeout):
+        async with conn.cursor(row_factory=json_row) as cur:
+            with phase("execution"):
+                await cur.execute(_limited(sql, max_rows), params, prepare=True)
+            if cur.description is None:
+                return None
+            columns = [desc.name for desc in cur.description]
+            with phase("conversion"):
+                rows = await cur.fetchall()
+    return columns, rows
+
+
+@asynccontextmanager
+async def timeout_errors(timeout: float | None) -> AsyncIterator[None]:
+    """Turn a statement-timeout cancellation into QueryTimeoutError.
+
+    Postgres reports a statement timeout and pg_cancel_backend() from an
+    operator with the same SQLSTATE (57014, QueryCanceled), and words the
+    message in the server's lc_messages. A cancellation counts as the
+    timeout only when the block has run at least timeout seconds; earlier
+    ones, and any when no timeout was set here, propagate unchanged. A
+    cancelled asyncio task never gets here: psycopg sends the server a
+    cancel request itself and re-raises CancelledError.
+    """
+    start = time.monotonic()
+    try:
+        yield
+    except psycopg.errors.QueryCanceled as exc:
+        elapsed = time.monotonic() - start
+        if timeout is None or elapsed < timeout:
+            raise
+        logger.warning(
+            "query_timeout",
+            timeout_seconds=timeout,
+            elapsed_seconds=round(elapsed, 3),
+        )
+        raise QueryTimeoutError(elapsed, timeout) from exc
+
+
+@asynccontextmanager
+async def _timeout_scope(
+    conn: psycopg.AsyncConnection, timeout: float | None
+) -> AsyncIterator[None]:
+    """Run the body in a transaction with a local statement_timeout, if given.
+
+    Without a timeout the statement runs as-is, saving the BEGIN/COMMIT
+    round trips on an autocommit connection.
+    """
+    if timeout is None:
+        yield
+        return
+    async with conn.transaction():
+        await set_local_timeout(conn, timeout)
+        yield
+
+
+async def set_local_timeout(conn: psycopg.AsyncConnection, timeout: float) -> None:
+    """Set statement_timeout until the end of the current transaction."""
+    await conn.execute(
+        "SELECT set_config('statement_timeout', %s, true)",
+        (f"{max(1, round(timeout * 1000))}ms",),
+    )
+
+
+async def fetch_batches(
+    portal: Portal, max_rows: int
+) -> AsyncGenerator[list[list[object]], None]:
+    """FETCH from a portal until max_rows rows or the end, yielding each batch.
+
+    The first batch is INITIAL_FETCH_SIZE rows, so it arrives quickly;
+    later ones are sized by _next_fetch_size. The last batch may be empty.
+    """
+    fetched = 0
+    fetch_size = INITIAL_FETCH_SIZE
+    while fetched < max_rows:
+        wanted = min(fetch_size, max_rows - fetched)
+        batch = await portal.fetch(wanted)
+        fetched += len(batch)
+        yield batch
+        if len(batch) < wanted:
+            return
+        fetch_size = _next_fetch_size(portal.pgresult)
+
+
+async def _fetch_rows(
+    portal: Portal, max_rows: int, progress: Progress | None = None
+) -> list[list[object]]:
+    """FETCH from a portal until max_rows rows or the end."""
+    rows: list[list[object]] = []
+    async with aclosing(fetch_batches(portal, max_rows)) as batches:
+        async for batch in batches:
+            rows.extend(batch)
+            if progress is not None:
+                await progress(len(rows))
+    return rows
+
+
+def _next_fetch_size(pgresult: PGresult | None) -> int:
+    """Size the next FETCH so it carries about FETCH_BATCH_BYTES of data.
+
+    Row width is measured from the wire lengths of the last batch, so it
+    reflects what Postgres sends rather than the loaded Python objects.
+    """
+    if pgresult is None or pgresult.ntuples == 0:
+        return INITIAL_FETCH_SIZE
+    sample = min(pgresult.ntuples, 20)
+    total = sum(
+        len(pgresult.get_value(row, col) or b"")
+        for row in range(sample)
+        for col in range(pgresult.nfields)
+    )
+    row_bytes = max(total / sample, 1.0)
+    return max(MIN_FETCH_SIZE, min(MAX_FETCH_SIZE, int(FETCH_BATCH_BYTES / row_bytes)))
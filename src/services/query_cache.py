@@ -0,0 +1,183 @@
+"""Query result cache invalidated by table modification counters."""
+
+from __future__ import annotations
+
+import re
+
+import psycopg
+import structlog
+
+from src.models.query import QueryResult
+from src.services.cache import LRUCache
+from src.services.sql_parser import SQL_VALUE_FUNCTIONS
+
+logger = structlog.get_logger(__name__)
+
+# One row per referenced table, matched on schema and name. relfilenode
+# changes on TRUNCATE and table rewrites, which the tuple counters do not
+# reflect. No rows at all when one of the functions has an overload that
+# is not immutable: now(), random() or nextval() give another result on
+# every run however unchanged the tables are.
+TABLE_VERSIONS_QUERY = """
+SELECT s.schemaname, s.relname, c.relfilenode,
+       s.n_tup_ins + s.n_tup_upd + s.n_tup_del
+FROM unnest(%(schemas)s::text[], %(names)s::text[]) AS r (schemaname, relname)
+JOIN pg_catalog.pg_stat_user_tables s
+    ON s.schemaname = r.schemaname AND s.relname = r.relname
+JOIN pg_catalog.pg_class c ON c.oid = s.relid
+WHERE NOT EXISTS (
+    SELECT FROM pg_catalog.pg_proc p
+    WHERE p.proname = ANY(%(functions)s::text[]) AND p.provolatile <> 'i'
+)
+ORDER BY s.schemaname, s.relname
+"""
+
+# Quoted literals and identifiers, kept verbatim during normalization.
+_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_WHITESPACE = re.compile(r"\s+")
+
+CachedValue = QueryResult | str
+QualifiedName = tuple[str, str]
+CacheKey = tuple[str, int, str, str]
+TableVersions = tuple[tuple[object, ...], ...]
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside quotes and drop trailing semicolons.
+
+    Dollar-quoted bodies cannot be told apart from the surrounding text
+    here, so statements containing ``$`` are only trimmed.
+    """
+    sql = sql.strip().rstrip(";").rstrip()
+    if "$" in sql:
+        return sql
+    parts: list[str] = []
+    last = 0
+    for match in _QUOTED.finditer(sql):
+        parts.append(_WHITESPACE.sub(" ", sql[last : match.start()]))
+        parts.append(match.group())
+        last = match.end()
+    parts.append(_WHITESPACE.sub(" ", sql[last:]))
+    return "".join(parts)
+
+
+class QueryCache:
+    """LRU+TTL cache of query results, checked against table versions.
+
+    Each entry records the modification counters of the tables the query
+    read, taken before it ran. A lookup re-reads the counters in one
+    catalog query and discards the entry if any table changed. Queries
+    calling a function that is not immutable are never cached.
+
+    The counters are published by each writing backend, at most once a
+    second and otherwise after ten seconds idle (Postgres 15+), so a
+    plain INSERT/UPDATE/DELETE can go unseen for up to about ten seconds.
+    TRUNCATE and table rewrites are seen at once via relfilenode. The TTL
+    bounds staleness when track_counts is off.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self._cache: LRUCache[CacheKey, tuple[TableVersions, CachedValue]] = (
+            LRUCache(max_bytes, ttl, sizeof=lambda entry: _estimate_size(entry[1]))
+        )
+
+    @staticmethod
+    def key(
+        sql: str, row_limit: int, output: str, params: object = None
+    ) -> CacheKey:
+        """Build the cache key for a query and its bound parameters."""
+        return normalize_sql(sql), row_limit, output, repr(params)
+
+    async def lookup(
+        self,
+        conn: psycopg.AsyncConnection,
+        key: CacheKey,
+        tables: list[QualifiedName],
+        functions: frozenset[str] = frozenset(),
+    ) -> tuple[CachedValue | None, TableVersions | None]:
+        """Return a still-valid cached value and the current table versions.
+
+        Args:
+            conn: Database connection used to read the table counters.
+            key: Key from QueryCache.key.
+            tables: (schema, name) of the tables referenced by the query.
+            functions: Names of the functions the query calls.
+
+        Returns:
+            The cached value (None on a miss) and the versions to store with
+            a freshly computed value. Versions are None when the query is
+            not cacheable: it reads no tables, one of them is a view or
+            otherwise has no statistics, or it calls a function that is
+            not immutable.
+        """
+        if not functions.isdisjoint(SQL_VALUE_FUNCTIONS):
+            return None, None
+        versions = await table_versions(conn, tables, functions)
+        if versions is None:
+            return None, None
+        entry = self._cache.get(key, validate=lambda e: e[0] == versions)
+        if entry is None:
+            return None, versions
+        logger.debug("query_cache_hit", sql=key[0][:200])
+        return entry[1], versions
+
+    def store(self, key: CacheKey, versions: TableVersions, value: CachedValue) -> None:
+        """Cache a value computed after lookup returned these versions."""
+        self._cache.put(key, (versions, value))
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        self._cache.clear()
+
+    def stats(self) -> dict[str, object]:
+        """Return occupancy and hit, miss, eviction, and invalidation counters."""
+        return self._cache.stats()
+
+
+async def table_versions(
+    conn: psycopg.AsyncConnection,
+    tables: list[QualifiedName],
+    functions: frozenset[str] = frozenset(),
+) -> TableVersions | None:
+    """Read the modification counters of tables, to detect later writes.
+
+    Args:
+        conn: Database connection.
+        tables: (schema, name) of each table.
+        functions: Function names that must all be immutable.
+
+    Returns:
+        One row per table, or None if a table has no statistics (a view,
+        or a name that does not exist) or a function is not immutable.
+    """
+    wanted = set(tables)
+    if not wanted:
+        return None
+    schemas, names = zip(*sorted(wanted))
+    params = {
+        "schemas": list(schemas),
+        "names": list(names),
+        "functions": sorted(functions),
+    }
+    async with conn.cursor() as cur:
+        await cur.execute(TABLE_VERSIONS_QUERY, params)
+        rows = await cur.fetchall()
+    if {(row[0], row[1]) for row in rows} != wanted:
+        return None
+    return tuple(tuple(row) for row in rows)
+
+
+def _estimate_size(value: CachedValue) -> int:
+    """Approximate the memory held by a cached value.
+
+    Row size is sampled from up to 50 rows by their repr length rather
+    than measured exactly, which would cost as much as serializing them.
+    """
+    if isinstance(value, str):
+        return len(value)
+    rows = value.rows
+    if not rows:
+        return 64
+    sample = rows[: min(len(rows), 50)]
+    per_row = sum(len(repr(row)) for row in sample) / len(sample)
+    return int(per_row * len(rows)) + 64
@@ -4,101 +4,116 @@ from __future__ import annotations
 
 import psycopg
 
-LIST_TABLES_QUERY = """
-SELECT
-    t.table_name,
-    t.table_schema,
-    pg_stat.n_live_tup AS estimated_rows
-FROM information_schema.tables t
-LEFT JOIN pg_stat_user_tables pg_stat
-    ON t.table_schema = pg_stat.schemaname
-    AND t.table_name = pg_stat.relname
-WHERE t.table_schema = %s
-    AND t.table_type = 'BASE TABLE'
-ORDER BY t.table_name
-"""
-
-DESCRIBE_TABLE_QUERY = """
-SELECT
-    c.column_name,
-    c.data_type,
-    c.is_nullable,
-    c.column_default,
-    c.udt_name
-FROM information_schema.columns c
-WHERE c.table_schema = %s
-    AND c.table_name = %s
-ORDER BY c.ordinal_position
-"""
-
-SPATIAL_COLUMNS_QUERY = """
-SELECT
-    f_geometry_column,
-    type,
-    srid,
-    coord_dimension
-FROM geometry_columns
-WHERE f_table_schema = %s
-    AND f_table_name = %s
-"""
+from src.models.catalog import ColumnMetadata, TableMetadata
+from src.services.catalog import load_tables
+from src.services.catalog_cache import CatalogCache
 
 
 async def list_tables(
     conn: psycopg.AsyncConnection,
     schema: str,
     allowed_tables: list[str],
+    cache: CatalogCache | None = None,
 ) -> list[dict[str, object]]:
     """List all allowed tables in the given schema.
 
-    Returns only tables that are in the allowed_tables list.
+    Returns only tables that are in the allowed_tables list,
+    from cache when one is given.
     """
-    async with conn.cursor() as cur:
-        await cur.execute(LIST_TABLES_QUERY, (schema,))
-        rows = await cur.fetchall()
+    if cache is not None:
+        return await cache.get_or_load(
+            conn,
+            ("list_tables", schema, tuple(allowed_tables)),
+            lambda: list_tables(conn, schema, allowed_tables),
+        )
 
+    prefix = f"{schema}."
+    names = [t[len(prefix) :] for t in allowed_tables if t.startswith(prefix)]
+    tables = await load_tables(conn, schema, names)
     return [
         {
-            "table_name": row[0],
-            "schema": row[1],
-            "estimated_rows": row[2] or 0,
+            "table_name": table.table_name,
+            "schema": table.schema_,
+            "estimated_rows": table.estimated_rows,
         }
-        for row in rows
-        if f"{schema}.{row[0]}" in allowed_tables
+        for table in tables.values()
     ]
 
-async def describe_table(
-    conn: psycopg.AsyncConnection,
-    schema: str,
-    table_name: str,
-) -> list[dict[str, object]]:
-    """Get column details for a table."""
-    async with conn.cursor() as cur:
-        await cur.execute(DESCRIBE_TABLE_QUERY, (schema, table_name))
-        column_rows = await cur.fetchall()
-
-    spatial_info: dict[str, dict[str, object]] = {}
-    try:
-        async with conn.cursor() as cur:
-            await cur.execute(SPATIAL_COLUMNS_QUERY, (schema, table_name))
-            for row in await cur.fetchall():
-                spatial_info[row[0]] = {
-                    "geometry_type": row[1],
-                    "srid": row[2],
-                    "coord_dimension": row[3],
-                }
-    except psycopg.errors.UndefinedTable:
-        pass
 
+def describe_columns(table: TableMetadata) -> list[dict[str, object]]:
+    """Format a table's columns, adding spatial details to geometry columns."""
     columns = []
-    for row in column_rows:
+    for column in table.columns:
         col: dict[str, object] = {
-            "column_name": row[0],
-            "data_type": row[1],
-            "is_nullable": row[2] == "YES",
-            "column_default": row[3],
+            "column_name": column.column_name,
+            "data_type": column.data_type,
+            "is_nullable": column.is_nullable,
+            "column_default": column.column_default,
         }
-        if row[0] in spatial_info:
-            col.update(spatial_info[row[0]])
+        if column.geometry_type is not None:
+            col.update(
+                geometry_type=column.geometry_type,
+                srid=column.srid,
+                coord_dimension=column.coord_dimension,
+            )
         columns.append(col)
-
     return columns
+
+
+def geometry_column(
+    table: TableMetadata, geom_column: str | None = None
+) -> ColumnMetadata:
+    """Pick a table's geometry column: the named one, or else the first.
+
+    Raises:
+        ValueError: If the table has no such geometry column.
+    """
+    geometry = [c for c in table.columns if c.geometry_type is not None]
+    if geom_column is None:
+        if not geometry:
+            raise ValueError(f"Table '{table.table_name}' has no geometry column.")
+        return geometry[0]
+    found = [c for c in geometry if c.column_name == geom_column]
+    if not found:
+        raise ValueError(
+            f"'{geom_column}' is not a geometry column of table "
+            f"'{table.table_name}'."
+        )
+    return found[0]
+
+
+def spatial_layer(
+    table: TableMetadata,
+    geom_column: str | None = None,
+    columns: list[str] | None = None,
+) -> tuple[ColumnMetadata, list[str]]:
+    """Pick a table's geometry column and the attribute columns to send with it.
+
+    Args:
+        table: Table metadata.
+        geom_column: Geometry column to use; None for the first one.
+        columns: Attribute columns; None for every non-geometry column.
+
+    Returns:
+        The geometry column, which has an SRID, and the attribute names.
+
+    Raises:
+        ValueError: If there is no such geometry column, it has no SRID,
+            or a requested column does not exist.
+    """
+    column = geometry_column(table, geom_column)
+    if not column.srid:
+        raise ValueError(
+            f"Column '{column.column_name}' has no SRID, so it cannot be "
+            f"reprojected."
+        )
+
+    if columns is None:
+        return column, [c.column_name for c in table.columns if c.geometry_type is None]
+    names = {c.column_name for c in table.columns}
+    unknown = [name for name in columns if name not in names]
+    if unknown:
+        raise ValueError(
+            f"Unknown columns for table '{table.table_name}': {', '.join(unknown)}."
+        )
+    return column, [name for name in columns if name != column.column_name]
@@ -0,0 +1,381 @@
+"""Single-pass SQL lexer and relation extractor, memoized per statement text."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Distinct statements kept parsed; agents tend to resend the same queries.
+PARSE_CACHE_SIZE = 512
+
+# One alternative per token kind, each after optional whitespace, ordered
+# by frequency. Whitespace is never a token of its own, so trailing
+# whitespace after the last ';' does not start another statement.
+# E'...' strings (whose backslashes escape quotes) and U&"..."
+# identifiers come before words so their prefixes are not read as words;
+# other prefixed strings (B'', X'', N'') lex harmlessly as a word plus a
+# string. Block comments nest in Postgres: the common unnested ones are
+# matched here, and one with a nested /* goes to _skip_block_comment.
+_TOKEN = re.compile(
+    r"""
+    \s*(?:
+    (?P<string>[eE]'(?:[^'\\]|\\.|'')*'|'(?:[^']|'')*')
+    | (?P<ident>(?:[uU]&)?"(?:[^"]|"")*")
+    | (?P<word>[^\W\d][\w$]*)
+    | (?P<punct>[(),;.\[\]])
+    | (?P<number>(?:\d[\d_]*(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*(?:[^*/]|\*(?!/)|/(?!\*))*\*/)
+    | (?P<nested_comment>/\*)
+    | (?P<dollar>\$\$.*?\$\$|\$(?P<tag>[^\W\d]\w*)\$.*?\$(?P=tag)\$)
+    | (?P<open_dollar>\$(?:[^\W\d]\w*)?\$)
+    | (?P<param>\$\d+)
+    | (?P<op>(?:[+*<>=~!@\#%^&|`?:]|-(?!-)|/(?!\*))+)
+    | (?P<other>\S)
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_SKIPPED = frozenset({"line_comment", "block_comment"})
+
+# Keywords that end a FROM list at the same nesting level.
+_FROM_ENDERS = frozenset({
+    "where", "group", "having", "window", "order", "limit", "offset",
+    "fetch", "union", "intersect", "except", "for", "returning",
+})
+
+# Words allowed between FROM/JOIN/',' and the relation name.
+_RELATION_PREFIXES = frozenset({"only", "lateral"})
+
+# SQL-standard functions called without parentheses. None is immutable.
+SQL_VALUE_FUNCTIONS = frozenset({
+    "current_date", "current_time", "current_timestamp", "localtime",
+    "localtimestamp", "current_user", "current_role", "session_user", "user",
+    "current_schema", "current_catalog",
+})
+
+
+@dataclass(frozen=True)
+class Relation:
+    """A table or view named in a FROM list, as Postgres would fold it."""
+
+    schema: str | None
+    name: str
+
+    def __str__(self) -> str:
+        return f"{self.schema}.{self.name}" if self.schema else self.name
+
+
+@dataclass(frozen=True)
+class ParsedSQL:
+    """What one tokenizer pass learned about a SQL text.
+
+    Attributes:
+        statement_type: First keyword of the first statement, upper-cased
+            ("" for an empty text).
+        statement_count: Non-empty statements separated by semicolons.
+        relations: Relations read, in order of first appearance, without
+            references to CTEs in scope where they are read.
+        cte_names: Names defined by WITH clauses at any level.
+        cte_statement_types: First keyword of each CTE body, upper-cased,
+            so that data-modifying CTEs can be refused.
+        functions: Names of the functions called, unqualified, plus any
+            of SQL_VALUE_FUNCTIONS used. Keywords written before a
+            parenthesis, such as IN or EXISTS, are included too.
+        select_into: Whether the text contains INTO, i.e. SELECT INTO,
+            which creates a table.
+    """
+
+    statement_type: str
+    statement_count: int
+    relations: tuple[Relation, ...]
+    cte_names: frozenset[str]
+    cte_statement_types: tuple[str, ...]
+    functions: frozenset[str]
+    select_into: bool
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_sql(sql: str) -> ParsedSQL:
+    """Tokenize a SQL text once and extract its statement shape.
+
+    Results are memoized on the text, so a resent query is not lexed
+    again. Relation extraction follows FROM lists, JOINs, comma joins,
+    subqueries and CTE bodies; names are folded to lower case unless
+    double-quoted, as Postgres does. FROM inside function calls such as
+    EXTRACT(YEAR FROM ts) is not taken for a relation.
+
+    Raises:
+        ValueError: If a string, quoted identifier, or comment is not
+            terminated, or the parentheses do not balance.
+    """
+    return _Analyzer(_tokenize(sql)).run()
+
+
+# Token kinds after lexing: "word" (folded keyword or identifier),
+# "ident" (quoted identifier), "punct", or "literal" for everything else.
+_Token = tuple[str, str]
+
+
+def _tokenize(sql: str) -> list[_Token]:
+    tokens: list[_Token] = []
+    append = tokens.append
+    pos = 0
+    while True:
+        for m in _TOKEN.finditer(sql, pos):
+            kind = m.lastgroup
+            assert kind is not None  # every alternative of _TOKEN is named
+            if kind == "word":
+                append(("word", m.group(kind).lower()))
+            elif kind == "punct":
+                append(("punct", m.group(kind)))
+            elif kind in _SKIPPED:
+                continue
+            elif kind == "ident":
+                append(("ident", _unquote(m.group(kind))))
+            elif kind == "nested_comment":
+                pos = _skip_block_comment(sql, m.end())
+                break
+            elif kind == "open_dollar":
+                raise ValueError("Unterminated dollar-quoted string in SQL statement.")
+            elif kind == "other" and m.group(kind) in "'\"":
+                # The string and identifier patterns only match terminated
+                # quotes, so an opening quote left over is unterminated.
+                raise ValueError("Unterminated quoted string in SQL statement.")
+            else:
+                append(("literal", m.group(kind)))
+        else:
+            return tokens
+
+
+def _unquote(text: str) -> str:
+    if text[0] in "uU":
+        text = text[2:]
+    return text[1:-1].replace('""', '"')
+
+
+def _skip_block_comment(sql: str, pos: int) -> int:
+    """Return the position after a /* comment opened before pos, with nesting."""
+    depth = 1
+    while depth:
+        close = sql.find("*/", pos)
+        if close == -1:
+            raise ValueError("Unterminated block comment in SQL statement.")
+        nested = sql.find("/*", pos, close)
+        if nested == -1:
+            depth -= 1
+            pos = close + 2
+        else:
+            depth += 1
+            pos = nested + 2
+    return pos
+
+
+class _Level:
+    """Clause state for one parenthesis level."""
+
+    __slots__ = ("select_seen", "in_from", "cte_body", "ctes")
+
+    def __init__(self, select_seen: bool = False, in_from: bool = False) -> None:
+        self.select_seen = select_seen
+        self.in_from = in_from
+        # Set when this level is a CTE body, so a following ',' starts
+        # the next CTE definition.
+        self.cte_body = False
+        # Names defined by a WITH at this level, visible here and in the
+        # levels nested inside it.
+        self.ctes: set[str] = set()
+
+
+class _Analyzer:
+    """Walks the token list once, tracking FROM lists per nesting level."""
+
+    def __init__(self, tokens: list[_Token]) -> None:
+        self.tokens = tokens
+        self.relations: list[Relation] = []
+        self.cte_names: set[str] = set()
+        self.cte_types: list[str] = []
+        self.functions: set[str] = set()
+
+    def run(self) -> ParsedSQL:
+        tokens = self.tokens
+        levels = [_Level()]
+        expect_relation = False
+        statement_type = ""
+        statements = 0
+        in_statement = False
+        select_into = False
+        i = 0
+        n = len(tokens)
+        while i < n:
+            kind, text = tokens[i]
+            if kind == "punct" and text == ";":
+                if len(levels) > 1:
+                    raise ValueError("Unbalanced parentheses in SQL statement.")
+                in_statement = False
+                levels = [_Level()]
+                expect_relation = False
+                i += 1
+                continue
+            if not in_statement:
+                in_statement = True
+                statements += 1
+            if not statement_type and kind == "word":
+                statement_type = text.upper()
+            if kind in ("word", "ident") and (
+                self._peek(i + 1) == ("punct", "(")
+                or (kind == "word" and text in SQL_VALUE_FUNCTIONS)
+            ):
+                self.functions.add(text)
+
+            if kind == "punct":
+                if text == "(":
+                    # A parenthesis where a relation is due opens a subquery
+                    # or a parenthesized join, which is itself a FROM list.
+                    levels.append(_Level(expect_relation, expect_relation))
+                elif text == ")":
+                    closed = levels.pop() if len(levels) > 1 else None
+                    if closed is None:
+                        raise ValueError("Unbalanced parentheses in SQL statement.")
+                    expect_relation = False
+                    if closed.cte_body and self._peek(i + 1) == ("punct", ","):
+                        i = self._cte_header(i + 2, levels)
+                        continue
+                elif text == ",":
+                    expect_relation = levels[-1].in_from
+                else:
+                    expect_relation = False
+                i += 1
+                continue
+
+            if kind == "word":
+                level = levels[-1]
+                if text == "select":
+                    level.select_seen = True
+                    level.in_from = False
+                    expect_relation = False
+                elif text == "from" and level.select_seen:
+                    level.in_from = True
+                    expect_relation = True
+                elif text == "join" and level.in_from:
+                    expect_relation = True
+                elif text == "table":
+                    # TABLE name, shorthand for SELECT * FROM name.
+                    expect_relation = True
+                elif text in _FROM_ENDERS:
+                    level.in_from = False
+                    expect_relation = False
+                elif text == "into":
+                    select_into = True
+                elif text == "with":
+                    i = self._cte_header(i + 1, levels)
+                    continue
+                elif expect_relation and (
+                    text in _RELATION_PREFIXES
+                    or (text == "rows" and self._peek(i + 1) == ("word", "from"))
+                ):
+                    pass
+                elif expect_relation:
+                    i = self._relation(i, levels)
+                    expect_relation = False
+                    continue
+                else:
+                    expect_relation = False
+                i += 1
+                continue
+
+            if kind == "ident" and expect_relation:
+                i = self._relation(i, levels)
+                expect_relation = False
+                continue
+            expect_relation = False
+            i += 1
+
+        if len(levels) > 1:
+            raise ValueError("Unbalanced parentheses in SQL statement.")
+        return ParsedSQL(
+            statement_type=statement_type,
+            statement_count=statements,
+            relations=tuple(dict.fromkeys(self.relations)),
+            cte_names=frozenset(self.cte_names),
+            cte_statement_types=tuple(self.cte_types),
+            functions=frozenset(self.functions),
+            select_into=select_into,
+        )
+
+    def _peek(self, i: int) -> _Token | None:
+        return self.tokens[i] if i < len(self.tokens) else None
+
+    def _relation(self, i: int, levels: list[_Level]) -> int:
+        """Record the possibly qualified name starting at i; return the next index.
+
+        An unqualified name defined by a WITH on this level or an
+        enclosing one is a CTE reference and is not recorded.
+        """
+        parts = [self.tokens[i][1]]
+        while (
+            self._peek(i + 1) == ("punct", ".")
+            and (following := self._peek(i + 2)) is not None
+            and following[0] in ("word", "ident")
+        ):
+            parts.append(following[1])
+            i += 2
+        # name( is a set-returning function such as generate_series().
+        if self._peek(i + 1) == ("punct", "("):
+            self.functions.add(parts[-1])
+        else:
+            schema = parts[-2] if len(parts) > 1 else None
+            name = parts[-1]
+            if schema is not None or not any(name in lv.ctes for lv in levels):
+                self.relations.append(Relation(schema, name))
+        return i + 1
+
+    def _cte_header(self, i: int, levels: list[_Level]) -> int:
+        """Read `[RECURSIVE] name [(cols)] AS [NOT] [MATERIALIZED] (`.
+
+        The body's opening parenthesis is consumed here and its level is
+        pushed, marked as a CTE body; the body itself is scanned by the
+        main loop. Returns the index of the body's first token, or i
+        unchanged if the tokens do not form a CTE header.
+        """
+        tokens = self.tokens
+        if self._peek(i) == ("word", "recursive"):
+            i += 1
+        head = self._peek(i)
+        if head is None or head[0] not in ("word", "ident"):
+            return i
+        name = head[1]
+        j = i + 1
+        if self._peek(j) == ("punct", "("):
+            depth = 0
+            while j < len(tokens):
+                if tokens[j] == ("punct", "("):
+                    depth += 1
+                elif tokens[j] == ("punct", ")"):
+                    depth -= 1
+                    if depth == 0:
+                        break
+                j += 1
+            j += 1
+        if self._peek(j) != ("word", "as"):
+            return i
+        j += 1
+        if self._peek(j) == ("word", "not"):
+            j += 1
+        if self._peek(j) == ("word", "materialized"):
+            j += 1
+        if self._peek(j) != ("punct", "("):
+            return i
+        self.cte_names.add(name)
+        levels[-1].ctes.add(name)
+        first = j + 1
+        while self._peek(first) == ("punct", "("):
+            first += 1
+        body = self._peek(first)
+        self.cte_types.append(body[1].upper() if body and body[0] == "word" else "")
+        level = _Level()
+        level.cte_body = True
+        levels.append(level)
+        return j + 1
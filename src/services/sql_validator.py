@@ -2,47 +2,49 @@
 
 from __future__ import annotations
 
-import re
+from src.services.sql_parser import ParsedSQL, parse_sql
 
+# CTE bodies that only read; anything else (INSERT, UPDATE, DELETE,
+# MERGE) would make the statement write despite starting with WITH.
+_READ_ONLY_CTE_TYPES = frozenset({"SELECT", "VALUES", "TABLE", "WITH"})
 
-def validate_select_only(sql: str) -> None:
-    """Validate that a SQL statement is a SELECT query.
 
-    Strips leading comments and whitespace, then checks that the
-    first keyword is SELECT or WITH (for CTEs).
+def validate_select_only(sql: str) -> ParsedSQL:
+    """Validate that a SQL text is a single SELECT query.
+
+    The first keyword, after comments, must be SELECT or WITH (for CTEs).
+    Also rejected: several statements, data-modifying CTEs, and SELECT
+    INTO, which creates a table.
 
     Args:
         sql: The SQL statement to validate.
 
+    Returns:
+        The parsed statement, for callers that need its relations.
+
     Raises:
-        ValueError: If the statement is not a SELECT query.
+        ValueError: If the statement is not a single read-only SELECT.
     """
-    cleaned = _strip_leading_comments(sql).strip()
-    if not cleaned:
+    parsed = parse_sql(sql)
+    if not parsed.statement_type:
         raise ValueError("Empty SQL statement.")
 
-    first_word = cleaned.split()[0].upper()
-    if first_word not in ("SELECT", "WITH"):
+    if parsed.statement_type not in ("SELECT", "WITH"):
         raise ValueError(
             f"Only SELECT queries are permitted. "
-            f"Received statement starting with: {first_word}"
+            f"Received statement starting with: {parsed.statement_type}"
         )
-
-
-def _strip_leading_comments(sql: str) -> str:
-    """Remove leading SQL comments (-- and /* */ style)."""
-    result = sql.strip()
-    while True:
-        if result.startswith("--"):
-            newline = result.find("\n")
-            if newline == -1:
-                return ""
-            result = result[newline + 1:].strip()
-        elif result.startswith("/*"):
-            end = result.find("*/")
-            if end == -1:
-                return ""
-            result = result[end + 2:].strip()
-        else:
-            break
-    return result
+    if parsed.statement_count > 1:
+        raise ValueError(
+            "Only a single SELECT statement is permitted; remove the text "
+            "after the first semicolon."
+        )
+    for cte_type in parsed.cte_statement_types:
+        if cte_type not in _READ_ONLY_CTE_TYPES:
+            raise ValueError(
+                f"Only SELECT queries are permitted. "
+                f"Received a WITH clause containing: {cte_type or 'a non-query'}"
+            )
+    if parsed.select_into:
+        raise ValueError("SELECT INTO is not permitted; it creates a table.")
+    return parsed
@@ -0,0 +1,143 @@
+"""Query results streamed as NDJSON or GeoJSON text sequences while fetched."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import AsyncGenerator, Callable
+from contextlib import aclosing
+from typing import Literal
+
+import psycopg
+import structlog
+from pydantic_core import to_json
+
+from src.services.geometry import register_geometry_types
+from src.services.portal import Params, Portal
+from src.services.query import (
+    QueryTimeoutError,
+    fetch_batches,
+    set_local_timeout,
+    timeout_errors,
+)
+
+logger = structlog.get_logger(__name__)
+
+StreamOutput = Literal["ndjson", "geojsonseq"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "geojsonseq": "application/geo+json-seq",
+}
+
+# RFC 8142: every GeoJSON text in a sequence starts with a record separator.
+_RECORD_SEPARATOR = b"\x1e"
+
+_Encoder = Callable[[list[object]], bytes]
+
+
+async def stream_query(
+    conn: psycopg.AsyncConnection,
+    sql: str,
+    output: StreamOutput = "ndjson",
+    max_rows: int = 1_000_000,
+    timeout: float | None = None,
+    params: Params | None = None,
+) -> AsyncGenerator[bytes, None]:
+    """Run a SELECT and yield its rows encoded, one chunk per FETCH.
+
+    Rows go through a server-side cursor in a read-only transaction, so
+    only one batch is held in memory at a time; the first batch is small
+    and its bytes can go out as soon as the query produces rows. With
+    ndjson each row is a JSON object keyed by column name. With
+    geojsonseq each row is a GeoJSON Feature, with the first geometry
+    column as geometry and the other columns as properties.
+
+    An error before the first chunk is raised. Once rows have been sent
+    the response can no longer fail, so a later error ends the stream
+    with an {"error": ...} record instead; a result cut at max_rows ends
+    with {"truncated": true, "row_count": ...}.
+
+    Args:
+        conn: Database connection, held until the stream is closed.
+        sql: Validated SELECT statement.
+        output: "ndjson" or "geojsonseq".
+        max_rows: Rows streamed at most.
+        timeout: Statement timeout in seconds for the DECLARE and each
+            FETCH; None keeps the session's.
+        params: Values for %s or %(name)s placeholders in sql.
+
+    Raises:
+        ValueError: If geojsonseq is requested for a result without a
+            geometry column.
+        QueryTimeoutError: If the statement timeout cancels the query
+            before the first chunk.
+    """
+    start = time.monotonic()
+    geometry_oids = await register_geometry_types(conn)
+    separator = _RECORD_SEPARATOR if output == "geojsonseq" else b""
+    encode: _Encoder | None = None
+    rows = 0
+    truncated = False
+    try:
+        async with timeout_errors(timeout), conn.transaction():
+            await conn.execute("SET TRANSACTION READ ONLY")
+            if timeout is not None:
+                await set_local_timeout(conn, timeout)
+            portal = Portal(conn)
+            await portal.declare(sql, params)
+            async with aclosing(fetch_batches(portal, max_rows + 1)) as batches:
+                async for batch in batches:
+                    if encode is None:
+                        encode = row_encoder(portal, output, geometry_oids)
+                    if len(batch) > max_rows - rows:
+                        truncated = True
+                        del batch[max_rows - rows :]
+                    rows += len(batch)
+                    yield b"".join(map(encode, batch))
+    except (psycopg.DatabaseError, QueryTimeoutError) as exc:
+        if encode is None or conn.broken:
+            raise
+        logger.warning("query_stream_failed", sql=sql[:200], rows=rows, error=str(exc))
+        yield separator + to_json({"error": str(exc)}) + b"\n"
+        return
+
+    if truncated:
+        yield separator + to_json({"truncated": True, "row_count": rows}) + b"\n"
+    logger.info(
+        "query_streamed",
+        sql=sql[:200],
+        output=output,
+        row_count=rows,
+        truncated=truncated,
+        elapsed_seconds=round(time.monotonic() - start, 3),
+    )
+
+
+def row_encoder(
+    portal: Portal, output: StreamOutput, geometry_oids: frozenset[int]
+) -> _Encoder:
+    """Build the per-row encoder once the portal has described its columns.
+
+    Raises:
+        ValueError: For geojsonseq when the result has no geometry column.
+    """
+    columns = portal.columns
+    if output == "ndjson":
+        return lambda row: to_json(dict(zip(columns, row))) + b"\n"
+
+    geometry = next(
+        (i for i, oid in enumerate(portal.type_codes) if oid in geometry_oids), None
+    )
+    if geometry is None:
+        raise ValueError("output='geojsonseq' needs a geometry column in the result.")
+    properties = [(i, name) for i, name in enumerate(columns) if i != geometry]
+
+    def feature(row: list[object]) -> bytes:
+        document = {
+            "type": "Feature",
+            "geometry": row[geometry],
+            "properties": {name: row[i] for i, name in properties},
+        }
+        return _RECORD_SEPARATOR + to_json(document) + b"\n"
+
+    return feature
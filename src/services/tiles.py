@@ -0,0 +1,196 @@
+"""Mapbox Vector Tiles built by PostGIS, with a byte-bounded tile cache."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import psycopg
+import structlog
+from psycopg import sql as pgsql
+
+from src.models.catalog import TableMetadata
+from src.services.cache import LRUCache
+from src.services.query import set_local_timeout, timeout_errors
+from src.services.query_cache import TableVersions, table_versions
+
+logger = structlog.get_logger(__name__)
+
+# Tile extent in integer coordinates and the clipping buffer around it,
+# the PostGIS defaults.
+TILE_EXTENT = 4096
+TILE_BUFFER = 256
+MAX_ZOOM = 30
+MVT_GEOM = "__mvt_geom"
+# Points per envelope side once densified, so that the envelope keeps
+# its shape when transformed to a projected or local SRID.
+ENVELOPE_SEGMENTS = 32
+
+# The tile envelope is transformed to the column's SRID, not the column
+# to Web Mercator, so && can use a spatial index on the column. It is
+# widened by the clipping buffer first, as ST_AsMVTGeom keeps features
+# in the buffer, and densified so that more than its four corners are
+# transformed. The MVT geometry gets a reserved name so a property
+# called geom cannot clash with it.
+TILE_QUERY = """
+WITH tile AS (
+    SELECT ST_TileEnvelope(%(z)s::int, %(x)s::int, %(y)s::int) AS merc,
+           ST_TileEnvelope(
+               %(z)s::int, %(x)s::int, %(y)s::int, margin => {margin}
+           ) AS buffered
+),
+bounds AS (
+    SELECT tile.merc,
+           ST_Transform(
+               ST_Segmentize(
+                   tile.buffered,
+                   (ST_XMax(tile.buffered) - ST_XMin(tile.buffered)) / {segments}
+               ),
+               %(srid)s::int
+           ) AS native
+    FROM tile
+),
+features AS (
+    SELECT ST_AsMVTGeom(
+               ST_Transform(t.{geom}, 3857), bounds.merc, {extent}, {buffer}
+           ) AS {mvt_geom}{properties}
+    FROM {table} AS t, bounds
+    WHERE t.{geom} && bounds.native
+)
+SELECT ST_AsMVT(features.*, %(layer)s, {extent}, {mvt_geom_name}), count(*)
+FROM features
+WHERE {mvt_geom} IS NOT NULL
+"""
+
+@dataclass(frozen=True)
+class Tile:
+    """An encoded vector tile and the number of features in it."""
+
+    data: bytes
+    features: int
+
+
+TileKey = tuple[str, str, str, tuple[str, ...], int, int, int]
+
+
+class TileCache:
+    """LRU+TTL cache of encoded tiles, checked against table versions.
+
+    Entries are dropped once the tile's table is modified, as in the
+    query cache, and evicted by the summed size of the tiles.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self._cache: LRUCache[TileKey, tuple[TableVersions, Tile]] = LRUCache(
+            max_bytes, ttl, sizeof=lambda entry: len(entry[1].data) + 64
+        )
+
+    async def get_or_build(
+        self,
+        conn: psycopg.AsyncConnection,
+        table: TableMetadata,
+        geom_column: str,
+        properties: list[str],
+        z: int,
+        x: int,
+        y: int,
+        timeout: float | None = None,
+    ) -> Tile:
+        """Return a cached tile, building and caching it on a miss."""
+        key = (
+            table.schema_, table.table_name, geom_column, tuple(properties), z, x, y
+        )
+        versions = await table_versions(conn, [(table.schema_, table.table_name)])
+        if versions is not None:
+            entry = self._cache.get(key, validate=lambda e: e[0] == versions)
+            if entry is not None:
+                return entry[1]
+        tile = await build_tile(
+            conn, table, geom_column, properties, z, x, y, timeout
+        )
+        if versions is not None:
+            self._cache.put(key, (versions, tile))
+        return tile
+
+    def stats(self) -> dict[str, object]:
+        """Return occupancy and hit, miss, eviction, and invalidation counters."""
+        return self._cache.stats()
+
+
+def check_tile_coordinates(z: int, x: int, y: int) -> None:
+    """Raise ValueError unless z/x/y address a tile of the Web Mercator grid."""
+    if not 0 <= z <= MAX_ZOOM:
+        raise ValueError(f"Zoom must be between 0 and {MAX_ZOOM}; got {z}.")
+    size = 1 << z
+    if not (0 <= x < size and 0 <= y < size):
+        raise ValueError(
+            f"Tile {z}/{x}/{y} is outside the grid: x and y must be "
+            f"between 0 and {size - 1} at zoom {z}."
+        )
+
+
+async def build_tile(
+    conn: psycopg.AsyncConnection,
+    table: TableMetadata,
+    geom_column: str,
+    properties: list[str],
+    z: int,
+    x: int,
+    y: int,
+    timeout: float | None = None,
+) -> Tile:
+    """Encode the features of one table inside tile z/x/y.
+
+    Geometries are clipped to the tile plus a buffer and snapped to the
+    tile's integer grid by ST_AsMVTGeom; the layer is named after the
+    table.
+
+    Args:
+        conn: Database connection.
+        table: Metadata of an allowed table.
+        geom_column: Geometry column with a known SRID.
+        properties: Columns to carry as feature attributes.
+        z: Zoom level.
+        x: Tile column.
+        y: Tile row, counted from the top as in XYZ tile URLs.
+        timeout: Statement timeout in seconds; None keeps the session's.
+
+    Returns:
+        The encoded tile, empty if no feature intersects it.
+
+    Raises:
+        QueryTimeoutError: If the statement timeout cancels the query.
+    """
+    column = next(c for c in table.columns if c.column_name == geom_column)
+    query = pgsql.SQL(TILE_QUERY).format(
+        geom=pgsql.Identifier(geom_column),
+        table=pgsql.Identifier(table.schema_, table.table_name),
+        properties=pgsql.SQL("").join(
+            pgsql.SQL(", t.{}").format(pgsql.Identifier(name)) for name in properties
+        ),
+        extent=pgsql.Literal(TILE_EXTENT),
+        buffer=pgsql.Literal(TILE_BUFFER),
+        margin=pgsql.Literal(TILE_BUFFER / TILE_EXTENT),
+        segments=pgsql.Literal(ENVELOPE_SEGMENTS),
+        mvt_geom=pgsql.Identifier(MVT_GEOM),
+        mvt_geom_name=pgsql.Literal(MVT_GEOM),
+    )
+    params = {"z": z, "x": x, "y": y, "srid": column.srid, "layer": table.table_name}
+    start = time.monotonic()
+    async with timeout_errors(timeout), conn.transaction():
+        if timeout is not None:
+            await set_local_timeout(conn, timeout)
+        async with conn.cursor() as cur:
+            await cur.execute(query, params)
+            row = await cur.fetchone()
+    assert row is not None
+    tile = Tile(data=bytes(row[0] or b""), features=row[1])
+    logger.info(
+        "tile_built",
+        table=table.table_name,
+        tile=f"{z}/{x}/{y}",
+        features=tile.features,
+        tile_bytes=len(tile.data),
+        elapsed_seconds=round(time.monotonic() - start, 3),
+    )
+    return tile
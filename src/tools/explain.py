@@ -0,0 +1,43 @@
+"""MCP tool for inspecting query plans."""
+
+from __future__ import annotations
+
+import structlog
+
+from src.services.explain import explain_query
+from src.services.portal import Params
+from src.tools.query import check_query_access
+
+logger = structlog.get_logger(__name__)
+
+
+async def explain_tool(
+    sql: str,
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+    analyze: bool = False,
+    timeout: float | None = None,
+    params: Params | None = None,
+) -> dict[str, object]:
+    """Explain a SQL SELECT query.
+
+    Args:
+        sql: SQL SELECT statement to explain.
+        conn: Database connection.
+        schema: Database schema.
+        allowed_tables: List of permitted table names.
+        analyze: Execute the query to report actual rows and timings.
+        timeout: Statement timeout in seconds for analyze.
+        params: Values for %s or %(name)s placeholders in sql.
+
+    Returns:
+        Dict with the JSON plan, total_cost, estimated_rows, spatial index
+        use, sequentially scanned tables, and timings when analyzed.
+    """
+    check_query_access(sql, schema, allowed_tables)
+    logger.info("explain_tool_invoked", sql=sql[:200], analyze=analyze)
+    summary = await explain_query(
+        conn, sql, schema, analyze, timeout, params  # type: ignore[arg-type]
+    )
+    return summary.model_dump(exclude_none=True)
@@ -0,0 +1,154 @@
+"""MCP tool for exporting query results to files."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import structlog
+
+from src.services.export import (
+    BINARY_FORMATS,
+    EXTENSIONS,
+    MEDIA_TYPES,
+    ExportFormat,
+    export_path,
+    export_query,
+)
+from src.services.portal import Params
+from src.tools.query import check_query_access, check_timeout
+
+logger = structlog.get_logger(__name__)
+
+EXPORT_URI_SCHEME = "export://"
+EXPORT_URL_PATH = "/exports/"
+
+# Largest file read_export returns in one resource response; larger
+# ones are downloaded in chunks from EXPORT_URL_PATH.
+RESOURCE_MAX_BYTES = 16 * 1024 * 1024
+
+
+async def export_tool(
+    sql: str,
+    output: ExportFormat,
+    path: str,
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+    export_dir: str,
+    max_bytes: int | None = None,
+    overwrite: bool = False,
+    timeout: float | None = None,
+    max_timeout: float | None = None,
+    params: Params | None = None,
+) -> dict[str, object]:
+    """Check a SELECT and write its rows to a file in the export directory.
+
+    Args:
+        sql: SQL SELECT statement.
+        output: "flatgeobuf", "geojsonseq", "csv" or "arrow".
+        path: File path relative to the export directory; the format's
+            extension is added when it has none.
+        conn: Database connection.
+        schema: Database schema.
+        allowed_tables: Permitted table names.
+        export_dir: Directory exports are written to; empty when
+            exporting is disabled.
+        max_bytes: Size at which an export is abandoned; None for no limit.
+        overwrite: Replace an existing file at path.
+        timeout: Statement timeout in seconds for each FETCH.
+        max_timeout: Largest timeout a caller may request.
+        params: Values for the statement's placeholders.
+
+    Returns:
+        Dict with the file's resource uri, download url, path, format,
+        rows and bytes.
+
+    Raises:
+        ValueError: If exporting is disabled, the query is not an allowed
+            SELECT, or the format, path or timeout is invalid.
+    """
+    if not export_dir:
+        raise ValueError("Export is disabled; set export_dir in the server settings.")
+    check_query_access(sql, schema, allowed_tables)
+    check_timeout(timeout, max_timeout)
+    if output not in EXTENSIONS:
+        raise ValueError(f"format must be one of: {', '.join(EXTENSIONS)}.")
+    target = export_path(Path(export_dir), path, output)
+    exists = (
+        f"File '{path}' already exists in the export directory; pass "
+        f"overwrite=true to replace it."
+    )
+    # Fails fast before the query runs; export_query decides for good
+    # when it moves the finished file into place.
+    if target.exists() and not overwrite:
+        raise ValueError(exists)
+
+    logger.info("export_tool_invoked", sql=sql[:200], format=output, path=path)
+    try:
+        result = await export_query(
+            conn,  # type: ignore[arg-type]
+            sql,
+            target,
+            output,
+            max_bytes,
+            timeout,
+            params,
+            overwrite,
+        )
+    except FileExistsError:
+        raise ValueError(exists) from None
+    relative = result.path.relative_to(Path(export_dir).resolve())
+    return {
+        "uri": EXPORT_URI_SCHEME + relative.as_posix(),
+        "url": EXPORT_URL_PATH + relative.as_posix(),
+        "path": str(result.path),
+        "format": result.format,
+        "rows": result.rows,
+        "bytes": result.size,
+    }
+
+
+def locate_export(export_dir: str, path: str) -> tuple[Path, ExportFormat]:
+    """Find an exported file by its path relative to the export directory.
+
+    Returns:
+        The file's absolute path and the format it was written in.
+
+    Raises:
+        ValueError: If exporting is disabled or path names no exported file.
+    """
+    if not export_dir:
+        raise ValueError("Export is disabled; set export_dir in the server settings.")
+    target = export_path(Path(export_dir), path)
+    output = next((f for f, ext in EXTENSIONS.items() if ext == target.suffix), None)
+    if output is None or not target.is_file():
+        raise ValueError(f"No exported file '{path}'.")
+    return target, output  # type: ignore[return-value]
+
+
+def read_export(export_dir: str, path: str) -> tuple[str | bytes, str]:
+    """Read an exported file for its resource URI.
+
+    Only files up to RESOURCE_MAX_BYTES are read into memory; larger
+    ones are served in chunks over HTTP (see locate_export).
+
+    Returns:
+        The file's content, as text unless it is FlatGeobuf or Arrow, and
+        its media type.
+
+    Raises:
+        ValueError: If exporting is disabled, path names no exported file,
+            or the file is larger than RESOURCE_MAX_BYTES.
+    """
+    target, output = locate_export(export_dir, path)
+    size = target.stat().st_size
+    if size > RESOURCE_MAX_BYTES:
+        raise ValueError(
+            f"Exported file '{path}' is {size} bytes, more than the "
+            f"{RESOURCE_MAX_BYTES} returned as a resource; download it from "
+            f"{EXPORT_URL_PATH}{path} instead."
+        )
+    data = target.read_bytes()
+    if output in BINARY_FORMATS:
+        return data, MEDIA_TYPES[output]
+    return data.decode(), MEDIA_TYPES[output]
@@ -0,0 +1,98 @@
+"""MCP tool for the spatial extent of a table."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+
+import structlog
+
+from src.services.access_control import AccessDeniedError, is_table_allowed
+from src.services.catalog import TableNotFoundError, get_table
+from src.services.catalog_cache import CatalogCache
+from src.services.extent import ExtentCache, estimated_extent, exact_extent
+from src.services.schema import geometry_column
+
+logger = structlog.get_logger(__name__)
+
+
+async def spatial_extent_tool(
+    table_name: str,
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+    catalog: CatalogCache | None = None,
+    extents: ExtentCache | None = None,
+    geom_column: str | None = None,
+    exact: bool = False,
+    timeout: float | None = None,
+) -> dict[str, object]:
+    """Report the extent, row count and geometry types of a table.
+
+    Args:
+        table_name: Table to measure.
+        conn: Database connection.
+        schema: Database schema.
+        allowed_tables: Permitted table names.
+        catalog: Cache to serve table metadata from.
+        extents: If given, exact results are served from and stored in
+            this cache while the table is unchanged.
+        geom_column: Geometry column to measure; None for the first one.
+        exact: Scan the table instead of reading planner statistics.
+        timeout: Statement timeout in seconds for the exact scan.
+
+    Returns:
+        Dict with the geometry column, its SRID, extent, rows,
+        null_fraction, geometry_types, exact, and the declared type of
+        every geometry column of the table.
+
+    Raises:
+        ValueError: If the table is not allowed or has no such geometry
+            column.
+    """
+    if not is_table_allowed(table_name, schema, allowed_tables):
+        raise AccessDeniedError(
+            f"Access denied: table '{table_name}' is not in the allowed tables list."
+        )
+    table = await get_table(conn, schema, table_name, catalog)  # type: ignore[arg-type]
+    if table is None:
+        raise TableNotFoundError(
+            f"Table '{table_name}' does not exist in schema '{schema}'."
+        )
+    column = geometry_column(table, geom_column)
+
+    logger.info("spatial_extent_tool_invoked", table_name=table_name, exact=exact)
+    if not exact:
+        result = await estimated_extent(
+            conn, table, column.column_name  # type: ignore[arg-type]
+        )
+    elif extents is not None:
+        result = await extents.get_or_compute(
+            conn, table, column.column_name, timeout  # type: ignore[arg-type]
+        )
+    else:
+        result = await exact_extent(
+            conn, table, column.column_name, timeout  # type: ignore[arg-type]
+        )
+
+    response: dict[str, object] = {
+        "table_name": table.table_name,
+        "geom_column": column.column_name,
+        "srid": column.srid,
+        **asdict(result),
+        "geometry_columns": [
+            {
+                "column_name": c.column_name,
+                "geometry_type": c.geometry_type,
+                "srid": c.srid,
+                "coord_dimension": c.coord_dimension,
+            }
+            for c in table.columns
+            if c.geometry_type is not None
+        ],
+    }
+    if result.extent is None and not exact and result.rows is None:
+        response["message"] = (
+            f"Table '{table_name}' has no planner statistics yet. Run ANALYZE "
+            f"on it, or call spatial_extent with exact=true to scan it."
+        )
+    return response
@@ -0,0 +1,94 @@
+"""MCP tool for fetching the features of a table inside a bounding box."""
+
+from __future__ import annotations
+
+import structlog
+
+from src.services.access_control import AccessDeniedError, is_table_allowed
+from src.services.catalog import TableNotFoundError, get_table
+from src.services.catalog_cache import CatalogCache
+from src.services.features import bbox_query, check_bbox, pixel_size
+from src.services.query import execute_feature_collection
+from src.services.schema import spatial_layer
+
+logger = structlog.get_logger(__name__)
+
+
+async def features_in_bbox_tool(
+    table_name: str,
+    minx: float,
+    miny: float,
+    maxx: float,
+    maxy: float,
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+    catalog: CatalogCache | None = None,
+    srid: int = 4326,
+    zoom: int | None = None,
+    columns: list[str] | None = None,
+    geom_column: str | None = None,
+    row_limit: int = 1000,
+    timeout: float | None = None,
+) -> str:
+    """Fetch the features of a table that intersect a bounding box.
+
+    Args:
+        table_name: Table to read.
+        minx: West edge of the box.
+        miny: South edge of the box.
+        maxx: East edge of the box.
+        maxy: North edge of the box.
+        conn: Database connection.
+        schema: Database schema.
+        allowed_tables: Permitted table names.
+        catalog: Cache to serve table metadata from.
+        srid: SRID of the box coordinates.
+        zoom: Web Mercator zoom level the features are displayed at;
+            geometries are simplified to one pixel there. None keeps full
+            resolution.
+        columns: Attribute columns; None for every non-geometry column.
+        geom_column: Geometry column; None for the table's first.
+        row_limit: Maximum features to return.
+        timeout: Statement timeout in seconds; None keeps the session's.
+
+    Returns:
+        The features as a serialized GeoJSON FeatureCollection.
+
+    Raises:
+        ValueError: If the table is not allowed or lacks the columns, or
+            the box or zoom is invalid.
+    """
+    if not is_table_allowed(table_name, schema, allowed_tables):
+        raise AccessDeniedError(
+            f"Access denied: table '{table_name}' is not in the allowed tables list."
+        )
+    check_bbox(minx, miny, maxx, maxy)
+    params: dict[str, object] = {
+        "minx": minx,
+        "miny": miny,
+        "maxx": maxx,
+        "maxy": maxy,
+        "srid": srid,
+    }
+    if zoom is not None:
+        params["pixel_metres"] = pixel_size(zoom)
+
+    table = await get_table(conn, schema, table_name, catalog)  # type: ignore[arg-type]
+    if table is None:
+        raise TableNotFoundError(
+            f"Table '{table_name}' does not exist in schema '{schema}'."
+        )
+    column, attributes = spatial_layer(table, geom_column, columns)
+
+    logger.info(
+        "features_in_bbox_tool_invoked",
+        table_name=table_name,
+        bbox=[minx, miny, maxx, maxy],
+        srid=srid,
+        zoom=zoom,
+    )
+    sql = bbox_query(conn, table, column, attributes, zoom)  # type: ignore[arg-type]
+    return await execute_feature_collection(
+        conn, sql, row_limit, timeout, params  # type: ignore[arg-type]
+    )
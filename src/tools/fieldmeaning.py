@@ -6,7 +6,10 @@ import structlog
 
 from src.models.fieldmeaning import FieldMeaningResponse
 from src.services.access_control import is_table_allowed
-from src.services.fieldmeaning import check_table_exists, get_field_meanings
+from src.services.catalog_cache import CatalogCache
+from src.services.catalog import TableNotFoundError, get_table
+from src.services.fieldmeaning import field_meanings
+from src.services.metrics import phase
 
 logger = structlog.get_logger(__name__)
 
@@ -31,6 +34,7 @@ async def fieldmeaning_tool(
     conn: object,
     schema: str,
     allowed_tables: list[str],
+    catalog: CatalogCache | None = None,
 ) -> dict[str, object]:
     """Get field meanings (column comments) for a table.
 
@@ -39,19 +43,23 @@ async def fieldmeaning_tool(
         conn: Database connection.
         schema: Database schema.
         allowed_tables: Permitted table names.
+        catalog: Cache to serve metadata from while the schema is unchanged.
 
     Returns:
         Dict with table, schema, and columns list.
     """
-    validate_table_name(table_name)
+    with phase("validation"):
+        validate_table_name(table_name)
 
-    exists = await check_table_exists(conn, schema, table_name)  # type: ignore[arg-type]
-    if not exists:
-        raise ValueError(f"Table '{table_name}' does not exist in schema '{schema}'.")
+    table = await get_table(conn, schema, table_name, catalog)  # type: ignore[arg-type]
+    if table is None:
+        raise TableNotFoundError(
+            f"Table '{table_name}' does not exist in schema '{schema}'."
+        )
 
     logger.info("fieldmeaning_tool_invoked", table_name=table_name)
 
-    entries = await get_field_meanings(conn, schema, table_name)  # type: ignore[arg-type]
+    entries = field_meanings(table)
 
     logger.info(
         "fieldmeaning_result",
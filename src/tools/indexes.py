@@ -0,0 +1,33 @@
+"""MCP tool for index advice on the allowed tables."""
+
+from __future__ import annotations
+
+import structlog
+
+from src.services.indexes import index_report
+
+logger = structlog.get_logger(__name__)
+
+
+async def index_report_tool(
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+) -> dict[str, object]:
+    """Report spatial index coverage, index usage and bloat of the allowed tables.
+
+    Args:
+        conn: Database connection.
+        schema: Database schema.
+        allowed_tables: Permitted table names; every one in schema is
+            reported on.
+
+    Returns:
+        Dict with schema, stats_since and per-table scan counts, geometry
+        columns, indexes and findings.
+    """
+    prefix = f"{schema}."
+    names = [t[len(prefix) :] for t in allowed_tables if t.startswith(prefix)]
+    logger.info("index_report_tool_invoked", tables=len(names))
+    report = await index_report(conn, schema, names)  # type: ignore[arg-type]
+    return report.model_dump()
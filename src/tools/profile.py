@@ -0,0 +1,53 @@
+"""MCP tool for statistics-based table profiles."""
+
+from __future__ import annotations
+
+import structlog
+
+from src.services.access_control import AccessDeniedError, is_table_allowed
+from src.services.catalog import TableNotFoundError, get_table
+from src.services.catalog_cache import CatalogCache
+from src.services.profile import profile_table
+
+logger = structlog.get_logger(__name__)
+
+
+async def profile_table_tool(
+    table_name: str,
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+    catalog: CatalogCache | None = None,
+) -> dict[str, object]:
+    """Profile the columns of a table from planner statistics.
+
+    Args:
+        table_name: Table to profile.
+        conn: Database connection.
+        schema: Database schema.
+        allowed_tables: Permitted table names.
+        catalog: Cache to serve column types and descriptions from.
+
+    Returns:
+        Dict with table, schema, estimated_rows, analyzed, and per-column
+        descriptions and statistics.
+    """
+    if not is_table_allowed(table_name, schema, allowed_tables):
+        raise AccessDeniedError(
+            f"Access denied: table '{table_name}' is not in the allowed tables list."
+        )
+    table = await get_table(conn, schema, table_name, catalog)  # type: ignore[arg-type]
+    if table is None:
+        raise TableNotFoundError(
+            f"Table '{table_name}' does not exist in schema '{schema}'."
+        )
+
+    logger.info("profile_table_tool_invoked", table_name=table_name)
+    profile = await profile_table(conn, table)  # type: ignore[arg-type]
+    response = profile.model_dump()
+    if not profile.analyzed:
+        response["message"] = (
+            f"Table '{table_name}' has no statistics yet; run ANALYZE on it "
+            f"to fill them in."
+        )
+    return response
@@ -2,27 +2,41 @@
 
 from __future__ import annotations
 
-import re
+from collections.abc import AsyncGenerator
+from typing import Literal
 
+import psycopg
 import structlog
 
-from src.services.access_control import is_table_allowed
-from src.services.query import execute_query
+from src.models.query import BatchStatement, QueryResult
+from src.services.access_control import AccessDeniedError, is_table_allowed
+from src.services.columnar import to_columnar
+from src.services.explain import CostLimits, check_cost
+from src.services.metrics import phase, record_rows
+from src.services.geometry import check_precision, reduce_coordinates
+from src.services.pagination import CursorStore
+from src.services.portal import Params
+from src.services.prepared import PreparedStatements
+from src.services.query_cache import CachedValue, QueryCache
+from src.services.query import (
+    Progress,
+    execute_batch,
+    execute_feature_collection,
+    execute_paged_query,
+    execute_query,
+    fetch_next_page,
+)
+from src.services.sql_parser import parse_sql
+from src.services.stream import StreamOutput, stream_query
 from src.services.sql_validator import validate_select_only
 
 logger = structlog.get_logger(__name__)
 
-# Simple regex to extract table names from SQL
-TABLE_NAME_PATTERN = re.compile(
-    r'\bFROM\s+((?:\w+\.)\w+|\w+)|\bJOIN\s+((?:\w+\.)\w+|\w+)',
-    re.IGNORECASE,
-)
+QueryOutput = Literal["rows", "columnar", "featurecollection"]
+PageOutput = Literal["rows", "columnar"]
 
-# Extract CTE aliases: WITH name AS, name AS
-CTE_ALIAS_PATTERN = re.compile(
-    r'\bWITH\s+(\w+)\s+AS\b|\b,\s*(\w+)\s+AS\b',
-    re.IGNORECASE,
-)
+# Statements accepted in one query_batch call.
+MAX_BATCH_STATEMENTS = 50
 
 
 def extract_table_names(sql: str) -> list[str]:
@@ -31,18 +45,31 @@ def extract_table_names(sql: str) -> list[str]:
     CTE aliases are excluded since they are not actual tables.
     Handles schema-qualified names like schema.table → returns 'table'.
     """
-    cte_matches = CTE_ALIAS_PATTERN.findall(sql)
-    cte_aliases = {m[0] or m[1] for m in cte_matches if m[0] or m[1]}
-
-    matches = TABLE_NAME_PATTERN.findall(sql)
-    tables = []
-    for match in matches:
-        name = match[0] or match[1]
-        if name and name not in cte_aliases:
-            # Strip schema qualifier: "remez1.polygons" → "polygons"
-            table_only = name.split('.')[-1]
-            tables.append(table_only)
-    return tables
+    return [relation.name for relation in parse_sql(sql).relations]
+
+
+def check_query_access(sql: str, schema: str, allowed_tables: list[str]) -> list[str]:
+    """Validate a SELECT and check every table it reads is allowed.
+
+    Unqualified names are checked against the configured schema and
+    qualified names against their own.
+
+    Returns:
+        The referenced table names, without schema.
+
+    Raises:
+        ValueError: If the statement is not a SELECT or reads a table
+            outside the allowed list.
+    """
+    parsed = validate_select_only(sql)
+    for relation in parsed.relations:
+        relation_schema = relation.schema or schema
+        if not is_table_allowed(relation.name, relation_schema, allowed_tables):
+            raise AccessDeniedError(
+                f"Access denied: table '{relation}' is not in the allowed tables list."
+            )
+    return [relation.name for relation in parsed.relations]
+
 
 async def query_tool(
     sql: str,
@@ -50,7 +77,19 @@ async def query_tool(
     schema: str,
     allowed_tables: list[str],
     row_limit: int = 1000,
-) -> dict[str, object]:
+    cursors: CursorStore | None = None,
+    output: QueryOutput = "rows",
+    dictionary_encode: bool = False,
+    cache: QueryCache | None = None,
+    timeout: float | None = None,
+    max_timeout: float | None = None,
+    limits: CostLimits | None = None,
+    params: Params | None = None,
+    prepared: PreparedStatements | None = None,
+    precision: int | None = None,
+    quantize: float | None = None,
+    progress: Progress | None = None,
+) -> dict[str, object] | str:
     """Execute a SQL SELECT query.
 
     Args:
@@ -59,28 +98,375 @@ async def query_tool(
         schema: Database schema.
         allowed_tables: List of permitted table names.
         row_limit: Maximum rows to return.
+        cursors: If given, a truncated result keeps its cursor open here
+            and the response carries a next_token for query_next.
+        output: "rows" for columns and row lists, "columnar" for one
+            value array per column, or "featurecollection" for a GeoJSON
+            FeatureCollection built by PostGIS.
+        dictionary_encode: With output="columnar", dictionary-encode
+            low-cardinality text columns.
+        cache: If given, non-paginated results are served from and stored
+            in this cache while the referenced tables are unchanged.
+        timeout: Statement timeout in seconds; None keeps the session's.
+        max_timeout: Largest timeout a caller may request; None for no cap.
+        limits: If given, the query is planned first and rejected, or
+            answered with a warning, when its estimates exceed these.
+        params: Values for %s or %(name)s placeholders in sql.
+        prepared: If given, statements run often on a connection are
+            switched to prepared statements there. Paginated queries
+            always use a cursor.
+        precision: Decimal digits kept per geometry coordinate; geometries
+            are then encoded as GeoJSON by the database.
+        quantize: Grid size, in the geometry's units, that geometries are
+            snapped to in the database before transfer.
+        progress: Awaited with the rows fetched so far while a
+            non-paginated result is read from the database.
 
     Returns:
-        Dict with columns, rows, row_count, and truncated flag.
+        Dict with columns, rows (or data for columnar), row_count, and
+        truncated flag, or the serialized FeatureCollection for
+        output="featurecollection". A preflight warning is added as
+        "warning" (logged only for FeatureCollections).
     """
-    validate_select_only(sql)
+    with phase("validation"):
+        check_query_access(sql, schema, allowed_tables)
+        check_timeout(timeout, max_timeout)
+        check_precision(precision, quantize)
+    if output == "featurecollection" and cursors is not None:
+        raise ValueError("Pagination is not supported with output='featurecollection'.")
+
+    logger.info("query_tool_invoked", sql=sql[:200], output=output)
 
-    referenced_tables = extract_table_names(sql)
-    for table in referenced_tables:
-        if not is_table_allowed(table, schema, allowed_tables):
-            raise ValueError(
-                f"Access denied: table '{table}' is not in the allowed tables list."
+    warning = None
+    if limits is not None:
+        warning = await check_cost(
+            conn, sql, schema, limits, params  # type: ignore[arg-type]
+        )
+
+    if cursors is None:
+        value = await _execute_cached(
+            sql,
+            conn,
+            row_limit,
+            output,
+            cache,
+            schema,
+            timeout,
+            params,
+            prepared,
+            precision,
+            quantize,
+            progress,
+        )
+        if isinstance(value, str):
+            return value
+        record_rows(value.row_count, value.truncated)
+        with phase("conversion"):
+            response = _build_response(
+                value, row_limit, None, output, dictionary_encode
+            )
+    else:
+        if precision is not None or quantize is not None:
+            sql = await reduce_coordinates(
+                conn, sql, params, precision, quantize  # type: ignore[arg-type]
             )
+        result, token = await execute_paged_query(
+            conn, sql, row_limit, cursors, timeout, params  # type: ignore[arg-type]
+        )
+        record_rows(result.row_count, result.truncated)
+        with phase("conversion"):
+            response = await _build_page(
+                result, row_limit, token, cursors, output, dictionary_encode,
+                release=False,
+            )
+    if warning is not None:
+        response["warning"] = warning
+    return response
+
+
+def open_query_stream(
+    sql: str,
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+    output: StreamOutput = "ndjson",
+    max_rows: int = 1_000_000,
+    timeout: float | None = None,
+    max_timeout: float | None = None,
+    params: Params | None = None,
+) -> AsyncGenerator[bytes, None]:
+    """Check a SELECT and return the stream of its encoded rows.
+
+    The checks run here, before the first chunk is requested, so that
+    a refused query can still be answered with an error status.
+
+    Args:
+        sql: SQL SELECT statement.
+        conn: Database connection, held until the stream is closed.
+        schema: Database schema.
+        allowed_tables: Permitted table names.
+        output: "ndjson" or "geojsonseq".
+        max_rows: Rows streamed at most.
+        timeout: Statement timeout in seconds for each FETCH.
+        max_timeout: Largest timeout a caller may request.
+        params: Values for the statement's placeholders.
+
+    Raises:
+        ValueError: If the query is not an allowed SELECT, or the timeout
+            or output is invalid.
+    """
+    check_query_access(sql, schema, allowed_tables)
+    check_timeout(timeout, max_timeout)
+    if output not in ("ndjson", "geojsonseq"):
+        raise ValueError("output must be 'ndjson' or 'geojsonseq'.")
+    logger.info("query_stream_opened", output=output, max_rows=max_rows)
+    return stream_query(
+        conn, sql, output, max_rows, timeout, params  # type: ignore[arg-type]
+    )
+
+
+async def query_batch_tool(
+    statements: list[str | BatchStatement],
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+    row_limit: int = 1000,
+    timeout: float | None = None,
+    max_timeout: float | None = None,
+    limits: CostLimits | None = None,
+) -> dict[str, object]:
+    """Execute several SQL SELECT queries in one database round trip.
+
+    Each statement is validated and access-checked on its own; one that
+    is refused or fails gets an error entry and does not stop the others.
+
+    Args:
+        statements: SQL texts, or BatchStatements carrying params.
+        conn: Database connection.
+        schema: Database schema.
+        allowed_tables: List of permitted table names.
+        row_limit: Maximum rows to return per statement.
+        timeout: Statement timeout in seconds for each statement.
+        max_timeout: Largest timeout a caller may request; None for no cap.
+        limits: If given, each statement goes through the cost preflight
+            first, with one planning round trip per statement.
+
+    Returns:
+        Dict with one entry per statement in results (the query response,
+        or {"error": ...}), plus statement_count and error_count.
+    """
+    if not statements:
+        raise ValueError("statements must contain at least one SELECT.")
+    if len(statements) > MAX_BATCH_STATEMENTS:
+        raise ValueError(
+            f"A batch may contain at most {MAX_BATCH_STATEMENTS} statements; "
+            f"received {len(statements)}."
+        )
+    check_timeout(timeout, max_timeout)
+    batch = [
+        BatchStatement(sql=s) if isinstance(s, str) else s for s in statements
+    ]
+    logger.info("query_batch_tool_invoked", statements=len(batch))
 
-    logger.info("query_tool_invoked", sql=sql[:200])
+    results: list[dict[str, object]] = [{} for _ in batch]
+    runnable: list[int] = []
+    for i, statement in enumerate(batch):
+        try:
+            check_query_access(statement.sql, schema, allowed_tables)
+            if limits is not None:
+                warning = await check_cost(
+                    conn,  # type: ignore[arg-type]
+                    statement.sql,
+                    schema,
+                    limits,
+                    statement.params,
+                )
+                if warning is not None:
+                    results[i]["warning"] = warning
+        except (ValueError, psycopg.Error) as exc:
+            results[i] = {"error": str(exc)}
+        else:
+            runnable.append(i)
 
-    result = await execute_query(conn, sql, row_limit)  # type: ignore[arg-type]
-    response: dict[str, object] = {
-        "columns": result.columns,
-        "rows": result.rows,
-        "row_count": result.row_count,
+    outcomes = (
+        await execute_batch(
+            conn,  # type: ignore[arg-type]
+            [(batch[i].sql, batch[i].params) for i in runnable],
+            row_limit,
+            timeout,
+        )
+        if runnable
+        else []
+    )
+    for i, outcome in zip(runnable, outcomes):
+        if isinstance(outcome, Exception):
+            results[i] = {"error": str(outcome)}
+        else:
+            results[i] = {**_build_response(outcome, row_limit, None), **results[i]}
+    return {
+        "results": results,
+        "statement_count": len(batch),
+        "error_count": sum("error" in r for r in results),
     }
+
+
+def check_timeout(timeout: float | None, max_timeout: float | None) -> None:
+    """Raise ValueError for a non-positive timeout or one above max_timeout."""
+    if timeout is not None and timeout <= 0:
+        raise ValueError("timeout must be a positive number of seconds.")
+    if timeout is not None and max_timeout and timeout > max_timeout:
+        raise ValueError(
+            f"timeout must not exceed the server maximum of {max_timeout:g} seconds."
+        )
+
+
+async def _execute_cached(
+    sql: str,
+    conn: object,
+    row_limit: int,
+    output: QueryOutput,
+    cache: QueryCache | None,
+    schema: str,
+    timeout: float | None = None,
+    params: Params | None = None,
+    prepared: PreparedStatements | None = None,
+    precision: int | None = None,
+    quantize: float | None = None,
+    progress: Progress | None = None,
+) -> CachedValue:
+    """Run a non-paginated query, going through the result cache if enabled."""
+    # Rows and columnar share one cached QueryResult.
+    kind = "featurecollection" if output == "featurecollection" else "rows"
+    if precision is not None or quantize is not None:
+        kind = f"{kind}:{precision}:{quantize}"
+    versions = None
+    if cache is not None:
+        key = QueryCache.key(sql, row_limit, kind, params)
+        parsed = parse_sql(sql)
+        tables = [(r.schema or schema, r.name) for r in parsed.relations]
+        cached, versions = await cache.lookup(
+            conn, key, tables, parsed.functions  # type: ignore[arg-type]
+        )
+        if cached is not None:
+            return cached
+
+    # The row limit is part of the statement text, so it is part of the shape.
+    prepare = (
+        prepared.should_prepare(conn, (sql, row_limit, kind))  # type: ignore[arg-type]
+        if prepared is not None
+        else False
+    )
+    # A FeatureCollection is encoded by ST_AsGeoJSON, which takes the
+    # precision itself; other output needs the geometry columns rewritten.
+    featurecollection = output == "featurecollection"
+    if quantize is not None or (precision is not None and not featurecollection):
+        sql = await reduce_coordinates(
+            conn,  # type: ignore[arg-type]
+            sql,
+            params,
+            None if featurecollection else precision,
+            quantize,
+        )
+    value: CachedValue
+    if featurecollection:
+        value = await execute_feature_collection(
+            conn,  # type: ignore[arg-type]
+            sql,
+            row_limit,
+            timeout,
+            params,
+            prepare,
+            precision,
+        )
+    else:
+        value = await execute_query(
+            conn,  # type: ignore[arg-type]
+            sql,
+            row_limit,
+            timeout=timeout,
+            params=params,
+            prepare=prepare,
+            progress=progress,
+        )
+    if cache is not None and versions is not None:
+        cache.store(key, versions, value)
+    return value
+
+
+async def query_next_tool(
+    token: str,
+    cursors: CursorStore,
+    row_limit: int | None = None,
+    output: PageOutput = "rows",
+    dictionary_encode: bool = False,
+) -> dict[str, object]:
+    """Fetch the next page of a paginated query.
+
+    Args:
+        token: Continuation token from a previous query or query_next response.
+        cursors: Store holding the open cursor.
+        row_limit: Rows per page; defaults to the original query's limit.
+        output: "rows" or "columnar", as for query_tool.
+        dictionary_encode: With output="columnar", dictionary-encode
+            low-cardinality text columns.
+
+    Returns:
+        Dict with columns, rows (or data), row_count, and next_token while
+        rows remain.
+    """
+    logger.info("query_next_tool_invoked", row_limit=row_limit, output=output)
+    result, next_token = await fetch_next_page(cursors, token, row_limit)
+    record_rows(result.row_count, result.truncated)
+    with phase("conversion"):
+        return await _build_page(
+            result, result.row_count, next_token, cursors, output, dictionary_encode
+        )
+
+
+async def _build_page(
+    result: QueryResult,
+    row_limit: int,
+    token: str | None,
+    cursors: CursorStore,
+    output: QueryOutput,
+    dictionary_encode: bool,
+    release: bool = True,
+) -> dict[str, object]:
+    """Build a page's response, closing its cursor if that fails.
+
+    The caller never sees the token of a page it could not be sent, such
+    as columnar output of duplicate column names, so the cursor would
+    otherwise pin its connection until the TTL. release is as for
+    CursorStore.close.
+    """
+    try:
+        return _build_response(result, row_limit, token, output, dictionary_encode)
+    except BaseException:
+        if token is not None:
+            await cursors.discard(token, release)
+        raise
+
+
+def _build_response(
+    result: QueryResult,
+    row_limit: int,
+    token: str | None,
+    output: QueryOutput = "rows",
+    dictionary_encode: bool = False,
+) -> dict[str, object]:
+    response: dict[str, object] = {"columns": result.columns}
+    if output == "columnar":
+        response["data"] = to_columnar(result, dictionary_encode)
+    else:
+        response["rows"] = result.rows
+    response["row_count"] = result.row_count
     if result.truncated:
         response["truncated"] = True
         response["message"] = f"Results truncated to {row_limit} rows."
+    if token is not None:
+        response["next_token"] = token
+        response["message"] = (
+            f"Results truncated to {row_limit} rows. "
+            f"Call query_next with next_token for the next page."
+        )
     return response
@@ -4,10 +4,12 @@ from __future__ import annotations
 
 import structlog
 
-from src.services.access_control import is_table_allowed
-from src.services.schema import describe_table as _describe_table
+from src.services.access_control import AccessDeniedError, is_table_allowed
+from src.services.catalog import TableNotFoundError, get_table
+from src.services.catalog_cache import CatalogCache
+from src.services.metrics import phase
+from src.services.schema import describe_columns
 from src.services.schema import list_tables as _list_tables
-from src.services.fieldmeaning import check_table_exists
 
 logger = structlog.get_logger(__name__)
 
@@ -16,13 +18,14 @@ async def list_tables_tool(
     conn: object,
     schema: str,
     allowed_tables: list[str],
+    catalog: CatalogCache | None = None,
 ) -> list[dict[str, object]]:
     """List available tables in the database.
 
     Only returns tables that are in the allowed tables list.
     """
     logger.info("list_tables_tool_invoked")
-    tables = await _list_tables(conn, schema, allowed_tables)  # type: ignore[arg-type]
+    tables = await _list_tables(conn, schema, allowed_tables, catalog)  # type: ignore[arg-type]
     logger.info("list_tables_result", table_count=len(tables))
     return tables
 
@@ -32,6 +35,7 @@ async def describe_table_tool(
     conn: object,
     schema: str,
     allowed_tables: list[str],
+    catalog: CatalogCache | None = None,
 ) -> list[dict[str, object]]:
     """Describe columns of a table.
 
@@ -40,20 +44,25 @@ async def describe_table_tool(
         conn: Database connection.
         schema: Database schema.
         allowed_tables: Permitted table names.
+        catalog: Cache to serve metadata from while the schema is unchanged.
 
     Returns:
         List of column details.
     """
-    if not is_table_allowed(table_name, schema, allowed_tables):
-        raise ValueError(
-            f"Access denied: table '{table_name}' is not in the allowed tables list."
-        )
+    with phase("validation"):
+        if not is_table_allowed(table_name, schema, allowed_tables):
+            raise AccessDeniedError(
+                f"Access denied: table '{table_name}' is not in the allowed tables "
+                f"list."
+            )
 
-    exists = await check_table_exists(conn, schema, table_name)  # type: ignore[arg-type]
-    if not exists:
-        raise ValueError(f"Table '{table_name}' does not exist in schema '{schema}'.")
+    table = await get_table(conn, schema, table_name, catalog)  # type: ignore[arg-type]
+    if table is None:
+        raise TableNotFoundError(
+            f"Table '{table_name}' does not exist in schema '{schema}'."
+        )
 
     logger.info("describe_table_tool_invoked", table_name=table_name)
-    columns = await _describe_table(conn, schema, table_name)  # type: ignore[arg-type]
+    columns = describe_columns(table)
     logger.info("describe_table_result", table_name=table_name, column_count=len(columns))
     return columns
@@ -0,0 +1,137 @@
+"""MCP tool for Mapbox Vector Tiles."""
+
+from __future__ import annotations
+
+import base64
+
+import structlog
+
+from src.services.access_control import AccessDeniedError, is_table_allowed
+from src.services.catalog import TableNotFoundError, get_table
+from src.services.catalog_cache import CatalogCache
+from src.services.schema import spatial_layer
+from src.services.tiles import Tile, TileCache, build_tile, check_tile_coordinates
+
+logger = structlog.get_logger(__name__)
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+async def get_tile(
+    table_name: str,
+    z: int,
+    x: int,
+    y: int,
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+    catalog: CatalogCache | None = None,
+    tiles: TileCache | None = None,
+    columns: list[str] | None = None,
+    geom_column: str | None = None,
+    timeout: float | None = None,
+) -> Tile:
+    """Build or look up one vector tile of an allowed table.
+
+    Args:
+        table_name: Table to render.
+        z: Zoom level.
+        x: Tile column.
+        y: Tile row, counted from the top.
+        conn: Database connection.
+        schema: Database schema.
+        allowed_tables: Permitted table names.
+        catalog: Cache to serve table metadata from.
+        tiles: If given, tiles are served from and stored in this cache
+            while the table is unchanged.
+        columns: Feature attributes; None for every non-geometry column.
+        geom_column: Geometry column to render; None for the first one.
+        timeout: Statement timeout in seconds; None keeps the session's.
+
+    Raises:
+        ValueError: If the table is not allowed or has no usable geometry
+            column, a column does not exist, or z/x/y is off the grid.
+    """
+    if not is_table_allowed(table_name, schema, allowed_tables):
+        raise AccessDeniedError(
+            f"Access denied: table '{table_name}' is not in the allowed tables list."
+        )
+    check_tile_coordinates(z, x, y)
+    table = await get_table(conn, schema, table_name, catalog)  # type: ignore[arg-type]
+    if table is None:
+        raise TableNotFoundError(
+            f"Table '{table_name}' does not exist in schema '{schema}'."
+        )
+
+    column, properties = spatial_layer(table, geom_column, columns)
+
+    if tiles is not None:
+        return await tiles.get_or_build(
+            conn,  # type: ignore[arg-type]
+            table,
+            column.column_name,
+            properties,
+            z,
+            x,
+            y,
+            timeout,
+        )
+    return await build_tile(
+        conn,  # type: ignore[arg-type]
+        table,
+        column.column_name,
+        properties,
+        z,
+        x,
+        y,
+        timeout,
+    )
+
+
+async def tile_tool(
+    table_name: str,
+    z: int,
+    x: int,
+    y: int,
+    conn: object,
+    schema: str,
+    allowed_tables: list[str],
+    catalog: CatalogCache | None = None,
+    tiles: TileCache | None = None,
+    columns: list[str] | None = None,
+    geom_column: str | None = None,
+    timeout: float | None = None,
+) -> dict[str, object]:
+    """Build one vector tile and return it base64-encoded.
+
+    Takes the arguments of get_tile.
+
+    Returns:
+        Dict with the tile address, layer name, feature count, size in
+        bytes, media type, and the tile as base64 in data.
+    """
+    logger.info("tile_tool_invoked", table_name=table_name, tile=f"{z}/{x}/{y}")
+    tile = await get_tile(
+        table_name,
+        z,
+        x,
+        y,
+        conn,
+        schema,
+        allowed_tables,
+        catalog,
+        tiles,
+        columns,
+        geom_column,
+        timeout,
+    )
+    return {
+        "z": z,
+        "x": x,
+        "y": y,
+        "layer": table_name,
+        "features": tile.features,
+        "bytes": len(tile.data),
+        "media_type": MVT_MEDIA_TYPE,
+        "data": base64.b64encode(tile.data).decode("ascii"),
+    }
@@ -21,7 +21,7 @@ def db_settings():
 @pytest.fixture(scope="session")
 def test_settings(db_settings):
     """Settings with test tables added to allowed_tables."""
-    test_tables_list = ["test_parcels", "test_buildings"]
+    test_tables_list = ["test_parcels", "test_buildings", "test_parcel_names"]
     combined = list(set(db_settings.allowed_tables + test_tables_list))
     return Settings(
         host=db_settings.host,
@@ -125,6 +125,14 @@ async def test_tables(db_connection):
         "COMMENT ON COLUMN test_buildings.location IS 'Building centroid'"
     )
 
+    await conn.execute("""
+        CREATE OR REPLACE VIEW test_parcel_names AS
+            SELECT gid, name FROM test_parcels
+    """)
+    await conn.execute(
+        "COMMENT ON COLUMN test_parcel_names.name IS 'Parcel name'"
+    )
+
     await conn.execute("""
         CREATE TABLE IF NOT EXISTS test_restricted (
             id integer PRIMARY KEY,
@@ -160,6 +168,7 @@ async def test_tables(db_connection):
     yield
 
     # Teardown
+    await conn.execute("DROP VIEW IF EXISTS test_parcel_names")
     await conn.execute("DROP TABLE IF EXISTS test_restricted")
     await conn.execute("DROP TABLE IF EXISTS test_buildings")
     await conn.execute("DROP TABLE IF EXISTS test_parcels")
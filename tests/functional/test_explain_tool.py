@@ -0,0 +1,96 @@
+"""Functional tests for the explain MCP tool and the query preflight."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastmcp.exceptions import ToolError
+
+
+pytestmark = pytest.mark.functional
+
+
+@pytest.mark.usefixtures("test_tables")
+class TestExplainTool:
+    """Tests for the 'explain' MCP tool via MCP client."""
+
+    async def test_reports_estimates_and_plan(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "explain", {"sql": "SELECT gid FROM test_parcels"}
+        )
+        summary = json.loads(result.content[0].text)
+        assert summary["plan"]["Plan"]["Node Type"] == "Seq Scan"
+        assert summary["total_cost"] > 0
+        assert summary["estimated_rows"] >= 1
+        assert summary["seq_scans"] == ["test_parcels"]
+        assert summary["spatial_index_used"] is False
+        assert "execution_time_ms" not in summary
+
+    async def test_analyze_reports_actual_rows(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "explain", {"sql": "SELECT gid FROM test_parcels", "analyze": True}
+        )
+        summary = json.loads(result.content[0].text)
+        assert summary["actual_rows"] == 2
+        assert summary["execution_time_ms"] >= 0
+
+    async def test_detects_spatial_index(self, mcp_client, db_connection):
+        await db_connection.execute(
+            "CREATE INDEX test_parcels_geom_idx ON test_parcels USING gist (geom)"
+        )
+        await db_connection.execute("SET enable_seqscan = off")
+        try:
+            result = await mcp_client.call_tool(
+                "explain",
+                {
+                    "sql": (
+                        "SELECT gid FROM test_parcels "
+                        "WHERE geom && ST_MakeEnvelope(0, 0, 1, 1, 4326)"
+                    )
+                },
+            )
+        finally:
+            await db_connection.execute("RESET enable_seqscan")
+            await db_connection.execute("DROP INDEX test_parcels_geom_idx")
+        summary = json.loads(result.content[0].text)
+        assert summary["spatial_index_used"] is True
+        assert summary["spatial_indexes"] == ["test_parcels_geom_idx"]
+
+    async def test_disallowed_table_rejected(self, mcp_client):
+        with pytest.raises(ToolError, match="Access denied"):
+            await mcp_client.call_tool(
+                "explain", {"sql": "SELECT * FROM test_restricted"}
+            )
+
+    async def test_preflight_rejects_expensive_query(
+        self, mcp_client, db_connection, test_settings
+    ):
+        from src.server import configure
+
+        configure(
+            test_settings.model_copy(
+                update={"preflight": "reject", "preflight_max_cost": 0.001}
+            ),
+            db_connection,
+        )
+        with pytest.raises(ToolError, match="Query rejected: Estimated cost"):
+            await mcp_client.call_tool("query", {"sql": "SELECT * FROM test_parcels"})
+
+    async def test_preflight_warns_in_warn_mode(
+        self, mcp_client, db_connection, test_settings
+    ):
+        from src.server import configure
+
+        configure(
+            test_settings.model_copy(
+                update={"preflight": "warn", "preflight_max_rows": 1}
+            ),
+            db_connection,
+        )
+        result = await mcp_client.call_tool(
+            "query", {"sql": "SELECT gid FROM test_parcels"}
+        )
+        response = json.loads(result.content[0].text)
+        assert response["row_count"] == 2
+        assert "Estimated rows" in response["warning"]
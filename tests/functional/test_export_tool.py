@@ -0,0 +1,136 @@
+"""Functional tests for the export MCP tool."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastmcp.exceptions import ToolError
+
+from src.services.flatgeobuf import MAGIC
+
+
+pytestmark = pytest.mark.functional
+
+
+@pytest.fixture
+def export_dir(db_connection, test_settings, tmp_path):
+    from src.server import configure
+
+    configure(
+        test_settings.model_copy(update={"export_dir": str(tmp_path)}),
+        db_connection,
+    )
+    return tmp_path
+
+
+@pytest.mark.usefixtures("test_tables")
+class TestExportTool:
+    """Tests for the 'export' MCP tool via MCP client."""
+
+    async def test_csv_export(self, mcp_client, export_dir):
+        result = await mcp_client.call_tool(
+            "export",
+            {
+                "sql": "SELECT gid, name, geom FROM test_parcels ORDER BY gid",
+                "format": "csv",
+                "path": "parcels",
+            },
+        )
+        response = json.loads(result.content[0].text)
+        assert response["uri"] == "export://parcels.csv"
+        assert response["url"] == "/exports/parcels.csv"
+        assert response["rows"] == 2
+        lines = (export_dir / "parcels.csv").read_text().splitlines()
+        assert lines[0] == "gid,name,geom"
+        assert lines[1].startswith("1,Park A,POLYGON ((0.0 0.0, 1.0 0.0")
+        assert response["bytes"] == (export_dir / "parcels.csv").stat().st_size
+
+    async def test_flatgeobuf_export_readable_as_resource(
+        self, mcp_client, export_dir
+    ):
+        result = await mcp_client.call_tool(
+            "export",
+            {
+                "sql": "SELECT * FROM test_parcels",
+                "format": "flatgeobuf",
+                "path": "out/parcels",
+            },
+        )
+        response = json.loads(result.content[0].text)
+        assert response["uri"] == "export://out/parcels.fgb"
+        assert (export_dir / "out" / "parcels.fgb").read_bytes().startswith(MAGIC)
+
+        contents = await mcp_client.read_resource(response["uri"])
+        assert contents[0].mimeType == "application/flatgeobuf"
+
+    async def test_geojsonseq_export(self, mcp_client, export_dir):
+        await mcp_client.call_tool(
+            "export",
+            {
+                "sql": "SELECT bid, location FROM test_buildings WHERE bid = %s",
+                "format": "geojsonseq",
+                "path": "buildings",
+                "params": [1],
+            },
+        )
+        record = (export_dir / "buildings.geojsons").read_bytes()
+        feature = json.loads(record.lstrip(b"\x1e"))
+        assert feature["geometry"] == {"type": "Point", "coordinates": [0.5, 0.5]}
+        assert feature["properties"] == {"bid": 1}
+
+    async def test_arrow_export(self, mcp_client, export_dir):
+        pa = pytest.importorskip("pyarrow")
+        result = await mcp_client.call_tool(
+            "export",
+            {
+                "sql": "SELECT gid, name, geom FROM test_parcels ORDER BY gid",
+                "format": "arrow",
+                "path": "parcels",
+            },
+        )
+        response = json.loads(result.content[0].text)
+        assert response["uri"] == "export://parcels.arrow"
+        table = pa.ipc.open_file(export_dir / "parcels.arrow").read_all()
+        assert table.column("gid").to_pylist() == [1, 2]
+        assert table.schema.field("gid").type == pa.int32()
+        assert table.column("geom").to_pylist()[0].startswith("POLYGON")
+
+    async def test_existing_file_kept_without_overwrite(self, mcp_client, export_dir):
+        (export_dir / "taken.csv").write_text("keep")
+        with pytest.raises(ToolError, match="already exists"):
+            await mcp_client.call_tool(
+                "export",
+                {
+                    "sql": "SELECT gid FROM test_parcels",
+                    "format": "csv",
+                    "path": "taken",
+                },
+            )
+        assert (export_dir / "taken.csv").read_text() == "keep"
+
+    async def test_path_outside_directory_rejected(self, mcp_client, export_dir):
+        with pytest.raises(ToolError, match="outside the export directory"):
+            await mcp_client.call_tool(
+                "export",
+                {
+                    "sql": "SELECT gid FROM test_parcels",
+                    "format": "csv",
+                    "path": "../x",
+                },
+            )
+
+    async def test_restricted_table_denied(self, mcp_client, export_dir):
+        with pytest.raises(ToolError, match="Access denied"):
+            await mcp_client.call_tool(
+                "export",
+                {"sql": "SELECT * FROM test_restricted", "format": "csv", "path": "x"},
+            )
+        assert list(export_dir.iterdir()) == []
+
+    async def test_disabled_without_export_dir(self, mcp_client):
+        with pytest.raises(ToolError, match="Export is disabled"):
+            await mcp_client.call_tool(
+                "export",
+                {"sql": "SELECT gid FROM test_parcels", "format": "csv", "path": "x"},
+            )
@@ -0,0 +1,63 @@
+"""Functional tests for the features_in_bbox MCP tool."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastmcp.exceptions import ToolError
+
+
+pytestmark = pytest.mark.functional
+
+
+@pytest.mark.usefixtures("test_tables")
+class TestFeaturesInBboxTool:
+    """Tests for the 'features_in_bbox' MCP tool via MCP client."""
+
+    async def test_returns_only_intersecting_features(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "features_in_bbox",
+            {
+                "table_name": "test_parcels",
+                "minx": -0.5,
+                "miny": -0.5,
+                "maxx": 0.5,
+                "maxy": 0.5,
+                "columns": ["name"],
+            },
+        )
+        collection = json.loads(result.content[0].text)
+        assert collection["type"] == "FeatureCollection"
+        assert [f["properties"] for f in collection["features"]] == [
+            {"name": "Park A"}
+        ]
+        assert collection["features"][0]["geometry"]["type"] == "Polygon"
+
+    async def test_zoom_simplifies_geometries(self, mcp_client):
+        args = {
+            "table_name": "test_parcels",
+            "minx": -10,
+            "miny": -10,
+            "maxx": 10,
+            "maxy": 10,
+        }
+        full = await mcp_client.call_tool("features_in_bbox", args)
+        coarse = await mcp_client.call_tool("features_in_bbox", {**args, "zoom": 0})
+        full_features = json.loads(full.content[0].text)["features"]
+        coarse_features = json.loads(coarse.content[0].text)["features"]
+        assert len(coarse_features) == len(full_features) == 2
+        assert len(coarse.content[0].text) <= len(full.content[0].text)
+
+    async def test_restricted_table_denied(self, mcp_client):
+        with pytest.raises(ToolError, match="Access denied"):
+            await mcp_client.call_tool(
+                "features_in_bbox",
+                {
+                    "table_name": "test_restricted",
+                    "minx": 0,
+                    "miny": 0,
+                    "maxx": 1,
+                    "maxy": 1,
+                },
+            )
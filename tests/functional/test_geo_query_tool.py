@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import json
+
 import pytest
 
 
@@ -63,3 +65,32 @@ class TestGeoQueryTool:
         text = result.content[0].text
         # Distance between (0,0) and (1,1) should be ~1.414
         assert "1.4" in text
+
+    async def test_featurecollection_output(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query",
+            {
+                "sql": "SELECT gid, name, geom FROM test_parcels ORDER BY gid",
+                "output": "featurecollection",
+            },
+        )
+        collection = json.loads(result.content[0].text)
+        assert collection["type"] == "FeatureCollection"
+        assert collection["numberReturned"] == 2
+        assert collection["truncated"] is False
+        feature = collection["features"][0]
+        assert feature["geometry"]["type"] == "Polygon"
+        assert feature["properties"]["name"] == "Park A"
+
+    async def test_featurecollection_truncated(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query",
+            {
+                "sql": "SELECT gid, geom FROM test_parcels",
+                "row_limit": 1,
+                "output": "featurecollection",
+            },
+        )
+        collection = json.loads(result.content[0].text)
+        assert len(collection["features"]) == 1
+        assert collection["truncated"] is True
@@ -0,0 +1,49 @@
+"""Functional tests for the index_report MCP tool."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+pytestmark = pytest.mark.functional
+
+
+@pytest.mark.usefixtures("test_tables")
+class TestIndexReportTool:
+    """Tests for the 'index_report' MCP tool via MCP client."""
+
+    async def test_reports_allowed_tables_only(self, mcp_client):
+        result = await mcp_client.call_tool("index_report", {})
+        report = json.loads(result.content[0].text)
+        tables = {t["table"] for t in report["tables"]}
+        assert {"test_parcels", "test_buildings"} <= tables
+        assert "test_restricted" not in tables
+
+    async def test_missing_spatial_index_found(self, mcp_client, db_connection):
+        await db_connection.execute("DROP INDEX IF EXISTS test_buildings_gix")
+        await db_connection.execute(
+            "CREATE INDEX test_buildings_gix ON test_buildings USING gist (location)"
+        )
+        try:
+            result = await mcp_client.call_tool("index_report", {})
+        finally:
+            await db_connection.execute("DROP INDEX test_buildings_gix")
+        report = json.loads(result.content[0].text)
+        tables = {t["table"]: t for t in report["tables"]}
+
+        parcels = tables["test_parcels"]
+        assert parcels["geometry_columns"][0]["spatial_index"] is None
+        missing = [
+            f for f in parcels["findings"] if f["kind"] == "missing_spatial_index"
+        ]
+        assert "USING gist (geom)" in missing[0]["suggestion"]
+        buildings = tables["test_buildings"]
+        assert buildings["geometry_columns"][0]["spatial_index"] == (
+            "test_buildings_gix"
+        )
+        pkey = next(i for i in buildings["indexes"] if i["is_primary"])
+        assert pkey["columns"] == ["bid"]
+        unused = [f for f in buildings["findings"] if f["kind"] == "unused_index"]
+        assert not any(pkey["index_name"] in f["message"] for f in unused)
@@ -0,0 +1,36 @@
+"""Functional tests for the profile_table MCP tool."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastmcp.exceptions import ToolError
+
+
+pytestmark = pytest.mark.functional
+
+
+@pytest.mark.usefixtures("test_tables")
+class TestProfileTableTool:
+    """Tests for the 'profile_table' MCP tool via MCP client."""
+
+    async def test_profile_after_analyze(self, mcp_client, db_connection):
+        await db_connection.execute("ANALYZE test_parcels")
+
+        result = await mcp_client.call_tool(
+            "profile_table", {"table_name": "test_parcels"}
+        )
+        profile = json.loads(result.content[0].text)
+        assert profile["analyzed"] is True
+        columns = {c["column_name"]: c for c in profile["columns"]}
+        assert columns["gid"]["null_fraction"] == 0
+        assert columns["gid"]["n_distinct"] == 2
+        assert columns["name"]["description"] == "Human-readable parcel name"
+        assert columns["area_sqm"]["histogram_bounds"] == ["3000", "5000"]
+
+    async def test_restricted_table_denied(self, mcp_client):
+        with pytest.raises(ToolError, match="Access denied"):
+            await mcp_client.call_tool(
+                "profile_table", {"table_name": "test_restricted"}
+            )
@@ -0,0 +1,59 @@
+"""Functional tests for the query_batch MCP tool."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastmcp.exceptions import ToolError
+
+
+pytestmark = pytest.mark.functional
+
+
+@pytest.mark.usefixtures("test_tables")
+class TestQueryBatchTool:
+    """Tests for the 'query_batch' MCP tool via MCP client."""
+
+    async def test_returns_one_result_per_statement(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query_batch",
+            {
+                "statements": [
+                    "SELECT count(*) FROM test_parcels",
+                    {
+                        "sql": "SELECT name FROM test_parcels WHERE gid = %s",
+                        "params": [2],
+                    },
+                ]
+            },
+        )
+        batch = json.loads(result.content[0].text)
+        assert batch["statement_count"] == 2
+        assert batch["error_count"] == 0
+        assert batch["results"][0]["rows"] == [[2]]
+        assert batch["results"][1]["rows"] == [["Park B"]]
+
+    async def test_failures_do_not_affect_other_statements(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query_batch",
+            {
+                "statements": [
+                    "SELECT 1 / 0 FROM test_parcels",
+                    "SELECT * FROM test_restricted",
+                    "DELETE FROM test_parcels",
+                    "SELECT gid FROM test_parcels ORDER BY gid",
+                ]
+            },
+        )
+        batch = json.loads(result.content[0].text)
+        errors = [r.get("error", "") for r in batch["results"]]
+        assert "division by zero" in errors[0]
+        assert "Access denied" in errors[1]
+        assert "Only SELECT" in errors[2]
+        assert batch["results"][3]["rows"] == [[1], [2]]
+        assert batch["error_count"] == 3
+
+    async def test_empty_batch_rejected(self, mcp_client):
+        with pytest.raises(ToolError, match="at least one"):
+            await mcp_client.call_tool("query_batch", {"statements": []})
@@ -0,0 +1,55 @@
+"""Functional tests for paginated queries and the query_next MCP tool."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastmcp.exceptions import ToolError
+
+
+pytestmark = pytest.mark.functional
+
+
+@pytest.mark.usefixtures("test_tables")
+class TestQueryNextTool:
+    """Tests for 'query' with paginate=True and 'query_next' via MCP client."""
+
+    async def test_pages_through_result(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query",
+            {
+                "sql": "SELECT gid FROM test_parcels ORDER BY gid",
+                "row_limit": 1,
+                "paginate": True,
+            },
+        )
+        first = json.loads(result.content[0].text)
+        assert first["rows"] == [[1]]
+        assert "next_token" in first
+
+        result = await mcp_client.call_tool(
+            "query_next", {"token": first["next_token"]}
+        )
+        second = json.loads(result.content[0].text)
+        assert second["rows"] == [[2]]
+        assert "next_token" not in second
+
+    async def test_unknown_token_rejected(self, mcp_client):
+        with pytest.raises(ToolError, match="continuation token"):
+            await mcp_client.call_tool("query_next", {"token": "not-a-token"})
+
+    async def test_failed_first_page_closes_cursor(self, mcp_client):
+        with pytest.raises(ToolError, match="gid"):
+            await mcp_client.call_tool(
+                "query",
+                {
+                    "sql": "SELECT gid, gid FROM test_parcels ORDER BY gid",
+                    "row_limit": 1,
+                    "paginate": True,
+                    "output": "columnar",
+                },
+            )
+
+        result = await mcp_client.call_tool("server_stats", {})
+        assert json.loads(result.content[0].text)["cursors"]["open_cursors"] == 0
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import json
+
 import pytest
 from fastmcp.exceptions import ToolError
 
@@ -84,3 +86,123 @@ class TestQueryTool:
         text = result.content[0].text
         # Should have at most 1 row of data returned, or truncated indicator
         assert "row_count" in text or "truncated" in text or "Park" in text
+
+    async def test_columnar_output(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query",
+            {
+                "sql": "SELECT gid, area_sqm FROM test_parcels ORDER BY gid",
+                "output": "columnar",
+            },
+        )
+        response = json.loads(result.content[0].text)
+        assert response["columns"] == ["gid", "area_sqm"]
+        assert response["data"] == {"gid": [1, 2], "area_sqm": [5000.0, 3000.0]}
+        assert "rows" not in response
+
+    async def test_columnar_dictionary_encoding(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query",
+            {
+                "sql": (
+                    "SELECT 'park' AS kind FROM test_parcels "
+                    "CROSS JOIN test_buildings"
+                ),
+                "output": "columnar",
+                "dictionary_encode": True,
+            },
+        )
+        response = json.loads(result.content[0].text)
+        assert response["data"]["kind"] == {
+            "dictionary": ["park"],
+            "indices": [0, 0, 0, 0],
+        }
+
+    async def test_timeout_cancels_slow_query(self, mcp_client):
+        with pytest.raises(ToolError, match="statement timeout of 0.1 s exceeded"):
+            await mcp_client.call_tool(
+                "query",
+                {"sql": "SELECT pg_sleep(5) FROM test_parcels", "timeout": 0.1},
+            )
+
+    async def test_timeout_above_maximum_rejected(self, mcp_client):
+        with pytest.raises(ToolError, match="server maximum"):
+            await mcp_client.call_tool(
+                "query",
+                {"sql": "SELECT gid FROM test_parcels", "timeout": 100000},
+            )
+
+    async def test_params_bound_to_placeholders(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query",
+            {
+                "sql": "SELECT name FROM test_parcels WHERE gid = %(gid)s",
+                "params": {"gid": 1},
+            },
+        )
+        data = json.loads(result.content[0].text)
+        assert data["rows"] == [["Park A"]]
+
+    async def test_precision_rounds_geometry_coordinates(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query",
+            {
+                "sql": (
+                    "SELECT ST_Translate(geom, 0.123456, 0) AS geom "
+                    "FROM test_parcels WHERE gid = 1"
+                ),
+                "precision": 2,
+            },
+        )
+        data = json.loads(result.content[0].text)
+        assert data["rows"][0][0]["coordinates"][0][0] == [0.12, 0]
+
+    async def test_quantize_snaps_geometry_to_grid(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "query",
+            {
+                "sql": (
+                    "SELECT ST_Translate(geom, 0.3, 0) AS geom "
+                    "FROM test_parcels WHERE gid = 1"
+                ),
+                "quantize": 0.5,
+            },
+        )
+        data = json.loads(result.content[0].text)
+        assert data["rows"][0][0]["coordinates"][0][0] == [0.5, 0]
+
+    async def test_precision_shrinks_geometry_payload(self, mcp_client):
+        # Rotated and densified, each parcel has about 400 vertices whose
+        # coordinates print with up to 17 significant digits.
+        args = {
+            "sql": (
+                "SELECT gid, ST_Segmentize(ST_Rotate(geom, 0.3), 0.01) AS geom "
+                "FROM test_parcels"
+            )
+        }
+        full = await mcp_client.call_tool("query", args)
+        reduced = await mcp_client.call_tool("query", {**args, "precision": 3})
+
+        full_bytes = len(full.content[0].text)
+        reduced_bytes = len(reduced.content[0].text)
+        assert json.loads(reduced.content[0].text)["row_count"] == 2
+        assert reduced_bytes < full_bytes / 2
+
+    async def test_precision_out_of_range_rejected(self, mcp_client):
+        with pytest.raises(ToolError, match="precision"):
+            await mcp_client.call_tool(
+                "query", {"sql": "SELECT geom FROM test_parcels", "precision": 20}
+            )
+
+    async def test_progress_reported_while_fetching(self, mcp_client):
+        reported = []
+
+        async def on_progress(progress, total, message):
+            reported.append((progress, total))
+
+        await mcp_client.call_tool(
+            "query",
+            {"sql": "SELECT gid FROM test_parcels", "row_limit": 10},
+            progress_handler=on_progress,
+        )
+        assert reported[-1] == (2, 11)
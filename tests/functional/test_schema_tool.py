@@ -41,6 +41,17 @@ class TestSchemaTools:
         # Should include geometry type info
         assert "geom" in text
 
+    async def test_views_listed_and_described(self, mcp_client):
+        result = await mcp_client.call_tool("list_tables", {})
+        assert "test_parcel_names" in result.content[0].text
+
+        result = await mcp_client.call_tool(
+            "describe_table", {"table_name": "test_parcel_names"}
+        )
+        text = result.content[0].text
+        assert "gid" in text
+        assert "name" in text
+
     async def test_describe_nonexistent_table_error(self, mcp_client):
         with pytest.raises(ToolError):
             await mcp_client.call_tool(
@@ -0,0 +1,52 @@
+"""Functional tests for the server_stats MCP tool."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+pytestmark = pytest.mark.functional
+
+
+class TestServerStatsTool:
+    """Tests for the 'server_stats' MCP tool via MCP client."""
+
+    async def test_reports_pool_stats(self, mcp_client):
+        result = await mcp_client.call_tool("server_stats", {})
+        stats = json.loads(result.content[0].text)
+        assert "pool" in stats
+        assert stats["pool"]["pool_max"] >= 1
+
+    @pytest.mark.usefixtures("test_tables")
+    async def test_repeated_query_counts_cache_hit(self, mcp_client):
+        sql = "SELECT count(*) FROM test_parcels"
+        await mcp_client.call_tool("query", {"sql": sql})
+        await mcp_client.call_tool("query", {"sql": sql})
+
+        result = await mcp_client.call_tool("server_stats", {})
+        cache = json.loads(result.content[0].text)["query_cache"]
+        assert cache["hits"] == 1
+        assert cache["entries"] == 1
+
+    @pytest.mark.usefixtures("test_tables")
+    async def test_repeated_describe_served_from_catalog_cache(self, mcp_client):
+        await mcp_client.call_tool("describe_table", {"table_name": "test_parcels"})
+        await mcp_client.call_tool("describe_table", {"table_name": "test_parcels"})
+
+        result = await mcp_client.call_tool("server_stats", {})
+        catalog = json.loads(result.content[0].text)["catalog_cache"]
+        assert catalog["hits"] >= 2
+        assert catalog["version_checks"] == 1
+
+    @pytest.mark.usefixtures("test_tables")
+    async def test_hot_statement_is_prepared(self, mcp_client):
+        sql = "SELECT name FROM test_parcels WHERE gid = %s"
+        for gid in range(7):
+            await mcp_client.call_tool("query", {"sql": sql, "params": [gid]})
+
+        result = await mcp_client.call_tool("server_stats", {})
+        prepared = json.loads(result.content[0].text)["prepared_statements"]
+        assert prepared["statements_prepared"] == 1
+        assert prepared["prepared_hits"] == 2
@@ -0,0 +1,56 @@
+"""Functional tests for the spatial_extent MCP tool."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastmcp.exceptions import ToolError
+
+
+pytestmark = pytest.mark.functional
+
+
+@pytest.mark.usefixtures("test_tables")
+class TestSpatialExtentTool:
+    """Tests for the 'spatial_extent' MCP tool via MCP client."""
+
+    async def test_exact_extent_and_type_mix(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "spatial_extent", {"table_name": "test_parcels", "exact": True}
+        )
+        data = json.loads(result.content[0].text)
+        assert data["extent"] == [0, 0, 3, 3]
+        assert data["rows"] == 2
+        assert data["geometry_types"] == {"POLYGON": 2}
+        assert data["srid"] == 4326
+        assert data["exact"] is True
+
+    async def test_estimate_lists_geometry_columns(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "spatial_extent", {"table_name": "test_parcels"}
+        )
+        data = json.loads(result.content[0].text)
+        assert data["exact"] is False
+        assert data["geometry_columns"] == [
+            {
+                "column_name": "geom",
+                "geometry_type": "POLYGON",
+                "srid": 4326,
+                "coord_dimension": 2,
+            }
+        ]
+
+    async def test_repeated_exact_extent_served_from_cache(self, mcp_client):
+        args = {"table_name": "test_parcels", "exact": True}
+        await mcp_client.call_tool("spatial_extent", args)
+        await mcp_client.call_tool("spatial_extent", args)
+
+        result = await mcp_client.call_tool("server_stats", {})
+        assert json.loads(result.content[0].text)["extent_cache"]["hits"] == 1
+
+    async def test_non_geometry_column_rejected(self, mcp_client):
+        with pytest.raises(ToolError, match="not a geometry column"):
+            await mcp_client.call_tool(
+                "spatial_extent", {"table_name": "test_parcels", "geom_column": "name"}
+            )
@@ -0,0 +1,68 @@
+"""Functional tests for the tile MCP tool."""
+
+from __future__ import annotations
+
+import base64
+import json
+
+import pytest
+from fastmcp.exceptions import ToolError
+
+
+pytestmark = pytest.mark.functional
+
+# Web Mercator tile 1/1/0 covers longitudes 0..180 and latitudes 0..85,
+# where the test parcels lie.
+PARCELS_TILE = {"z": 1, "x": 1, "y": 0}
+
+
+@pytest.mark.usefixtures("test_tables")
+class TestTileTool:
+    """Tests for the 'tile' MCP tool via MCP client."""
+
+    async def test_builds_mvt_with_features(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "tile", {"table_name": "test_parcels", **PARCELS_TILE}
+        )
+        tile = json.loads(result.content[0].text)
+        assert tile["layer"] == "test_parcels"
+        assert tile["features"] == 2
+        assert tile["media_type"] == "application/vnd.mapbox-vector-tile"
+        data = base64.b64decode(tile["data"])
+        assert len(data) == tile["bytes"] > 0
+        assert b"test_parcels" in data
+
+    async def test_empty_tile(self, mcp_client):
+        result = await mcp_client.call_tool(
+            "tile", {"table_name": "test_parcels", "z": 2, "x": 0, "y": 3}
+        )
+        tile = json.loads(result.content[0].text)
+        assert tile["features"] == 0
+        assert tile["bytes"] == 0
+
+    async def test_feature_in_buffer_zone_kept(self, mcp_client):
+        # Tile 1/0/0 ends at longitude 0; Park B, at 2..3, lies only in its
+        # 11.25 degree clipping buffer.
+        result = await mcp_client.call_tool(
+            "tile", {"table_name": "test_parcels", "z": 1, "x": 0, "y": 0}
+        )
+        assert json.loads(result.content[0].text)["features"] == 2
+
+    async def test_repeated_tile_served_from_cache(self, mcp_client):
+        args = {"table_name": "test_parcels", "columns": ["name"], **PARCELS_TILE}
+        await mcp_client.call_tool("tile", args)
+        await mcp_client.call_tool("tile", args)
+
+        result = await mcp_client.call_tool("server_stats", {})
+        assert json.loads(result.content[0].text)["tile_cache"]["hits"] == 1
+
+    async def test_restricted_table_denied(self, mcp_client):
+        with pytest.raises(ToolError, match="Access denied"):
+            await mcp_client.call_tool(
+                "tile", {"table_name": "test_restricted", **PARCELS_TILE}
+            )
+
+    async def test_non_geometry_column_rejected(self, mcp_client):
+        args = {"table_name": "test_parcels", "geom_column": "name", **PARCELS_TILE}
+        with pytest.raises(ToolError, match="not a geometry column"):
+            await mcp_client.call_tool("tile", args)
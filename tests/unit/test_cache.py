@@ -0,0 +1,58 @@
+"""Unit tests for src.services.cache — LRUCache."""
+
+from __future__ import annotations
+
+import time
+
+from src.services.cache import LRUCache
+
+
+def _cache(max_bytes: int = 10, ttl: float = 60) -> LRUCache[str, str]:
+    return LRUCache(max_bytes=max_bytes, ttl=ttl, sizeof=len)
+
+
+class TestLRUCache:
+    """Tests for LRUCache."""
+
+    def test_get_counts_hits_and_misses(self):
+        cache = _cache()
+        cache.put("a", "xx")
+
+        assert cache.get("a") == "xx"
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used_to_fit_bytes(self):
+        cache = _cache(max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+
+        cache.put("c", "cccc")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "aaaa"
+        assert cache.stats()["bytes"] == 8
+        assert cache.stats()["evictions"] == 1
+
+    def test_value_larger_than_budget_not_stored(self):
+        cache = _cache(max_bytes=3)
+        cache.put("a", "toolong")
+        assert len(cache) == 0
+
+    def test_expired_entry_is_a_miss(self):
+        cache = _cache(ttl=0.01)
+        cache.put("a", "x")
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] == 0
+
+    def test_failed_validation_invalidates(self):
+        cache = _cache()
+        cache.put("a", "x")
+
+        assert cache.get("a", validate=lambda v: False) is None
+        assert len(cache) == 0
+        assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,68 @@
+"""Unit tests for src.services.catalog_cache — CatalogCache."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.services import catalog
+from src.services.catalog import get_table
+from src.services.catalog_cache import CatalogCache
+
+
+@pytest.fixture
+def _cursor_mock():
+    """Mock connection whose cursor returns the given catalog versions in turn."""
+    cursor = AsyncMock()
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=cursor)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    conn = MagicMock()
+    conn.cursor.return_value = ctx
+    return conn, cursor
+
+
+async def test_serves_from_memory_within_check_interval(_cursor_mock):
+    conn, cursor = _cursor_mock
+    cursor.fetchone.return_value = ("v1",)
+    cache = CatalogCache("public", ttl=60, check_interval=60)
+    load = AsyncMock(return_value=["id"])
+
+    first = await cache.get_or_load(conn, "k", load)
+    second = await cache.get_or_load(conn, "k", load)
+
+    assert first == second == ["id"]
+    load.assert_awaited_once()
+    cursor.execute.assert_awaited_once()
+    assert cache.stats()["hits"] == 1
+
+
+async def test_catalog_change_drops_entries(_cursor_mock):
+    conn, cursor = _cursor_mock
+    cursor.fetchone.side_effect = [("v1",), ("v1",), ("v2",)]
+    cache = CatalogCache("public", ttl=60, check_interval=0)
+    load = AsyncMock(side_effect=[["id"], ["id", "geom"]])
+
+    await cache.get_or_load(conn, "k", load)
+    assert await cache.get_or_load(conn, "k", load) == ["id"]
+    assert await cache.get_or_load(conn, "k", load) == ["id", "geom"]
+
+    assert load.await_count == 2
+    assert cache.stats()["version_checks"] == 3
+
+
+async def test_missing_table_is_cached(_cursor_mock, monkeypatch):
+    monkeypatch.setattr(
+        catalog, "register_geometry_types", AsyncMock(return_value=frozenset())
+    )
+    conn, cursor = _cursor_mock
+    cursor.fetchone.return_value = ("v1",)
+    cursor.fetchall.return_value = []
+    cache = CatalogCache("public", ttl=60, check_interval=60)
+
+    assert await get_table(conn, "public", "missing", cache) is None
+    assert await get_table(conn, "public", "missing", cache) is None
+
+    # One version check plus one metadata query
+    assert cursor.execute.await_count == 2
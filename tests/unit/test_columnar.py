@@ -0,0 +1,41 @@
+"""Unit tests for src.services.columnar — to_columnar."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.models.query import QueryResult
+from src.services.columnar import to_columnar
+
+
+def _result(columns: list[str], rows: list[list[object]]) -> QueryResult:
+    return QueryResult(
+        columns=columns, rows=rows, row_count=len(rows), truncated=False
+    )
+
+
+class TestToColumnar:
+    """Tests for to_columnar()."""
+
+    def test_transposes_rows(self):
+        result = _result(["id", "area"], [[1, 2.5], [2, 3.0]])
+        assert to_columnar(result) == {"id": [1, 2], "area": [2.5, 3.0]}
+
+    def test_empty_result_keeps_columns(self):
+        assert to_columnar(_result(["id", "name"], [])) == {"id": [], "name": []}
+
+    def test_duplicate_column_names_rejected(self):
+        with pytest.raises(ValueError, match="Duplicate column name 'id'"):
+            to_columnar(_result(["id", "id"], [[1, 2]]))
+
+    def test_dictionary_encodes_repetitive_text(self):
+        rows = [["res"], ["com"], [None], ["res"]]
+        data = to_columnar(_result(["zoning"], rows), dictionary_encode=True)
+        assert data == {
+            "zoning": {"dictionary": ["res", "com"], "indices": [0, 1, None, 0]}
+        }
+
+    def test_unique_text_and_numbers_left_plain(self):
+        rows = [[1, "a"], [1, "b"], [1, "c"]]
+        data = to_columnar(_result(["n", "name"], rows), dictionary_encode=True)
+        assert data == {"n": [1, 1, 1], "name": ["a", "b", "c"]}
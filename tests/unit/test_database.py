@@ -11,6 +11,14 @@ from src.config.settings import Settings, PASSWORD_ENV_VAR
 from src.services.database import create_connection
 
 
+@pytest.fixture(autouse=True)
+def _no_geometry_lookup():
+    with patch(
+        "src.services.database.register_geometry_types", new_callable=AsyncMock
+    ) as mock_register:
+        yield mock_register
+
+
 @pytest.fixture
 def _settings() -> Settings:
     return Settings(
@@ -75,3 +83,18 @@ async def test_connection_parameters_match_settings(_settings, monkeypatch):
         assert call_kwargs["dbname"] == _settings.dbname
         # No POSTGISMCPPASS set, so password should be empty string
         assert call_kwargs["password"] == ""
+
+
+async def test_geometry_types_registered_on_new_connection(
+    _settings, _no_geometry_lookup
+):
+    mock_conn = AsyncMock()
+
+    with patch(
+        "psycopg.AsyncConnection.connect",
+        new_callable=AsyncMock,
+        return_value=mock_conn,
+    ):
+        await create_connection(_settings)
+
+    _no_geometry_lookup.assert_awaited_once_with(mock_conn)
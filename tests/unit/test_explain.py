@@ -0,0 +1,120 @@
+"""Unit tests for src.services.explain."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.models.explain import PlanSummary
+from src.services import explain as explain_service
+from src.services.explain import CostLimits, check_cost, explain_query
+
+PLAN = {
+    "Plan": {
+        "Node Type": "Nested Loop",
+        "Total Cost": 120.5,
+        "Plan Rows": 40,
+        "Plans": [
+            {
+                "Node Type": "Seq Scan",
+                "Relation Name": "buildings",
+                "Total Cost": 20.0,
+                "Plan Rows": 10,
+            },
+            {
+                "Node Type": "Bitmap Heap Scan",
+                "Relation Name": "parcels",
+                "Plans": [
+                    {
+                        "Node Type": "Bitmap Index Scan",
+                        "Index Name": "parcels_geom_idx",
+                    }
+                ],
+            },
+        ],
+    }
+}
+
+
+def _cursor(
+    *fetchone_results: object, fetchall: list[tuple[object, ...]] = ()
+) -> tuple[MagicMock, MagicMock]:
+    cur = MagicMock()
+    cur.execute = AsyncMock()
+    cur.fetchone = AsyncMock(side_effect=list(fetchone_results))
+    cur.fetchall = AsyncMock(return_value=list(fetchall))
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=cur)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx, cur
+
+
+async def test_explain_summarizes_plan_and_spatial_indexes():
+    plan_ctx, plan_cur = _cursor(([PLAN],))
+    index_ctx, index_cur = _cursor(fetchall=[("parcels_geom_idx",)])
+    conn = MagicMock()
+    conn.cursor.side_effect = [plan_ctx, index_ctx]
+
+    summary = await explain_query(
+        conn, "SELECT * FROM parcels JOIN other.roads USING (id);", "public"
+    )
+
+    assert summary.total_cost == 120.5
+    assert summary.estimated_rows == 40
+    assert summary.seq_scans == ["buildings"]
+    assert summary.spatial_indexes == ["parcels_geom_idx"]
+    assert summary.spatial_index_used is True
+    assert summary.execution_time_ms is None
+    assert conn.cursor.call_args_list[0].kwargs == {"binary": True}
+    assert index_cur.execute.await_args.args[1] == {
+        "indexes": ["parcels_geom_idx"],
+        "schemas": ["other", "public"],
+    }
+    statement = plan_cur.execute.await_args.args[0].as_string()
+    assert statement == (
+        "EXPLAIN (FORMAT JSON) SELECT * FROM parcels JOIN other.roads USING (id)"
+    )
+
+
+def _summary(total_cost: float, estimated_rows: int) -> PlanSummary:
+    return PlanSummary(
+        plan={},
+        total_cost=total_cost,
+        estimated_rows=estimated_rows,
+        spatial_index_used=False,
+        spatial_indexes=[],
+        seq_scans=["parcels"],
+    )
+
+
+async def test_check_cost_within_limits(monkeypatch):
+    monkeypatch.setattr(
+        explain_service, "explain_query", AsyncMock(return_value=_summary(50, 10))
+    )
+    limits = CostLimits(max_cost=100, max_rows=100, reject=True)
+
+    assert await check_cost(MagicMock(), "SELECT 1", "public", limits) is None
+
+
+async def test_check_cost_warns(monkeypatch):
+    monkeypatch.setattr(
+        explain_service, "explain_query", AsyncMock(return_value=_summary(5e6, 10))
+    )
+    limits = CostLimits(max_cost=1e5, max_rows=None, reject=False)
+
+    warning = await check_cost(MagicMock(), "SELECT * FROM parcels", "public", limits)
+
+    assert warning is not None
+    assert warning.startswith("Estimated cost 5000000 exceeds 100000.")
+    assert "Sequential scans on: parcels." in warning
+
+
+async def test_check_cost_rejects(monkeypatch):
+    monkeypatch.setattr(
+        explain_service, "explain_query", AsyncMock(return_value=_summary(10, 10**7))
+    )
+    limits = CostLimits(max_cost=None, max_rows=1000, reject=True)
+
+    with pytest.raises(ValueError, match="Query rejected: Estimated rows 10000000"):
+        await check_cost(MagicMock(), "SELECT * FROM parcels", "public", limits)
@@ -0,0 +1,291 @@
+"""Unit tests for src.services.export — export paths and file writers."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import psycopg
+import pytest
+
+from src.services import export
+from src.services.export import export_path, export_query
+from src.services.flatgeobuf import MAGIC
+from src.tools import export as export_tools
+from src.tools.export import locate_export, read_export
+
+GEOMETRY_OID = 16400
+
+
+class _FakePortal:
+    """Portal stand-in describing columns of the given types."""
+
+    columns: list[str] = []
+    type_codes: list[int] = []
+
+    def __init__(self, conn: object) -> None:
+        pass
+
+    async def declare(self, sql: str, params: object = None) -> None:
+        pass
+
+
+def _batches(*batches, error: Exception | None = None):
+    async def fetch(portal, max_rows):
+        for batch in batches:
+            yield [list(row) for row in batch]
+        if error is not None:
+            raise error
+
+    return fetch
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    monkeypatch.setattr(
+        export,
+        "register_geometry_types",
+        AsyncMock(return_value=frozenset({GEOMETRY_OID})),
+    )
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=None)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    conn = MagicMock()
+    conn.transaction.return_value = ctx
+    conn.execute = AsyncMock()
+    return conn
+
+
+def _portal(monkeypatch, columns, type_codes):
+    monkeypatch.setattr(_FakePortal, "columns", columns)
+    monkeypatch.setattr(_FakePortal, "type_codes", type_codes)
+    monkeypatch.setattr(export, "Portal", _FakePortal)
+
+
+POINT = {"type": "Point", "coordinates": [1.5, 2.0]}
+
+
+class TestExportPath:
+    def test_adds_format_extension(self, tmp_path):
+        assert export_path(tmp_path, "parcels", "flatgeobuf") == (
+            tmp_path.resolve() / "parcels.fgb"
+        )
+
+    def test_keeps_given_extension_and_subdirectory(self, tmp_path):
+        assert export_path(tmp_path, "a/b.txt", "csv") == (
+            tmp_path.resolve() / "a" / "b.txt"
+        )
+
+    @pytest.mark.parametrize("path", ["../x.csv", "a/../../x.csv", "../exports2/x.csv"])
+    def test_rejects_paths_outside_directory(self, tmp_path, path):
+        with pytest.raises(ValueError, match="outside the export directory"):
+            export_path(tmp_path / "exports", path, "csv")
+
+    @pytest.mark.parametrize("path", ["/etc/passwd", "", ".", "a/..", "  "])
+    def test_rejects_absolute_or_empty_paths(self, tmp_path, path):
+        with pytest.raises(ValueError, match="relative to the export directory"):
+            export_path(tmp_path, path, "csv")
+
+
+class TestExportQuery:
+    async def test_csv_has_header_and_wkt_geometries(
+        self, conn, monkeypatch, tmp_path
+    ):
+        _portal(monkeypatch, ["id", "ok", "geom"], [23, 16, GEOMETRY_OID])
+        batches = _batches([(1, True, POINT), (2, None, None)], [(3, False, POINT)])
+        monkeypatch.setattr(export, "fetch_batches", batches)
+        target = tmp_path / "out.csv"
+
+        result = await export_query(conn, "SELECT * FROM t", target, "csv")
+
+        assert target.read_text().splitlines() == [
+            "id,ok,geom",
+            "1,true,POINT (1.5 2.0)",
+            "2,,",
+            "3,false,POINT (1.5 2.0)",
+        ]
+        assert result.rows == 3
+        assert result.size == target.stat().st_size
+
+    async def test_geojsonseq_writes_one_feature_per_row(
+        self, conn, monkeypatch, tmp_path
+    ):
+        _portal(monkeypatch, ["id", "geom"], [23, GEOMETRY_OID])
+        monkeypatch.setattr(export, "fetch_batches", _batches([(1, POINT)]))
+        target = tmp_path / "out.geojsons"
+
+        await export_query(conn, "SELECT * FROM t", target, "geojsonseq")
+
+        record = target.read_bytes()
+        assert record.startswith(b"\x1e")
+        assert json.loads(record[1:])["properties"] == {"id": 1}
+
+    async def test_flatgeobuf_file_is_written(self, conn, monkeypatch, tmp_path):
+        _portal(monkeypatch, ["id", "geom"], [23, GEOMETRY_OID])
+        monkeypatch.setattr(export, "fetch_batches", _batches([(1, POINT), (2, POINT)]))
+        target = tmp_path / "out.fgb"
+
+        result = await export_query(conn, "SELECT * FROM t", target, "flatgeobuf")
+
+        assert target.read_bytes().startswith(MAGIC)
+        assert result.size == target.stat().st_size
+        assert list(tmp_path.iterdir()) == [target]
+
+    async def test_arrow_file_has_one_record_batch_per_fetch(
+        self, conn, monkeypatch, tmp_path
+    ):
+        pa = pytest.importorskip("pyarrow")
+        _portal(
+            monkeypatch,
+            ["id", "price", "data", "tags", "geom"],
+            [23, 1700, 17, 3802, GEOMETRY_OID],
+        )
+        monkeypatch.setattr(
+            export,
+            "fetch_batches",
+            _batches(
+                [(1, Decimal("2.5"), "\\x0aff", {"a": [1]}, POINT)],
+                [(2, None, None, None, None)],
+            ),
+        )
+        target = tmp_path / "out.arrow"
+
+        result = await export_query(conn, "SELECT * FROM t", target, "arrow")
+
+        reader = pa.ipc.open_file(target)
+        assert reader.num_record_batches == 2
+        table = reader.read_all()
+        assert table.schema.types == [
+            pa.int32(), pa.float64(), pa.binary(), pa.string(), pa.string()
+        ]
+        assert table.to_pylist() == [
+            {
+                "id": 1,
+                "price": 2.5,
+                "data": b"\x0a\xff",
+                "tags": '{"a":[1]}',
+                "geom": "POINT (1.5 2.0)",
+            },
+            {"id": 2, "price": None, "data": None, "tags": None, "geom": None},
+        ]
+        assert result.rows == 2
+        assert result.size == target.stat().st_size
+
+    async def test_empty_arrow_file_keeps_schema(self, conn, monkeypatch, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+        _portal(monkeypatch, ["id", "name"], [23, 25])
+        monkeypatch.setattr(export, "fetch_batches", _batches([]))
+        target = tmp_path / "out.arrow"
+
+        result = await export_query(conn, "SELECT * FROM t", target, "arrow")
+
+        table = pa.ipc.open_file(target).read_all()
+        assert table.num_rows == 0
+        assert table.schema.names == ["id", "name"]
+        assert result.rows == 0
+
+    async def test_flatgeobuf_without_geometry_rejected(
+        self, conn, monkeypatch, tmp_path
+    ):
+        _portal(monkeypatch, ["id"], [23])
+        monkeypatch.setattr(export, "fetch_batches", _batches([(1,)]))
+
+        with pytest.raises(ValueError, match="geometry column"):
+            await export_query(
+                conn, "SELECT id FROM t", tmp_path / "x.fgb", "flatgeobuf"
+            )
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_oversized_export_abandoned(self, conn, monkeypatch, tmp_path):
+        _portal(monkeypatch, ["id"], [23])
+        batches = _batches([(i,) for i in range(100)], [(i,) for i in range(100)])
+        monkeypatch.setattr(export, "fetch_batches", batches)
+
+        with pytest.raises(ValueError, match="exceeds the server limit of 100 bytes"):
+            await export_query(
+                conn, "SELECT id FROM t", tmp_path / "x.csv", "csv", max_bytes=100
+            )
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_failed_query_leaves_no_file(self, conn, monkeypatch, tmp_path):
+        _portal(monkeypatch, ["id"], [23])
+        failure = psycopg.errors.DivisionByZero("division by zero")
+        monkeypatch.setattr(export, "fetch_batches", _batches([(1,)], error=failure))
+
+        with pytest.raises(psycopg.errors.DivisionByZero):
+            await export_query(conn, "SELECT 1 / id FROM t", tmp_path / "x.csv", "csv")
+        assert list(tmp_path.iterdir()) == []
+
+
+    async def test_concurrent_exports_to_one_path_do_not_mix(
+        self, conn, monkeypatch, tmp_path
+    ):
+        _portal(monkeypatch, ["id"], [23])
+
+        async def fetch(portal, max_rows):
+            for i in range(3):
+                # Both exports are writing their files at the same time.
+                await asyncio.sleep(0)
+                yield [[i]]
+
+        monkeypatch.setattr(export, "fetch_batches", fetch)
+        target = tmp_path / "x.csv"
+
+        outcomes = await asyncio.gather(
+            export_query(conn, "SELECT id FROM t", target, "csv"),
+            export_query(conn, "SELECT id FROM t", target, "csv"),
+            return_exceptions=True,
+        )
+
+        assert sorted(type(o).__name__ for o in outcomes) == [
+            "ExportResult",
+            "FileExistsError",
+        ]
+        assert target.read_text() == "id\n0\n1\n2\n"
+        assert list(tmp_path.iterdir()) == [target]
+        assert target.stat().st_mode & 0o777 == 0o666 & ~export._UMASK
+
+    async def test_overwrite_replaces_existing_file(self, conn, monkeypatch, tmp_path):
+        _portal(monkeypatch, ["id"], [23])
+        monkeypatch.setattr(export, "fetch_batches", _batches([(1,)]))
+        target = tmp_path / "x.csv"
+        target.write_text("old")
+
+        with pytest.raises(FileExistsError):
+            await export_query(conn, "SELECT id FROM t", target, "csv")
+        assert target.read_text() == "old"
+        await export_query(conn, "SELECT id FROM t", target, "csv", overwrite=True)
+
+        assert target.read_text() == "id\n1\n"
+        assert list(tmp_path.iterdir()) == [target]
+
+
+class TestReadExport:
+    def test_small_file_read_as_text_or_bytes(self, tmp_path):
+        (tmp_path / "a.csv").write_text("id\n1\n")
+        (tmp_path / "a.fgb").write_bytes(MAGIC)
+
+        assert read_export(str(tmp_path), "a.csv") == ("id\n1\n", "text/csv")
+        assert read_export(str(tmp_path), "a.fgb") == (
+            MAGIC,
+            "application/flatgeobuf",
+        )
+
+    def test_large_file_points_to_download(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(export_tools, "RESOURCE_MAX_BYTES", 4)
+        (tmp_path / "a.csv").write_text("id\n1\n")
+
+        with pytest.raises(ValueError, match="download it from /exports/a.csv"):
+            read_export(str(tmp_path), "a.csv")
+        assert locate_export(str(tmp_path), "a.csv") == (
+            tmp_path.resolve() / "a.csv",
+            "csv",
+        )
+
+    @pytest.mark.parametrize("path", ["missing.csv", "a.txt", "../a.csv"])
+    def test_unknown_file_rejected(self, tmp_path, path):
+        (tmp_path / "a.txt").write_text("x")
+        with pytest.raises(ValueError):
+            locate_export(str(tmp_path), path)
@@ -0,0 +1,113 @@
+"""Unit tests for src.services.extent — extent estimates and ExtentCache."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+from src.models.catalog import ColumnMetadata, TableMetadata
+from src.services import extent
+from src.services.extent import (
+    ExtentCache,
+    SpatialExtent,
+    estimated_extent,
+    exact_extent,
+)
+
+TABLE = TableMetadata(
+    table_name="parcels",
+    schema_="public",
+    estimated_rows=10,
+    columns=[
+        ColumnMetadata(
+            column_name="geom",
+            data_type="USER-DEFINED",
+            ordinal_position=1,
+            is_nullable=True,
+            column_default=None,
+            description=None,
+            geometry_type="GEOMETRY",
+            srid=4326,
+        )
+    ],
+)
+
+EXACT = SpatialExtent((0.0, 0.0, 1.0, 1.0), 2, 0.0, {"POLYGON": 2}, exact=True)
+
+
+def _conn(fetchone=None, fetchall=None):
+    cursor = AsyncMock()
+    cursor.fetchone.return_value = fetchone
+    cursor.fetchall.return_value = fetchall
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=cursor)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    conn = MagicMock()
+    conn.cursor.return_value = ctx
+    conn.execute = AsyncMock()
+    conn.transaction.return_value = ctx
+    return conn
+
+
+async def test_estimate_read_from_statistics():
+    conn = _conn(fetchone=(1200, 0.25, 1.0, 2.0, 3.0, 4.0))
+
+    result = await estimated_extent(conn, TABLE, "geom")
+
+    assert result == SpatialExtent((1.0, 2.0, 3.0, 4.0), 1200, 0.25, None, False)
+
+
+async def test_estimate_without_statistics_is_unknown():
+    conn = _conn(fetchone=(-1, None, None, None, None, None))
+
+    result = await estimated_extent(conn, TABLE, "geom")
+
+    assert result.extent is None
+    assert result.rows is None
+
+
+async def test_exact_extent_merges_geometry_types():
+    conn = _conn(
+        fetchall=[
+            ("POLYGON", 3, 0.0, 0.0, 2.0, 1.0),
+            ("MULTIPOLYGON", 5, -1.0, 0.5, 1.0, 4.0),
+            (None, 2, None, None, None, None),
+        ]
+    )
+
+    result = await exact_extent(conn, TABLE, "geom", timeout=5)
+
+    assert result.extent == (-1.0, 0.0, 2.0, 4.0)
+    assert result.rows == 10
+    assert result.null_fraction == 0.2
+    assert list(result.geometry_types) == ["MULTIPOLYGON", "POLYGON"]
+    assert result.exact
+
+
+async def test_exact_extent_cached_while_table_unchanged(monkeypatch):
+    versions = AsyncMock(return_value=(("public", "parcels", 1, 5),))
+    compute = AsyncMock(return_value=EXACT)
+    monkeypatch.setattr(extent, "table_versions", versions)
+    monkeypatch.setattr(extent, "exact_extent", compute)
+    cache = ExtentCache(max_bytes=1 << 20, ttl=60)
+
+    first = await cache.get_or_compute(None, TABLE, "geom")
+    second = await cache.get_or_compute(None, TABLE, "geom")
+
+    assert first is second
+    compute.assert_awaited_once()
+
+
+async def test_modified_table_recomputes_extent(monkeypatch):
+    versions = AsyncMock(
+        side_effect=[(("public", "parcels", 1, 5),), (("public", "parcels", 1, 6),)]
+    )
+    compute = AsyncMock(return_value=EXACT)
+    monkeypatch.setattr(extent, "table_versions", versions)
+    monkeypatch.setattr(extent, "exact_extent", compute)
+    cache = ExtentCache(max_bytes=1 << 20, ttl=60)
+
+    await cache.get_or_compute(None, TABLE, "geom")
+    await cache.get_or_compute(None, TABLE, "geom")
+
+    assert compute.await_count == 2
+    assert cache.stats()["invalidations"] == 1
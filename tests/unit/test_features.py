@@ -0,0 +1,64 @@
+"""Unit tests for src.services.features — bounding-box queries."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.models.catalog import ColumnMetadata, TableMetadata
+from src.services.features import bbox_query, check_bbox, pixel_size
+
+
+def _column(name: str, geometry_type: str | None = None) -> ColumnMetadata:
+    return ColumnMetadata(
+        column_name=name,
+        data_type="USER-DEFINED" if geometry_type else "text",
+        ordinal_position=1,
+        is_nullable=True,
+        column_default=None,
+        description=None,
+        geometry_type=geometry_type,
+        srid=2039 if geometry_type else None,
+    )
+
+
+GEOM = _column("geom", "MULTIPOLYGON")
+TABLE = TableMetadata(
+    table_name="polygons",
+    schema_="remez1",
+    estimated_rows=100,
+    columns=[_column("name"), GEOM],
+)
+
+
+def test_filter_keeps_column_untransformed_for_index():
+    sql = bbox_query(None, TABLE, GEOM, ["name"])
+
+    assert 'FROM "remez1"."polygons" AS t' in sql
+    assert 'WHERE t."geom" && bbox.env AND ST_Intersects(t."geom", bbox.env)' in sql
+    assert "ST_Transform(\n        ST_MakeEnvelope" in sql
+    assert sql.lstrip().startswith('SELECT t."geom" AS "geom", t."name"\n')
+
+
+def test_layer_geometry_selected_before_other_geometry_columns():
+    sql = bbox_query(None, TABLE, GEOM, ["centroid", "name"])
+
+    assert sql.lstrip().startswith('SELECT t."geom" AS "geom", t."centroid", t."name"')
+
+
+def test_zoom_simplifies_geometry():
+    sql = bbox_query(None, TABLE, GEOM, [], zoom=12)
+
+    assert 'ST_SimplifyPreserveTopology(t."geom", %(pixel_metres)s' in sql
+    assert "WHERE srid = 2039" in sql
+
+
+def test_pixel_size_halves_per_zoom():
+    assert pixel_size(0) == pytest.approx(156543.03, rel=1e-6)
+    assert pixel_size(1) == pixel_size(0) / 2
+    with pytest.raises(ValueError):
+        pixel_size(31)
+
+
+def test_empty_bbox_rejected():
+    with pytest.raises(ValueError, match="minx < maxx"):
+        check_bbox(1, 0, 1, 5)
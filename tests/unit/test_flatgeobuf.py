@@ -0,0 +1,159 @@
+"""Unit tests for src.services.flatgeobuf — FlatGeobuf encoding and index."""
+
+from __future__ import annotations
+
+import io
+import struct
+
+import pytest
+
+from src.services.flatgeobuf import (
+    INDEX_NODE_SIZE,
+    MAGIC,
+    FlatGeobufWriter,
+    hilbert,
+    hilbert_order,
+    level_bounds,
+)
+
+
+def _field(buffer: bytes, table: int, slot: int) -> int | None:
+    """Position of a table field in a FlatBuffers buffer, None if absent."""
+    (vtable_offset,) = struct.unpack_from("<i", buffer, table)
+    vtable = table - vtable_offset
+    (vtable_size,) = struct.unpack_from("<H", buffer, vtable)
+    if 4 + 2 * slot >= vtable_size:
+        return None
+    (position,) = struct.unpack_from("<H", buffer, vtable + 4 + 2 * slot)
+    return table + position if position else None
+
+
+def _deref(buffer: bytes, position: int) -> int:
+    (offset,) = struct.unpack_from("<I", buffer, position)
+    return position + offset
+
+
+def _write(features) -> bytes:
+    out = io.BytesIO()
+    writer = FlatGeobufWriter(out, "test", [("id", 23), ("name", 25)])
+    for geometry, properties in features:
+        writer.add(geometry, properties)
+    assert writer.close() == len(out.getvalue())
+    return out.getvalue()
+
+
+def _header(data: bytes) -> tuple[bytes, int, int]:
+    """Return the header buffer, its root table and where the index starts."""
+    assert data[:8] == MAGIC
+    (size,) = struct.unpack_from("<I", data, 8)
+    header = data[12 : 12 + size]
+    return header, _deref(header, 0), 12 + size
+
+
+def _point(x: float, y: float) -> dict[str, object]:
+    return {"type": "Point", "coordinates": [x, y]}
+
+
+class TestLevelBounds:
+    def test_single_item_still_has_root(self):
+        assert level_bounds(1, 16) == [(1, 2), (0, 1)]
+
+    def test_full_node(self):
+        assert level_bounds(16, 16) == [(1, 17), (0, 1)]
+
+    def test_two_levels_above_leaves(self):
+        assert level_bounds(17, 16) == [(3, 20), (1, 3), (0, 1)]
+
+
+class TestHilbert:
+    def test_origin_is_start_of_curve(self):
+        assert hilbert(0, 0) == 0
+
+    def test_distinct_cells_have_distinct_positions(self):
+        cells = [(x, y) for x in range(0, 65536, 4369) for y in range(0, 65536, 4369)]
+        assert len({hilbert(x, y) for x, y in cells}) == len(cells)
+
+    def test_order_puts_empty_boxes_first(self):
+        inf = float("inf")
+        bounds = [5, 5, 5, 5, inf, inf, -inf, -inf, 0, 0, 0, 0]
+        assert hilbert_order(bounds, (0, 0, 5, 5))[0] == 1
+
+
+class TestFlatGeobufWriter:
+    def test_header_counts_features_and_names_columns(self):
+        data = _write([(_point(1, 2), [1, "a"]), (_point(3, 4), [2, None])])
+        header, root, _ = _header(data)
+
+        count = _field(header, root, 8)
+        geometry_type = _field(header, root, 2)
+        assert struct.unpack_from("<Q", header, count)[0] == 2
+        assert header[geometry_type] == 1
+        columns = _deref(header, _field(header, root, 7))
+        assert struct.unpack_from("<I", header, columns)[0] == 2
+
+    def test_envelope_covers_all_geometries(self):
+        polygon = {"type": "Polygon", "coordinates": [[[0, 0], [4, 0], [4, 3], [0, 0]]]}
+        data = _write([(polygon, [1, "a"]), (_point(-1, 5), [2, "b"])])
+        header, root, _ = _header(data)
+
+        envelope = _deref(header, _field(header, root, 1))
+        assert struct.unpack_from("<4d", header, envelope + 4) == (-1, 0, 4, 5)
+
+    def test_mixed_geometry_types_are_unknown(self):
+        line = {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}
+        data = _write([(_point(0, 0), [1, "a"]), (line, [2, "b"])])
+        header, root, _ = _header(data)
+
+        assert header[_field(header, root, 2)] == 0
+
+    @pytest.mark.parametrize("count", [1, 16, 17, 300])
+    def test_index_leaves_point_at_features(self, count):
+        features = [(_point(i % 17, i // 17), [i, None]) for i in range(count)]
+        data = _write(features)
+        _, _, index = _header(data)
+
+        levels = level_bounds(count, INDEX_NODE_SIZE)
+        nodes = levels[0][1]
+        features_start = index + 40 * nodes
+        leaf_ids = []
+        for n in range(*levels[0]):
+            *box, offset = struct.unpack_from("<4dQ", data, index + 40 * n)
+            assert box[0] == box[2] and box[1] == box[3]
+            feature = features_start + offset
+            (size,) = struct.unpack_from("<I", data, feature)
+            buffer = data[feature + 4 : feature + 4 + size]
+            properties = _deref(buffer, _field(buffer, _deref(buffer, 0), 1))
+            leaf_ids.append(struct.unpack_from("<Hi", buffer, properties + 4)[1])
+        assert sorted(leaf_ids) == list(range(count))
+
+    @pytest.mark.parametrize("count", [17, 300])
+    def test_parent_nodes_cover_their_children(self, count):
+        data = _write([(_point(i % 17, i // 17), [i, None]) for i in range(count)])
+        _, _, index = _header(data)
+
+        def node(n):
+            return struct.unpack_from("<4dQ", data, index + 40 * n)
+
+        levels = level_bounds(count, INDEX_NODE_SIZE)
+        for (_, child_end), (start, end) in zip(levels, levels[1:]):
+            for n in range(start, end):
+                *box, first = node(n)
+                last = min(first + INDEX_NODE_SIZE, child_end)
+                children = [node(c) for c in range(first, last)]
+                assert box[0] == min(c[0] for c in children)
+                assert box[2] == max(c[2] for c in children)
+
+    def test_empty_result_has_no_index(self):
+        data = _write([])
+        header, root, index = _header(data)
+
+        assert struct.unpack_from("<H", header, _field(header, root, 9))[0] == 0
+        assert len(data) == index
+
+    def test_empty_geometry_written_without_geometry(self):
+        data = _write([({"type": "Point", "coordinates": []}, [1, "a"])])
+        _, _, index = _header(data)
+
+        feature = index + 40 * 2
+        buffer = data[feature + 4 :]
+        assert _field(buffer, _deref(buffer, 0), 0) is None
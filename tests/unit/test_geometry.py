@@ -0,0 +1,225 @@
+"""Unit tests for src.services.geometry — EWKB decoding and type registration."""
+
+from __future__ import annotations
+
+import struct
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.services.geometry import (
+    GeometryBinaryLoader,
+    GeometryTextLoader,
+    UnsupportedGeometryError,
+    check_precision,
+    ewkb_to_geojson,
+    geojson_to_wkt,
+    reduce_coordinates,
+    register_geometry_types,
+)
+
+# SELECT 'SRID=4326;POINT(1 2)'::geometry
+POINT_4326_HEX = "0101000020E6100000000000000000F03F0000000000000040"
+
+
+def _wkb(type_code: int, body: bytes) -> bytes:
+    return struct.pack("<BI", 1, type_code) + body
+
+
+def _ring(points: list[tuple[float, float]]) -> bytes:
+    return struct.pack("<I", len(points)) + b"".join(
+        struct.pack("<2d", *p) for p in points
+    )
+
+
+class TestEwkbToGeojson:
+    """Tests for ewkb_to_geojson()."""
+
+    def test_point_with_default_srid(self):
+        geometry = ewkb_to_geojson(bytes.fromhex(POINT_4326_HEX))
+        assert geometry == {"type": "Point", "coordinates": [1.0, 2.0]}
+
+    def test_big_endian_linestring(self):
+        data = struct.pack(">BII4d", 0, 2, 2, 0.0, 0.0, 1.0, 1.0)
+        assert ewkb_to_geojson(data) == {
+            "type": "LineString",
+            "coordinates": [[0.0, 0.0], [1.0, 1.0]],
+        }
+
+    def test_polygon_with_srid_reports_crs(self):
+        ring = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 0.0)]
+        data = struct.pack("<BII", 1, 3 | 0x20000000, 2039) + struct.pack("<I", 1)
+        data += _ring(ring)
+        geometry = ewkb_to_geojson(data)
+        assert geometry["type"] == "Polygon"
+        assert geometry["coordinates"] == [[list(p) for p in ring]]
+        assert geometry["crs"] == {"type": "name", "properties": {"name": "EPSG:2039"}}
+
+    def test_point_z_keeps_z_and_drops_m(self):
+        data = struct.pack("<BI4d", 1, 1 | 0x80000000 | 0x40000000, 1, 2, 3, 4)
+        assert ewkb_to_geojson(data)["coordinates"] == [1.0, 2.0, 3.0]
+
+    def test_iso_wkb_z_point(self):
+        data = struct.pack("<BI3d", 1, 1001, 1, 2, 3)
+        assert ewkb_to_geojson(data)["coordinates"] == [1.0, 2.0, 3.0]
+
+    def test_multipolygon(self):
+        ring = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0), (0.0, 0.0)]
+        polygon = _wkb(3, struct.pack("<I", 1) + _ring(ring))
+        data = _wkb(6, struct.pack("<I", 2) + polygon + polygon)
+        geometry = ewkb_to_geojson(data)
+        assert geometry["type"] == "MultiPolygon"
+        assert len(geometry["coordinates"]) == 2
+
+    def test_geometry_collection(self):
+        point = _wkb(1, struct.pack("<2d", 5, 6))
+        data = _wkb(7, struct.pack("<I", 1) + point)
+        assert ewkb_to_geojson(data) == {
+            "type": "GeometryCollection",
+            "geometries": [{"type": "Point", "coordinates": [5.0, 6.0]}],
+        }
+
+    def test_empty_point(self):
+        data = _wkb(1, struct.pack("<2d", float("nan"), float("nan")))
+        assert ewkb_to_geojson(data) == {"type": "Point", "coordinates": []}
+
+    def test_curve_types_unsupported(self):
+        with pytest.raises(UnsupportedGeometryError):
+            ewkb_to_geojson(_wkb(8, struct.pack("<I", 0)))
+
+
+class TestGeojsonToWkt:
+    def test_point(self):
+        assert geojson_to_wkt({"type": "Point", "coordinates": [1.5, 2.0]}) == (
+            "POINT (1.5 2.0)"
+        )
+
+    def test_polygon_with_z(self):
+        ring = [[0.0, 0.0, 1.0], [1.0, 0.0, 1.0], [0.0, 0.0, 1.0]]
+        assert geojson_to_wkt({"type": "Polygon", "coordinates": [ring]}) == (
+            "POLYGON Z ((0.0 0.0 1.0, 1.0 0.0 1.0, 0.0 0.0 1.0))"
+        )
+
+    def test_multipolygon(self):
+        square = [[[0, 0], [1, 0], [0, 0]]]
+        geometry = {"type": "MultiPolygon", "coordinates": [square, square]}
+        assert geojson_to_wkt(geometry) == (
+            "MULTIPOLYGON (((0 0, 1 0, 0 0)), ((0 0, 1 0, 0 0)))"
+        )
+
+    def test_collection_and_empty_members(self):
+        geometry = {
+            "type": "GeometryCollection",
+            "geometries": [
+                {"type": "Point", "coordinates": [1, 2]},
+                {"type": "LineString", "coordinates": []},
+            ],
+        }
+        assert geojson_to_wkt(geometry) == (
+            "GEOMETRYCOLLECTION (POINT (1 2), LINESTRING EMPTY)"
+        )
+
+
+class TestLoaders:
+    """Tests for the psycopg loaders."""
+
+    def test_text_loader_decodes_hex(self):
+        loader = GeometryTextLoader(0)
+        assert loader.load(POINT_4326_HEX.encode()) == {
+            "type": "Point",
+            "coordinates": [1.0, 2.0],
+        }
+
+    def test_binary_loader_decodes_bytes(self):
+        loader = GeometryBinaryLoader(0)
+        assert loader.load(bytes.fromhex(POINT_4326_HEX))["type"] == "Point"
+
+    def test_unsupported_type_falls_back_to_hex(self):
+        loader = GeometryTextLoader(0)
+        curve_hex = _wkb(8, struct.pack("<I", 0)).hex().upper()
+        assert loader.load(curve_hex.encode()) == curve_hex
+
+
+async def test_register_geometry_types_queries_once_per_connection():
+    cursor = AsyncMock()
+    cursor.fetchall.return_value = [(16400, "geometry"), (16900, "geography")]
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=cursor)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    conn = MagicMock()
+    conn.cursor.return_value = ctx
+
+    first = await register_geometry_types(conn)
+    second = await register_geometry_types(conn)
+
+    assert first == second == frozenset({16400, 16900})
+    cursor.execute.assert_awaited_once()
+    assert conn.adapters.register_loader.call_count == 4
+
+
+def _describing_conn(columns):
+    """A connection whose cursor describes columns as (name, type_code)."""
+    cursor = AsyncMock()
+    cursor.description = [MagicMock(type_code=oid) for _, oid in columns]
+    for column, (name, _) in zip(cursor.description, columns):
+        column.name = name
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=cursor)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    conn = MagicMock()
+    conn.cursor.return_value = ctx
+    return conn, cursor
+
+
+class TestReduceCoordinates:
+    @pytest.fixture(autouse=True)
+    def geometry_oids(self, monkeypatch):
+        from psycopg import sql as pgsql
+
+        from src.services import geometry
+
+        async def registered(conn):
+            geometry._geography[conn] = frozenset({16900})
+            return frozenset({16400, 16900})
+
+        monkeypatch.setattr(geometry, "register_geometry_types", registered)
+        # Render composed SQL without a real connection to quote against.
+        monkeypatch.setattr(
+            pgsql.Composable, "as_string", lambda self, context=None: repr(self)
+        )
+
+    async def test_geometry_columns_snapped_and_rounded(self):
+        conn, cursor = _describing_conn([("id", 23), ("geom", 16400), ("id", 23)])
+        sql = await reduce_coordinates(conn, "SELECT * FROM t;", None, 2, 0.5)
+
+        assert "LIMIT 0" in repr(cursor.execute.call_args.args[0])
+        assert "ST_ReducePrecision" in sql
+        assert "ST_AsGeoJSON" in sql
+        # Duplicate output names survive through positional aliases.
+        assert sql.count("Identifier('id')") == 2
+        assert "Identifier('c2')" in sql
+
+    async def test_geography_not_snapped(self):
+        conn, _ = _describing_conn([("geog", 16900)])
+        sql = await reduce_coordinates(conn, "SELECT * FROM t", quantize=0.5)
+        assert "ST_ReducePrecision" not in sql
+
+    async def test_other_columns_untouched(self):
+        conn, _ = _describing_conn([("name", 25)])
+        sql = await reduce_coordinates(conn, "SELECT * FROM t", precision=3)
+        assert "ST_AsGeoJSON" not in sql
+
+
+class TestCheckPrecision:
+    def test_accepts_valid_options(self):
+        check_precision(6, 0.01)
+        check_precision(None, None)
+
+    @pytest.mark.parametrize("precision", [-1, 16])
+    def test_rejects_precision_out_of_range(self, precision):
+        with pytest.raises(ValueError, match="precision"):
+            check_precision(precision, None)
+
+    def test_rejects_non_positive_quantize(self):
+        with pytest.raises(ValueError, match="quantize"):
+            check_precision(None, 0)
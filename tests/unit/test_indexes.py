@@ -0,0 +1,156 @@
+"""Unit tests for src.services.indexes — index report findings and bloat."""
+
+from __future__ import annotations
+
+from src.services.indexes import estimate_index_pages, table_report
+
+
+def _index(name, method="btree", columns=("id",), **overrides):
+    index = {
+        "index_name": name,
+        "quoted_name": f"public.{name}",
+        "method": method,
+        "columns": list(columns),
+        "key_width": 4,
+        "opclasses": ["int4_ops"],
+        "definition": f"CREATE INDEX {name} ON public.t USING {method} (...)",
+        "is_unique": False,
+        "is_primary": False,
+        "is_valid": True,
+        "is_partial": False,
+        "enforces_constraint": False,
+        "size_bytes": 8192,
+        "pages": 1,
+        "fillfactor": None,
+        "scans": 5,
+    }
+    index.update(overrides)
+    return index
+
+
+def _table(indexes=(), geometry_columns=(), **overrides):
+    table = {
+        "table": "t",
+        "quoted_name": "public.t",
+        "reltuples": 1000.0,
+        "size_bytes": 65536,
+        "seq_scans": 1,
+        "index_scans": 9,
+        "live_tuples": 1000,
+        "dead_tuples": 0,
+        "indexes": list(indexes),
+        "geometry_columns": list(geometry_columns),
+    }
+    table.update(overrides)
+    return table
+
+
+GEOM = {
+    "column_name": "geom",
+    "quoted_name": "geom",
+    "geometry_type": "POLYGON",
+    "srid": 4326,
+}
+
+
+def _kinds(report):
+    return [finding.kind for finding in report.findings]
+
+
+class TestEstimateIndexPages:
+    def test_btree_leaves_plus_root_and_metapage(self):
+        # 16-byte tuples + line pointers, 367 per page at fillfactor 90.
+        assert estimate_index_pages(100_000, 4, "btree") == 273 + 1 + 1 + 1
+
+    def test_fillfactor_leaves_room(self):
+        full = estimate_index_pages(100_000, 4, "btree", fillfactor=100)
+        assert full < estimate_index_pages(100_000, 4, "btree", fillfactor=50)
+
+    def test_small_index_is_one_page(self):
+        assert estimate_index_pages(10, 16, "gist") == 1
+
+    def test_other_methods_not_estimated(self):
+        assert estimate_index_pages(100_000, 4, "brin") is None
+
+
+class TestTableReport:
+    def test_geometry_without_spatial_index(self):
+        report = table_report(_table(geometry_columns=[GEOM]), 8192)
+
+        assert report.geometry_columns[0].spatial_index is None
+        (finding,) = report.findings
+        assert finding.kind == "missing_spatial_index"
+        assert finding.suggestion == (
+            "CREATE INDEX CONCURRENTLY ON public.t USING gist (geom)"
+        )
+
+    def test_gist_index_covers_geometry(self):
+        gist = _index("t_gix", "gist", ["geom"], opclasses=["gist_geometry_ops_2d"])
+        report = table_report(_table([gist], [GEOM]), 8192)
+
+        assert report.geometry_columns[0].spatial_index == "t_gix"
+        assert report.findings == []
+        assert report.indexes[0].estimated_bloat_ratio == 0
+
+    def test_partial_or_invalid_index_does_not_count(self):
+        indexes = [
+            _index("a", "gist", ["geom"], is_partial=True),
+            _index("b", "gist", ["geom"], is_valid=False),
+        ]
+        report = table_report(_table(indexes, [GEOM]), 8192)
+
+        assert report.geometry_columns[0].spatial_index is None
+        assert _kinds(report) == ["missing_spatial_index", "invalid_index"]
+
+    def test_unused_index_but_not_constraint_or_unique(self):
+        indexes = [
+            _index("unused", scans=0),
+            _index("pkey", scans=0, is_unique=True, is_primary=True),
+            _index("excl", "gist", scans=0, enforces_constraint=True),
+        ]
+        report = table_report(_table(indexes), 8192)
+
+        (finding,) = report.findings
+        assert finding.kind == "unused_index"
+        assert finding.suggestion == "DROP INDEX CONCURRENTLY public.unused"
+
+    def test_bloated_index(self):
+        index = _index("bloated", pages=1000, size_bytes=1000 * 8192)
+        report = table_report(_table([index], reltuples=100_000.0), 8192)
+
+        usage = report.indexes[0]
+        assert usage.estimated_bloat_ratio > 0.7
+        assert usage.estimated_bloat_bytes == (1000 - 276) * 8192
+        assert _kinds(report) == ["bloated_index"]
+
+    def test_no_bloat_estimate_without_statistics(self):
+        indexes = [_index("expr", key_width=None), _index("never", pages=0)]
+        report = table_report(_table(indexes, reltuples=-1.0), 8192)
+
+        assert report.estimated_rows is None
+        assert all(i.estimated_bloat_ratio is None for i in report.indexes)
+
+    def test_seq_scans_on_large_table(self):
+        large = table_report(
+            _table(reltuples=50_000.0, seq_scans=30, index_scans=10), 8192
+        )
+        small = table_report(_table(seq_scans=30, index_scans=10), 8192)
+
+        assert large.seq_scan_ratio == 0.75
+        assert _kinds(large) == ["high_seq_scan_ratio"]
+        assert small.findings == []
+
+    def test_dead_tuples(self):
+        report = table_report(_table(live_tuples=3000, dead_tuples=2000), 8192)
+
+        assert report.dead_tuple_ratio == 0.4
+        assert report.findings[0].suggestion == "VACUUM (ANALYZE) public.t"
+
+    def test_no_statistics_no_ratios(self):
+        table = _table(
+            seq_scans=None, index_scans=None, live_tuples=None, dead_tuples=None
+        )
+        report = table_report(table, 8192)
+
+        assert report.seq_scan_ratio is None
+        assert report.dead_tuple_ratio is None
@@ -4,11 +4,19 @@ from __future__ import annotations
 
 import logging
 
+import pytest
 import structlog
 
 from src.config.logging import setup_logging
 
 
+@pytest.fixture(autouse=True)
+def _reset_structlog():
+    """Drop the capsys-bound configuration so later tests can still log."""
+    yield
+    structlog.reset_defaults()
+
+
 def test_structlog_configured_after_setup(capsys):
     setup_logging(level=logging.INFO)
     log = structlog.get_logger("test_configured")
@@ -0,0 +1,88 @@
+"""Unit tests for src.services.metrics — tool call histograms and phases."""
+
+from __future__ import annotations
+
+import asyncio
+
+from fastmcp import Client, FastMCP
+
+from src.services.metrics import (
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    ToolMetrics,
+    handler_done,
+    phase,
+    record_rows,
+)
+
+
+def _sample_lines(metric) -> list[str]:
+    registry = ToolMetrics()
+    registry.metrics = [metric]
+    return registry.render().splitlines()
+
+
+class TestRender:
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency.", (0.1, 1.0), ("tool",))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, "query")
+
+        assert _sample_lines(histogram) == [
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{tool="query",le="0.1"} 1',
+            'latency_seconds_bucket{tool="query",le="1"} 3',
+            'latency_seconds_bucket{tool="query",le="+Inf"} 4',
+            'latency_seconds_sum{tool="query"} 4.05',
+            'latency_seconds_count{tool="query"} 4',
+        ]
+
+    def test_counter_total_and_label_escaping(self):
+        counter = Counter("calls", "Calls.", ("tool",))
+        counter.inc('a"b\\c')
+        counter.inc('a"b\\c')
+
+        assert _sample_lines(counter)[2] == 'calls_total{tool="a\\"b\\\\c"} 2'
+
+
+class TestPhase:
+    def test_nothing_recorded_outside_a_tool_call(self):
+        with phase("execution"):
+            record_rows(3, False)
+            handler_done()
+
+
+class TestMetricsMiddleware:
+    async def test_phases_rows_and_outcomes_per_tool(self):
+        metrics = ToolMetrics()
+        server = FastMCP("test")
+        server.add_middleware(MetricsMiddleware(metrics))
+
+        @server.tool()
+        async def query() -> dict[str, object]:
+            for _ in range(2):
+                with phase("execution"):
+                    await asyncio.sleep(0.01)
+            record_rows(5, True)
+            handler_done()
+            return {"rows": [[1]] * 5}
+
+        @server.tool()
+        async def broken() -> str:
+            raise ValueError("no")
+
+        async with Client(server) as client:
+            await client.call_tool("query", {})
+            await client.call_tool("broken", {}, raise_on_error=False)
+
+        assert metrics.calls.values == {("query", "ok"): 1, ("broken", "error"): 1}
+        phases = metrics.phases.values
+        assert set(phases) == {("query", "execution"), ("query", "serialization")}
+        counts, total = phases[("query", "execution")]
+        assert sum(counts) == 1 and total[0] >= 0.02
+        assert metrics.rows.values[("query",)][1] == [5.0]
+        assert metrics.truncated.values == {("query",): 1}
+        assert ("query",) in metrics.response_bytes.values
+        assert ("broken",) not in metrics.response_bytes.values
@@ -0,0 +1,103 @@
+"""Unit tests for src.services.pagination — CursorStore."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.services.pagination import CursorStore, OpenCursor
+
+
+def _entry(conn: MagicMock | None = None) -> OpenCursor:
+    conn = conn or MagicMock(closed=False, execute=AsyncMock())
+    portal = MagicMock(conn=conn, close=AsyncMock())
+    return OpenCursor(portal=portal, row_limit=10, owns_transaction=True)
+
+
+@pytest.fixture
+def _release() -> AsyncMock:
+    return AsyncMock()
+
+
+async def test_take_returns_registered_entry(_release):
+    store = CursorStore(ttl=60, max_open=2, release=_release)
+    entry = _entry()
+
+    token = await store.register(entry)
+
+    assert store.holds(entry.portal.conn)
+    assert await store.take(token) is entry
+    assert not store.holds(entry.portal.conn)
+
+
+async def test_unknown_token_rejected(_release):
+    store = CursorStore(ttl=60, max_open=2, release=_release)
+
+    with pytest.raises(ValueError, match="continuation token"):
+        await store.take("missing")
+
+
+async def test_expired_entry_is_closed_and_released(_release):
+    store = CursorStore(ttl=0.01, max_open=2, release=_release)
+    entry = _entry()
+    token = await store.register(entry)
+    await asyncio.sleep(0.02)
+
+    with pytest.raises(ValueError):
+        await store.take(token)
+
+    entry.portal.close.assert_awaited_once()
+    entry.portal.conn.execute.assert_awaited_once_with("COMMIT")
+    _release.assert_awaited_once_with(entry.portal.conn)
+
+
+async def test_register_beyond_limit_evicts_oldest(_release):
+    store = CursorStore(ttl=60, max_open=1, release=_release)
+    first, second = _entry(), _entry()
+
+    first_token = await store.register(first)
+    await store.register(second)
+
+    assert store.stats()["open_cursors"] == 1
+    _release.assert_awaited_once_with(first.portal.conn)
+    with pytest.raises(ValueError):
+        await store.take(first_token)
+
+
+async def test_close_without_release_keeps_connection(_release):
+    store = CursorStore(ttl=60, max_open=2, release=_release)
+    entry = _entry()
+
+    await store.close(entry, release=False)
+
+    entry.portal.close.assert_awaited_once()
+    _release.assert_not_awaited()
+
+
+async def test_discard_closes_registered_entry(_release):
+    store = CursorStore(ttl=60, max_open=2, release=_release)
+    entry = _entry()
+    token = await store.register(entry)
+
+    await store.discard(token, release=False)
+    await store.discard(token)
+
+    entry.portal.close.assert_awaited_once()
+    _release.assert_not_awaited()
+    assert store.stats()["open_cursors"] == 0
+
+
+async def test_sweep_forever_closes_expired_entries_unprompted(_release):
+    store = CursorStore(ttl=0.02, max_open=2, release=_release)
+    entry = _entry()
+    await store.register(entry)
+
+    sweeper = asyncio.create_task(store.sweep_forever())
+    await asyncio.sleep(0.05)
+    sweeper.cancel()
+
+    entry.portal.close.assert_awaited_once()
+    _release.assert_awaited_once_with(entry.portal.conn)
+    assert store.stats()["open_cursors"] == 0
@@ -0,0 +1,243 @@
+"""Unit tests for src.services.pool — ConnectionPool."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import psycopg
+import pytest
+from psycopg.pq import TransactionStatus
+
+from src.config.settings import Settings
+from src.services.pool import ConnectionPool, PoolTimeout
+
+
+def _make_conn() -> MagicMock:
+    conn = MagicMock()
+    conn.closed = False
+    conn.info.transaction_status = TransactionStatus.IDLE
+    conn.execute = AsyncMock()
+    conn.rollback = AsyncMock()
+    conn.close = AsyncMock()
+    return conn
+
+
+def _settings(**overrides: object) -> Settings:
+    values: dict[str, object] = {
+        "host": "localhost",
+        "port": 5432,
+        "user": "u",
+        "dbname": "db",
+        "pool_min_size": 0,
+        "pool_max_size": 2,
+        "pool_timeout": 0.05,
+    }
+    values.update(overrides)
+    return Settings(**values)
+
+
+@pytest.fixture
+def _connect():
+    with patch(
+        "src.services.pool.create_connection",
+        new_callable=AsyncMock,
+        side_effect=lambda _settings: _make_conn(),
+    ) as mock_connect:
+        yield mock_connect
+
+
+async def test_released_connection_is_reused(_connect):
+    pool = ConnectionPool(_settings())
+
+    first = await pool.acquire()
+    await pool.release(first)
+    second = await pool.acquire()
+
+    assert second is first
+    assert _connect.await_count == 1
+
+
+async def test_concurrent_acquires_get_distinct_connections(_connect):
+    pool = ConnectionPool(_settings())
+
+    first, second = await asyncio.gather(pool.acquire(), pool.acquire())
+
+    assert first is not second
+    assert pool.stats()["pool_in_use"] == 2
+
+
+async def test_exhausted_pool_times_out(_connect):
+    pool = ConnectionPool(_settings(pool_max_size=1))
+    await pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        await pool.acquire()
+
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["requests_waiting"] == 1
+
+
+async def test_waiter_gets_connection_on_release(_connect):
+    pool = ConnectionPool(_settings(pool_max_size=1, pool_timeout=1.0))
+    held = await pool.acquire()
+
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0)
+    await pool.release(held)
+
+    assert await waiter is held
+
+
+async def test_failed_health_check_replaces_connection(_connect):
+    pool = ConnectionPool(_settings())
+    stale = await pool.acquire()
+    await pool.release(stale)
+    stale.execute.side_effect = psycopg.OperationalError("server closed")
+
+    fresh = await pool.acquire()
+
+    assert fresh is not stale
+    stale.close.assert_awaited_once()
+    assert pool.stats()["health_check_failures"] == 1
+
+
+async def test_connection_in_failed_transaction_is_rolled_back(_connect):
+    pool = ConnectionPool(_settings())
+    conn = await pool.acquire()
+    conn.info.transaction_status = TransactionStatus.INERROR
+
+    await pool.release(conn)
+
+    conn.rollback.assert_awaited_once()
+    assert pool.stats()["pool_available"] == 1
+
+
+async def test_expired_connection_is_not_reused(_connect):
+    pool = ConnectionPool(_settings(pool_max_lifetime=0.01))
+    old = await pool.acquire()
+    await pool.release(old)
+    await asyncio.sleep(0.02)
+
+    new = await pool.acquire()
+
+    assert new is not old
+    old.close.assert_awaited_once()
+
+
+async def _hang(*args: object) -> None:
+    await asyncio.Event().wait()
+
+
+async def _until_called(mock: AsyncMock) -> None:
+    while not mock.called:
+        await asyncio.sleep(0)
+
+
+async def test_cancelled_health_check_frees_slot(_connect):
+    pool = ConnectionPool(_settings(pool_max_size=1, pool_check=True))
+    conn = await pool.acquire()
+    await pool.release(conn)
+    conn.execute.side_effect = _hang
+
+    task = asyncio.create_task(pool.acquire())
+    await _until_called(conn.execute)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert pool.stats()["pool_size"] == 0
+    conn.close.assert_awaited_once()
+    assert await pool.acquire() is not conn
+
+
+
+async def test_cancelled_close_after_failed_check_frees_slot_once(_connect):
+    pool = ConnectionPool(_settings(pool_max_size=1, pool_check=True))
+    conn = await pool.acquire()
+    await pool.release(conn)
+    conn.execute.side_effect = psycopg.OperationalError("server closed")
+    conn.close.side_effect = _hang
+
+    task = asyncio.create_task(pool.acquire())
+    await _until_called(conn.close)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert pool._size == 0
+    assert pool.stats()["connections_closed"] == 1
+
+async def test_cancelled_release_frees_slot(_connect):
+    pool = ConnectionPool(_settings(pool_max_size=1))
+    conn = await pool.acquire()
+    conn.info.transaction_status = TransactionStatus.INTRANS
+    conn.rollback.side_effect = _hang
+
+    task = asyncio.create_task(pool.release(conn))
+    await _until_called(conn.rollback)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert pool.stats()["pool_size"] == 0
+    assert pool.stats()["pool_in_use"] == 0
+    conn.close.assert_awaited_once()
+
+
+async def test_stale_connection_closed_outside_lock(_connect):
+    pool = ConnectionPool(_settings(pool_max_lifetime=0.01, pool_timeout=1.0))
+    held = await pool.acquire()
+    old = await pool.acquire()
+    await pool.release(old)
+    await asyncio.sleep(0.02)
+    closing = asyncio.Event()
+    old.close.side_effect = closing.wait
+
+    acquiring = asyncio.create_task(pool.acquire())
+    await _until_called(old.close)
+    # Releasing needs the lock to wake waiters; a slow close must not hold it.
+    await asyncio.wait_for(pool.release(held), timeout=0.5)
+    closing.set()
+
+    assert await acquiring not in (old, held)
+
+
+async def test_open_prewarms_min_size(_connect):
+    pool = ConnectionPool(_settings(pool_min_size=2))
+
+    await pool.open()
+
+    stats = pool.stats()
+    assert stats["pool_size"] == 2
+    assert stats["pool_available"] == 2
+
+
+async def test_connect_failure_frees_slot(_connect):
+    pool = ConnectionPool(_settings(pool_max_size=1))
+    _connect.side_effect = psycopg.OperationalError("refused")
+
+    with pytest.raises(psycopg.OperationalError):
+        await pool.acquire()
+
+    assert pool.stats()["pool_size"] == 0
+
+
+def test_min_size_above_max_size_rejected():
+    with pytest.raises(ValueError, match="pool_min_size"):
+        _settings(pool_min_size=3, pool_max_size=2)
+
+
+async def test_close_closes_idle_and_refuses_acquire(_connect):
+    pool = ConnectionPool(_settings(pool_min_size=1))
+    await pool.open()
+    conn = await pool.acquire()
+    await pool.release(conn)
+
+    await pool.close()
+
+    conn.close.assert_awaited_once()
+    assert pool.stats()["pool_size"] == 0
+    with pytest.raises(psycopg.OperationalError, match="closed"):
+        await pool.acquire()
@@ -0,0 +1,58 @@
+"""Unit tests for src.services.prepared — PreparedStatements."""
+
+from __future__ import annotations
+
+from src.services import prepared
+from src.services.prepared import PreparedStatements
+
+
+class _Conn:
+    """Weak-referenceable connection stand-in."""
+
+
+def test_prepares_once_threshold_reached():
+    tracker = PreparedStatements(threshold=3)
+    conn = _Conn()
+
+    decisions = [tracker.should_prepare(conn, "SELECT %s") for _ in range(5)]
+
+    assert decisions == [False, False, True, True, True]
+    stats = tracker.stats()
+    assert stats["statements_prepared"] == 1
+    assert stats["prepared_hits"] == 2
+    assert stats["hit_rate"] == 0.4
+
+
+def test_counts_are_per_connection():
+    tracker = PreparedStatements(threshold=2)
+    first, second = _Conn(), _Conn()
+
+    tracker.should_prepare(first, "SELECT %s")
+    tracker.should_prepare(first, "SELECT %s")
+
+    assert tracker.should_prepare(second, "SELECT %s") is False
+    assert tracker.stats()["connections"] == 2
+
+
+def test_least_recent_shape_evicted(monkeypatch):
+    monkeypatch.setattr(prepared, "MAX_SHAPES_PER_CONNECTION", 2)
+    tracker = PreparedStatements(threshold=2)
+    conn = _Conn()
+
+    tracker.should_prepare(conn, "a")
+    tracker.should_prepare(conn, "b")
+    tracker.should_prepare(conn, "c")
+
+    # "a" was dropped, so its count starts again.
+    assert tracker.should_prepare(conn, "a") is False
+    assert tracker.stats()["tracked_shapes"] == 2
+
+
+def test_closed_connection_forgotten():
+    tracker = PreparedStatements(threshold=2)
+    conn = _Conn()
+    tracker.should_prepare(conn, "SELECT 1")
+
+    del conn
+
+    assert tracker.stats()["connections"] == 0
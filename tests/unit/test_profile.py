@@ -0,0 +1,75 @@
+"""Unit tests for src.services.profile — pg_stats column profiles."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+from src.models.catalog import ColumnMetadata, TableMetadata
+from src.services.profile import HISTOGRAM_BOUNDS, MAX_VALUE_LENGTH, profile_table
+
+
+def _column(name, position, description=None):
+    return ColumnMetadata(
+        column_name=name,
+        data_type="text",
+        ordinal_position=position,
+        is_nullable=True,
+        column_default=None,
+        description=description,
+    )
+
+
+TABLE = TableMetadata(
+    table_name="parcels",
+    schema_="public",
+    estimated_rows=0,
+    columns=[_column("gid", 1), _column("kind", 2, "Land use class"), _column("x", 3)],
+)
+
+
+def _conn(rows):
+    cursor = AsyncMock()
+    cursor.fetchall.return_value = rows
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=cursor)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    conn = MagicMock()
+    conn.cursor.return_value = ctx
+    return conn
+
+
+async def test_columns_combine_statistics_and_descriptions():
+    bounds = [str(i) for i in range(101)]
+    conn = _conn(
+        [
+            ("gid", 1000, 0.0, -1.0, 4, None, None, bounds),
+            (
+                "kind", 1000, 0.1, 3.0, 8,
+                ["park", "road", "x" * 200], [0.5, 0.3, 0.1], None,
+            ),
+        ]
+    )
+
+    profile = await profile_table(conn, TABLE)
+
+    assert profile.analyzed
+    assert profile.estimated_rows == 1000
+    gid, kind, x = profile.columns
+    assert gid.n_distinct == 1000
+    assert gid.histogram_bounds is not None
+    assert len(gid.histogram_bounds) == HISTOGRAM_BOUNDS
+    assert gid.histogram_bounds[0] == "0"
+    assert gid.histogram_bounds[-1] == "100"
+    assert kind.description == "Land use class"
+    assert kind.n_distinct == 3
+    assert kind.most_common_values is not None
+    assert [v.frequency for v in kind.most_common_values] == [0.5, 0.3, 0.1]
+    assert len(kind.most_common_values[2].value) == MAX_VALUE_LENGTH
+    assert x.null_fraction is None
+
+
+async def test_unanalyzed_table_has_no_statistics():
+    profile = await profile_table(_conn([]), TABLE)
+
+    assert not profile.analyzed
+    assert all(c.n_distinct is None for c in profile.columns)
@@ -0,0 +1,121 @@
+"""Unit tests for src.services.query_cache — QueryCache."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+from src.models.query import QueryResult
+from src.services.query_cache import QueryCache, normalize_sql
+
+RESULT = QueryResult(columns=["n"], rows=[[1]], row_count=1, truncated=False)
+
+
+def _conn_with_versions(*versions: list[tuple[object, ...]]) -> MagicMock:
+    """Connection whose successive version lookups return the given rows."""
+    cursor = AsyncMock()
+    cursor.fetchall.side_effect = list(versions)
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=cursor)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    conn = MagicMock()
+    conn.cursor.return_value = ctx
+    return conn
+
+
+class TestNormalizeSql:
+    """Tests for normalize_sql()."""
+
+    def test_collapses_whitespace_and_semicolon(self):
+        assert normalize_sql("SELECT  *\n FROM t ;") == "SELECT * FROM t"
+
+    def test_keeps_whitespace_inside_literals(self):
+        assert normalize_sql("SELECT 'a  b'  FROM t") == "SELECT 'a  b' FROM t"
+
+    def test_params_are_part_of_the_key(self):
+        sql = "SELECT n FROM t WHERE n = %s"
+        assert QueryCache.key(sql, 10, "rows", [1]) != QueryCache.key(
+            sql, 10, "rows", [2]
+        )
+        assert QueryCache.key(sql, 10, "rows", [1]) == QueryCache.key(
+            sql, 10, "rows", [1]
+        )
+
+
+class TestQueryCache:
+    """Tests for QueryCache lookup and invalidation."""
+
+    async def test_hit_while_tables_unchanged(self):
+        row = ("public", "t", 16384, 10)
+        conn = _conn_with_versions([row], [row])
+        cache = QueryCache(max_bytes=1 << 20, ttl=60)
+        key = QueryCache.key("SELECT n FROM t", 10, "rows")
+
+        value, versions = await cache.lookup(conn, key, [("public", "t")])
+        assert value is None
+        cache.store(key, versions, RESULT)
+
+        value, _ = await cache.lookup(conn, key, [("public", "t")])
+        assert value is RESULT
+        assert cache.stats()["hits"] == 1
+
+    async def test_modified_table_invalidates(self):
+        conn = _conn_with_versions(
+            [("public", "t", 16384, 10)], [("public", "t", 16384, 11)]
+        )
+        cache = QueryCache(max_bytes=1 << 20, ttl=60)
+        key = QueryCache.key("SELECT n FROM t", 10, "rows")
+        _, versions = await cache.lookup(conn, key, [("public", "t")])
+        cache.store(key, versions, RESULT)
+
+        value, _ = await cache.lookup(conn, key, [("public", "t")])
+
+        assert value is None
+        assert cache.stats()["invalidations"] == 1
+
+    async def test_view_or_unknown_table_not_cacheable(self):
+        conn = _conn_with_versions([])
+        cache = QueryCache(max_bytes=1 << 20, ttl=60)
+
+        value, versions = await cache.lookup(
+            conn, QueryCache.key("SELECT 1 FROM v", 10, "rows"), [("public", "v")]
+        )
+
+        assert value is None
+        assert versions is None
+
+    async def test_same_name_in_another_schema_not_taken(self):
+        conn = _conn_with_versions([("other", "t", 16384, 10)])
+        cache = QueryCache(max_bytes=1 << 20, ttl=60)
+        key = QueryCache.key("SELECT n FROM t", 10, "rows")
+
+        _, versions = await cache.lookup(conn, key, [("public", "t")])
+
+        assert versions is None
+        params = conn.cursor.return_value.__aenter__.return_value.execute.await_args
+        assert params.args[1]["schemas"] == ["public"]
+        assert params.args[1]["names"] == ["t"]
+
+    async def test_functions_are_checked_for_immutability(self):
+        conn = _conn_with_versions([])
+        cache = QueryCache(max_bytes=1 << 20, ttl=60)
+        key = QueryCache.key("SELECT random() FROM t", 10, "rows")
+
+        _, versions = await cache.lookup(
+            conn, key, [("public", "t")], frozenset({"random"})
+        )
+
+        assert versions is None
+        params = conn.cursor.return_value.__aenter__.return_value.execute.await_args
+        assert params.args[1]["functions"] == ["random"]
+
+    async def test_sql_value_function_not_cacheable(self):
+        conn = _conn_with_versions()
+        cache = QueryCache(max_bytes=1 << 20, ttl=60)
+        key = QueryCache.key("SELECT current_date FROM t", 10, "rows")
+
+        _, versions = await cache.lookup(
+            conn, key, [("public", "t")], frozenset({"current_date"})
+        )
+
+        assert versions is None
+        conn.cursor.assert_not_called()
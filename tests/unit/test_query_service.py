@@ -0,0 +1,353 @@
+"""Unit tests for src.services.query — execute_query."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import psycopg
+import pytest
+
+from src.services import query as query_service
+from src.services.portal import json_row
+from src.services.query import QueryTimeoutError, execute_query
+
+FETCH_PATTERN = re.compile(r'FETCH FORWARD (\d+)')
+
+
+class _FakeResult:
+    """PGresult stand-in returning each value's str form as its wire bytes."""
+
+    def __init__(self, rows: list[tuple[object, ...]]) -> None:
+        self._rows = rows
+        self.ntuples = len(rows)
+        self.nfields = len(rows[0]) if rows else 0
+
+    def get_value(self, row: int, col: int) -> bytes:
+        return str(self._rows[row][col]).encode()
+
+
+class _FakeCursor:
+    """Cursor stand-in that answers FETCH FORWARD n from a list of rows.
+
+    Any other statement makes the remaining rows the current result, as a
+    plain client-side SELECT would.
+    """
+
+    def __init__(self, columns: list[str], rows: list[tuple[object, ...]]) -> None:
+        self.description = [SimpleNamespace(name=c, type_code=25) for c in columns]
+        self._rows = rows
+        self._result: list[tuple[object, ...]] = []
+        self.statements: list[tuple[str, bool | None]] = []
+        self.params: list[object] = []
+        self.prepared: list[bool | None] = []
+        self.fetch_sizes: list[int] = []
+        self.pgresult: _FakeResult | None = None
+
+    async def __aenter__(self) -> _FakeCursor:
+        return self
+
+    async def __aexit__(self, *exc: object) -> bool:
+        return False
+
+    async def execute(self, query, params=None, binary=None, prepare=None) -> None:
+        text = query if isinstance(query, str) else query.as_string()
+        self.statements.append((text, binary))
+        self.params.append(params)
+        self.prepared.append(prepare)
+        match = FETCH_PATTERN.match(text)
+        if match:
+            size = int(match.group(1))
+            self.fetch_sizes.append(size)
+            self._result, self._rows = self._rows[:size], self._rows[size:]
+            self.pgresult = _FakeResult(self._result)
+        elif not text.startswith("DECLARE"):
+            self._result = self._rows
+
+    async def fetchall(self) -> list[list[object]]:
+        return [list(row) for row in self._result]
+
+    async def fetchmany(self, size: int) -> list[list[object]]:
+        return [list(row) for row in self._result[:size]]
+
+
+@pytest.fixture(autouse=True)
+def _no_geometry_lookup(monkeypatch):
+    monkeypatch.setattr(
+        query_service, "register_geometry_types", AsyncMock(return_value=frozenset())
+    )
+
+
+def _async_ctx(value: object) -> MagicMock:
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=value)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx
+
+
+@pytest.fixture
+def _conn_with_rows():
+    """Build a mock connection whose cursors serve the given rows."""
+
+    def build(columns: list[str], rows: list[tuple[object, ...]]):
+        cursor = _FakeCursor(columns, rows)
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        conn.transaction.return_value = _async_ctx(None)
+        return conn, cursor
+
+    return build
+
+
+async def test_streaming_declares_cursor_in_transaction(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [(1,), (2,)])
+
+    result = await execute_query(conn, "SELECT id FROM t", row_limit=10)
+
+    assert result.columns == ["id"]
+    assert result.rows == [[1], [2]]
+    assert result.truncated is False
+    declare, binary = cursor.statements[0]
+    assert declare.startswith('DECLARE "geo_post_mcp_')
+    assert declare.endswith("CURSOR FOR SELECT id FROM t")
+    # Extended protocol, so a statement smuggled after ';' is rejected
+    assert binary is True
+    conn.transaction.assert_called_once()
+
+
+async def test_streaming_stops_after_row_limit_plus_one(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [(i,) for i in range(5000)])
+
+    result = await execute_query(conn, "SELECT id FROM t", row_limit=150)
+
+    assert result.row_count == 150
+    assert result.truncated is True
+    assert sum(cursor.fetch_sizes) == 151
+
+
+async def test_streaming_reports_progress_per_batch(_conn_with_rows, monkeypatch):
+    monkeypatch.setattr(query_service, "INITIAL_FETCH_SIZE", 10)
+    conn, _ = _conn_with_rows(["id"], [(i,) for i in range(25)])
+    progress = AsyncMock()
+
+    await execute_query(conn, "SELECT id FROM t", row_limit=100, progress=progress)
+
+    reported = [call.args[0] for call in progress.await_args_list]
+    assert reported[0] == 10
+    assert reported[-1] == 25
+
+
+async def test_fetch_size_adapts_to_row_width(_conn_with_rows, monkeypatch):
+    monkeypatch.setattr(query_service, "INITIAL_FETCH_SIZE", 10)
+    wide_row = ("x" * 100_000,)
+    conn, cursor = _conn_with_rows(["doc"], [wide_row] * 100)
+
+    await execute_query(conn, "SELECT doc FROM t", row_limit=100)
+
+    # ~100 KB rows against a 1 MiB batch target → 10 rows per FETCH
+    assert cursor.fetch_sizes[1] == 10
+
+
+async def test_fetches_switch_to_binary_after_first(_conn_with_rows, monkeypatch):
+    monkeypatch.setattr(query_service, "INITIAL_FETCH_SIZE", 10)
+    conn, cursor = _conn_with_rows(["id"], [(i,) for i in range(50)])
+    conn.adapters.get_loader.return_value = object()
+
+    await execute_query(conn, "SELECT id FROM t", row_limit=40)
+
+    fetch_formats = [binary for _, binary in cursor.statements[1:]]
+    assert fetch_formats[0] is False
+    assert all(fetch_formats[1:])
+
+
+async def test_text_kept_when_a_column_lacks_binary_loader(
+    _conn_with_rows, monkeypatch
+):
+    monkeypatch.setattr(query_service, "INITIAL_FETCH_SIZE", 10)
+    conn, cursor = _conn_with_rows(["mood"], [("happy",)] * 50)
+    conn.adapters.get_loader.return_value = None
+
+    await execute_query(conn, "SELECT mood FROM t", row_limit=40)
+
+    assert not any(binary for _, binary in cursor.statements[1:])
+
+
+async def test_streaming_binds_params_to_declare(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [(7,)])
+
+    await execute_query(conn, "SELECT id FROM t WHERE id = %s", params=[7])
+
+    assert cursor.statements[0][0].endswith("WHERE id = %s")
+    assert cursor.params[0] == [7]
+
+
+async def test_prepared_mode_limits_on_server(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [(1,), (2,), (3,)])
+
+    result = await execute_query(
+        conn, "SELECT id FROM t WHERE id > %s", row_limit=2, params=[0], prepare=True
+    )
+
+    assert result.rows == [[1], [2]]
+    assert result.truncated is True
+    assert cursor.statements == [
+        ("SELECT * FROM (SELECT id FROM t WHERE id > %s\n) AS q LIMIT 3", None)
+    ]
+    assert cursor.params == [[0]]
+    assert cursor.prepared == [True]
+
+
+async def test_buffered_mode_uses_client_cursor(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [(1,), (2,), (3,)])
+
+    result = await execute_query(conn, "SELECT id FROM t", row_limit=2, stream=False)
+
+    assert result.rows == [[1], [2]]
+    assert result.truncated is True
+    assert cursor.statements == [("SELECT id FROM t", None)]
+    conn.transaction.assert_not_called()
+
+
+def test_json_row_renders_bytea_as_hex():
+    cursor = SimpleNamespace(
+        description=[SimpleNamespace(type_code=23), SimpleNamespace(type_code=17)]
+    )
+
+    make_row = json_row(cursor)
+
+    assert make_row((1, b"\x01\xff")) == [1, "\\x01ff"]
+    assert make_row((2, None)) == [2, None]
+
+
+def test_json_row_without_converters_is_list():
+    cursor = SimpleNamespace(description=[SimpleNamespace(type_code=25)])
+    assert json_row(cursor) is list
+
+
+async def test_feature_collection_wraps_select_for_postgis(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["fc"], [])
+    cursor.fetchone = AsyncMock(return_value=('{"type": "FeatureCollection"}',))
+
+    document = await query_service.execute_feature_collection(
+        conn, "SELECT * FROM parcels;", row_limit=5
+    )
+
+    assert document == '{"type": "FeatureCollection"}'
+    executed = cursor.statements[0][0]
+    assert "ST_AsGeoJSON(t.*, '', 9)" in executed
+    assert "SELECT * FROM parcels\n" in executed
+    assert "LIMIT 6" in executed
+
+
+async def test_feature_collection_precision_limits_digits(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["fc"], [])
+    cursor.fetchone = AsyncMock(return_value=("{}",))
+
+    await query_service.execute_feature_collection(
+        conn, "SELECT * FROM parcels", row_limit=5, precision=3
+    )
+
+    assert "ST_AsGeoJSON(t.*, '', 3)" in cursor.statements[0][0]
+
+
+async def test_timeout_set_locally_in_buffered_transaction(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [(1,)])
+    conn.execute = AsyncMock()
+
+    await execute_query(conn, "SELECT id FROM t", stream=False, timeout=2.5)
+
+    conn.transaction.assert_called_once()
+    statement, params = conn.execute.await_args.args
+    assert "set_config('statement_timeout', %s, true)" in statement
+    assert params == ("2500ms",)
+
+
+def _cancel_after(seconds: float, message: str):
+    async def execute(*args: object, **kwargs: object) -> None:
+        await asyncio.sleep(seconds)
+        raise psycopg.errors.QueryCanceled(message)
+
+    return execute
+
+
+async def test_statement_timeout_raises_query_timeout_error(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [])
+    conn.execute = AsyncMock()
+    cursor.execute = AsyncMock(
+        side_effect=_cancel_after(0.06, "canceling statement due to statement timeout")
+    )
+
+    with pytest.raises(QueryTimeoutError, match="statement timeout of 0.05 s") as info:
+        await execute_query(conn, "SELECT pg_sleep(5)", timeout=0.05)
+
+    assert info.value.timeout == 0.05
+    assert info.value.elapsed >= 0.05
+
+
+async def test_statement_timeout_recognized_in_any_language(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [])
+    conn.execute = AsyncMock()
+    cursor.execute = AsyncMock(
+        side_effect=_cancel_after(
+            0.06, "Anweisung wird abgebrochen wegen Zeitüberschreitung"
+        )
+    )
+
+    with pytest.raises(QueryTimeoutError):
+        await execute_query(conn, "SELECT pg_sleep(5)", timeout=0.05)
+
+
+async def test_cancellation_before_timeout_propagates(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [])
+    conn.execute = AsyncMock()
+    cursor.execute = AsyncMock(
+        side_effect=psycopg.errors.QueryCanceled(
+            "canceling statement due to user request"
+        )
+    )
+
+    with pytest.raises(psycopg.errors.QueryCanceled):
+        await execute_query(conn, "SELECT pg_sleep(5)", timeout=30)
+
+
+async def test_other_cancellations_propagate(_conn_with_rows):
+    conn, cursor = _conn_with_rows(["id"], [])
+    cursor.execute = AsyncMock(
+        side_effect=psycopg.errors.QueryCanceled(
+            "canceling statement due to user request"
+        )
+    )
+
+    with pytest.raises(psycopg.errors.QueryCanceled):
+        await execute_query(conn, "SELECT pg_sleep(5)")
+
+
+async def test_batch_resends_statements_skipped_after_a_failure(monkeypatch):
+    failure = psycopg.errors.DivisionByZero("division by zero")
+    passes = [
+        ([(["n"], [[1]])], failure),
+        ([(["n"], [[3]]), (["n"], [[4]])], None),
+    ]
+    sent: list[list[str]] = []
+
+    async def fake_pass(conn, statements, max_rows, timeout):
+        sent.append([sql for sql, _ in statements])
+        return passes.pop(0)
+
+    monkeypatch.setattr(query_service, "_pipeline_pass", fake_pass)
+    statements = [(f"SELECT {n}", None) for n in ("1", "1/0", "3", "4")]
+
+    outcomes = await query_service.execute_batch(MagicMock(), statements)
+
+    assert sent == [
+        ["SELECT 1", "SELECT 1/0", "SELECT 3", "SELECT 4"],
+        ["SELECT 3", "SELECT 4"],
+    ]
+    assert outcomes[1] is failure
+    assert [o.rows for o in outcomes if not isinstance(o, Exception)] == [
+        [[1]],
+        [[3]],
+        [[4]],
+    ]
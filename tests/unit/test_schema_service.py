@@ -1,4 +1,4 @@
-"""Unit tests for src.services.fieldmeaning — check_table_exists, get_field_meanings."""
+"""Unit tests for table metadata loading and the schema and fieldmeaning services."""
 
 from __future__ import annotations
 
@@ -6,7 +6,10 @@ from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from src.services.fieldmeaning import check_table_exists, get_field_meanings
+from src.services import catalog
+from src.services.catalog import get_table, load_tables
+from src.services.fieldmeaning import field_meanings
+from src.services.schema import describe_columns
 from src.models.fieldmeaning import FieldMeaningEntry
 
 
@@ -30,33 +33,64 @@ def _cursor_mock():
     return conn, cursor
 
 
-async def test_check_table_exists_returns_true(_cursor_mock):
+@pytest.fixture(autouse=True)
+def _geometry_oids(monkeypatch):
+    """Report no PostGIS unless a test overrides the return value."""
+    lookup = AsyncMock(return_value=frozenset())
+    monkeypatch.setattr(catalog, "register_geometry_types", lookup)
+    return lookup
+
+
+def _column(name: str, position: int, description: str | None, **extra) -> dict:
+    return {
+        "column_name": name,
+        "data_type": "integer",
+        "ordinal_position": position,
+        "is_nullable": True,
+        "column_default": None,
+        "description": description,
+        **extra,
+    }
+
+
+def _table_row(columns: list[dict]) -> tuple[dict]:
+    return (
+        {
+            "table_name": "parcels",
+            "schema_": "public",
+            "estimated_rows": 2,
+            "columns": columns,
+        },
+    )
+
+
+async def test_get_table_returns_existing_table(_cursor_mock):
     conn, cursor = _cursor_mock
-    cursor.fetchone.return_value = (1,)
+    cursor.fetchall.return_value = [_table_row([])]
 
-    result = await check_table_exists(conn, "public", "parcels")
+    table = await get_table(conn, "public", "parcels")
 
-    assert result is True
+    assert table is not None
+    assert table.table_name == "parcels"
     cursor.execute.assert_awaited_once()
 
 
-async def test_check_table_exists_returns_false(_cursor_mock):
+async def test_get_table_returns_none_when_missing(_cursor_mock):
     conn, cursor = _cursor_mock
-    cursor.fetchone.return_value = None
+    cursor.fetchall.return_value = []
 
-    result = await check_table_exists(conn, "public", "nonexistent")
+    assert await get_table(conn, "public", "nonexistent") is None
 
-    assert result is False
 
-
-async def test_get_field_meanings_returns_entries(_cursor_mock):
+async def test_field_meanings_returns_entries(_cursor_mock):
     conn, cursor = _cursor_mock
     cursor.fetchall.return_value = [
-        ("id", "integer", 1, "Primary key"),
-        ("geom", "USER-DEFINED", 2, "Geometry column"),
+        _table_row(
+            [_column("id", 1, "Primary key"), _column("geom", 2, "Geometry column")]
+        )
     ]
 
-    entries = await get_field_meanings(conn, "public", "parcels")
+    entries = field_meanings(await get_table(conn, "public", "parcels"))
 
     assert len(entries) == 2
     assert all(isinstance(e, FieldMeaningEntry) for e in entries)
@@ -66,14 +100,47 @@ async def test_get_field_meanings_returns_entries(_cursor_mock):
     assert entries[1].ordinal_position == 2
 
 
-async def test_get_field_meanings_null_descriptions(_cursor_mock):
+async def test_field_meanings_null_descriptions(_cursor_mock):
     conn, cursor = _cursor_mock
     cursor.fetchall.return_value = [
-        ("id", "integer", 1, None),
-        ("name", "text", 2, None),
+        _table_row([_column("id", 1, None), _column("name", 2, None)])
     ]
 
-    entries = await get_field_meanings(conn, "public", "parcels")
+    entries = field_meanings(await get_table(conn, "public", "parcels"))
 
     assert entries[0].description is None
     assert entries[1].description is None
+
+
+async def test_describe_columns_adds_spatial_details(_cursor_mock):
+    conn, cursor = _cursor_mock
+    geom = _column(
+        "geom", 2, None, geometry_type="POLYGON", srid=4326, coord_dimension=2
+    )
+    cursor.fetchall.return_value = [_table_row([_column("id", 1, None), geom])]
+
+    columns = describe_columns(await get_table(conn, "public", "parcels"))
+
+    assert "geometry_type" not in columns[0]
+    assert columns[1]["geometry_type"] == "POLYGON"
+    assert columns[1]["srid"] == 4326
+
+
+async def test_load_tables_joins_geometry_columns_only_with_postgis(
+    _cursor_mock, _geometry_oids
+):
+    conn, cursor = _cursor_mock
+    cursor.fetchall.return_value = []
+
+    await load_tables(conn, "public", ["parcels"])
+    without = cursor.execute.await_args.args[0].as_string()
+    _geometry_oids.return_value = frozenset({16400})
+    await load_tables(conn, "public", ["parcels"])
+    with_postgis = cursor.execute.await_args.args[0].as_string()
+
+    assert "geometry_columns" not in without
+    assert "geometry_columns" in with_postgis
+    assert cursor.execute.await_args.args[1] == {
+        "schema": "public",
+        "tables": ["parcels"],
+    }
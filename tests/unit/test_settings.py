@@ -89,3 +89,25 @@ class TestSettingsModel:
         s = Settings(host="h", port=1, user="u", dbname="db")
         assert s.schema_ == "public"
         assert s.allowed_tables == []
+
+    def test_statement_timeout_capped_by_maximum(self):
+        with pytest.raises(ValidationError, match="max_statement_timeout"):
+            Settings(
+                host="h",
+                port=1,
+                user="u",
+                dbname="db",
+                statement_timeout=60,
+                max_statement_timeout=30,
+            )
+
+    def test_statement_timeout_uncapped_when_maximum_zero(self):
+        s = Settings(
+            host="h",
+            port=1,
+            user="u",
+            dbname="db",
+            statement_timeout=0,
+            max_statement_timeout=0,
+        )
+        assert s.statement_timeout == 0
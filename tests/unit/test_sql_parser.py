@@ -0,0 +1,133 @@
+"""Unit tests for src.services.sql_parser — parse_sql."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.services.sql_parser import Relation, parse_sql
+from src.tools.query import check_query_access
+
+
+def _names(sql: str) -> list[str]:
+    return [str(relation) for relation in parse_sql(sql).relations]
+
+
+class TestRelations:
+    """Relations found in FROM lists."""
+
+    def test_joins_and_comma_joins(self):
+        sql = (
+            "SELECT * FROM parcels p, buildings b "
+            "JOIN roads r ON r.id = b.road_id LEFT OUTER JOIN zones z USING (zid)"
+        )
+        assert _names(sql) == ["parcels", "buildings", "roads", "zones"]
+
+    def test_quoted_and_qualified_names(self):
+        sql = 'SELECT * FROM "Land Use" lu, gis.Parcels, "Gis"."Roads"'
+        assert parse_sql(sql).relations == (
+            Relation(None, "Land Use"),
+            Relation("gis", "parcels"),
+            Relation("Gis", "Roads"),
+        )
+
+    def test_subqueries_at_any_depth(self):
+        sql = (
+            "SELECT * FROM (SELECT * FROM a) s "
+            "WHERE id IN (SELECT id FROM b WHERE EXISTS (SELECT 1 FROM c)) "
+            "UNION ALL SELECT * FROM d"
+        )
+        assert _names(sql) == ["a", "b", "c", "d"]
+
+    def test_cte_names_excluded(self):
+        sql = (
+            "WITH RECURSIVE near (id) AS (SELECT id FROM parcels), "
+            "far AS MATERIALIZED (SELECT * FROM near JOIN roads USING (id)) "
+            "SELECT * FROM far"
+        )
+        parsed = parse_sql(sql)
+        assert _names(sql) == ["parcels", "roads"]
+        assert parsed.cte_names == {"near", "far"}
+        assert parsed.cte_statement_types == ("SELECT", "SELECT")
+
+    def test_cte_names_scoped_to_their_with_level(self):
+        sql = "SELECT * FROM (WITH secret AS (SELECT 1) SELECT 1) a, secret"
+        assert _names(sql) == ["secret"]
+        nested = (
+            "WITH x AS (SELECT 1) "
+            "SELECT * FROM (SELECT * FROM x) s, (WITH y AS (SELECT 2) TABLE y) t, y"
+        )
+        assert _names(nested) == ["y"]
+
+    def test_cte_from_a_subquery_does_not_hide_a_real_table(self):
+        sql = "SELECT * FROM (WITH secret AS (SELECT 1) SELECT 1) a, secret"
+        with pytest.raises(ValueError, match="Access denied: table 'secret'"):
+            check_query_access(sql, "remez1", ["remez1.polygons"])
+
+    def test_function_from_is_not_a_relation(self):
+        sql = "SELECT extract(year FROM ts), substring(s FROM 2) FROM events"
+        assert _names(sql) == ["events"]
+
+    def test_set_returning_functions_skipped(self):
+        sql = "SELECT * FROM generate_series(1, 3) g, LATERAL ST_Dump(g.geom) d, t"
+        assert _names(sql) == ["t"]
+
+    def test_table_shorthand(self):
+        assert _names("SELECT * FROM a WHERE EXISTS (TABLE secret)") == ["a", "secret"]
+
+    def test_text_in_literals_and_comments_ignored(self):
+        sql = (
+            "SELECT 'FROM a', $q$ FROM b $q$, E'\\' FROM c' "
+            "/* FROM d /* nested */ FROM e */ FROM real -- FROM f"
+        )
+        assert _names(sql) == ["real"]
+
+
+class TestStatementShape:
+    """Statement type, count, SELECT INTO, and functions called."""
+
+    def test_statement_type_after_comments(self):
+        assert parse_sql("-- note\n/* x */ select 1").statement_type == "SELECT"
+
+    def test_statement_count(self):
+        assert parse_sql("SELECT 1;").statement_count == 1
+        assert parse_sql("SELECT 1;\n").statement_count == 1
+        assert parse_sql("SELECT 1;  ").statement_count == 1
+        assert parse_sql("SELECT 1 ; -- done\n").statement_count == 1
+        assert parse_sql("SELECT 1; SELECT 2").statement_count == 2
+
+    def test_select_into(self):
+        assert parse_sql("SELECT * INTO t2 FROM t").select_into is True
+        assert parse_sql("SELECT 'into' FROM t").select_into is False
+
+    def test_memoized(self):
+        sql = "SELECT * FROM memo_check"
+        assert parse_sql(sql) is parse_sql(sql)
+
+    def test_functions_called(self):
+        sql = (
+            "SELECT count(*), public.now(), \"Fn\"(x), current_timestamp "
+            "FROM t, generate_series(1, 3) WHERE id IN (1)"
+        )
+        assert parse_sql(sql).functions == {
+            "count", "now", "Fn", "current_timestamp", "generate_series", "in"
+        }
+
+    def test_quoted_value_function_name_is_a_column(self):
+        assert parse_sql('SELECT "current_date" FROM t').functions == frozenset()
+
+
+class TestLexicalErrors:
+    """Malformed text is rejected rather than guessed at."""
+
+    @pytest.mark.parametrize(
+        "sql",
+        ["SELECT 'open", 'SELECT "open', "SELECT /* open", "SELECT $a$ open"],
+    )
+    def test_unterminated(self, sql):
+        with pytest.raises(ValueError, match="Unterminated"):
+            parse_sql(sql)
+
+    @pytest.mark.parametrize("sql", ["SELECT (1", "SELECT 1) FROM t"])
+    def test_unbalanced_parentheses(self, sql):
+        with pytest.raises(ValueError, match="Unbalanced"):
+            parse_sql(sql)
@@ -83,3 +83,43 @@ class TestMutationsRejected:
     def test_empty_statement_rejected(self):
         with pytest.raises(ValueError, match="Empty SQL"):
             validate_select_only("   ")
+
+    def test_comment_only_rejected(self):
+        with pytest.raises(ValueError, match="Empty SQL"):
+            validate_select_only("-- nothing here\n/* or here */")
+
+
+class TestSmuggledWritesRejected:
+    """Writes hidden behind a leading SELECT or WITH."""
+
+    def test_second_statement_rejected(self):
+        with pytest.raises(ValueError, match="single SELECT"):
+            validate_select_only("SELECT 1; DELETE FROM parcels")
+
+    def test_trailing_semicolons_accepted(self):
+        validate_select_only("SELECT 1;;  -- done")
+
+    @pytest.mark.parametrize(
+        "sql", ["SELECT 1;\n", "SELECT 1;  ", "SELECT 1 ; -- done\n"]
+    )
+    def test_trailing_whitespace_after_semicolon_accepted(self, sql):
+        validate_select_only(sql)
+
+    def test_data_modifying_cte_rejected(self):
+        with pytest.raises(ValueError, match="WITH clause containing: DELETE"):
+            validate_select_only(
+                "WITH gone AS (DELETE FROM parcels RETURNING *) SELECT * FROM gone"
+            )
+
+    def test_select_into_rejected(self):
+        with pytest.raises(ValueError, match="SELECT INTO"):
+            validate_select_only("SELECT * INTO copy FROM parcels")
+
+    def test_semicolon_inside_literal_accepted(self):
+        validate_select_only("SELECT 'a; DELETE FROM parcels' AS note")
+
+    def test_statement_hidden_by_nested_comment_rejected(self):
+        # Postgres nests block comments, so the quote below is outside any
+        # comment and the DELETE is a real statement.
+        with pytest.raises(ValueError, match="Only SELECT|single SELECT"):
+            validate_select_only("SELECT 1 /* /* */ ' */ ; DELETE FROM t; --'")
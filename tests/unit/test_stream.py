@@ -0,0 +1,163 @@
+"""Unit tests for src.services.stream — NDJSON/GeoJSONSeq encoding and the route."""
+
+from __future__ import annotations
+
+import json
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import psycopg
+import pytest
+from starlette.requests import Request
+
+import src.server as server
+from src.services import stream
+from src.services.stream import stream_query
+
+GEOMETRY_OID = 16400
+
+
+class _FakePortal:
+    """Portal stand-in describing columns of the given types."""
+
+    columns: list[str] = []
+    type_codes: list[int] = []
+
+    def __init__(self, conn: object) -> None:
+        self.declared: str | None = None
+
+    async def declare(self, sql: str, params: object = None) -> None:
+        self.declared = sql
+
+
+def _batches(*batches, error: Exception | None = None):
+    async def fetch(portal, max_rows):
+        for batch in batches:
+            yield [list(row) for row in batch][:max_rows]
+        if error is not None:
+            raise error
+
+    return fetch
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    monkeypatch.setattr(
+        stream,
+        "register_geometry_types",
+        AsyncMock(return_value=frozenset({GEOMETRY_OID})),
+    )
+    ctx = MagicMock()
+    ctx.__aenter__ = AsyncMock(return_value=None)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    conn = MagicMock()
+    conn.transaction.return_value = ctx
+    conn.execute = AsyncMock()
+    conn.broken = False
+    return conn
+
+
+def _portal(monkeypatch, columns, type_codes):
+    monkeypatch.setattr(_FakePortal, "columns", columns)
+    monkeypatch.setattr(_FakePortal, "type_codes", type_codes)
+    monkeypatch.setattr(stream, "Portal", _FakePortal)
+
+
+async def _collect(chunks) -> list[bytes]:
+    return [chunk async for chunk in chunks]
+
+
+async def test_ndjson_one_chunk_per_batch(conn, monkeypatch):
+    _portal(monkeypatch, ["id", "name"], [23, 25])
+    batches = _batches([(1, "a"), (2, "b")], [(3, "c")])
+    monkeypatch.setattr(stream, "fetch_batches", batches)
+
+    chunks = await _collect(stream_query(conn, "SELECT id, name FROM t"))
+
+    assert len(chunks) == 2
+    lines = b"".join(chunks).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"id": 1, "name": "a"},
+        {"id": 2, "name": "b"},
+        {"id": 3, "name": "c"},
+    ]
+
+
+async def test_geojsonseq_uses_first_geometry_column(conn, monkeypatch):
+    _portal(monkeypatch, ["id", "geom"], [23, GEOMETRY_OID])
+    point = {"type": "Point", "coordinates": [1, 2]}
+    monkeypatch.setattr(stream, "fetch_batches", _batches([(1, point)]))
+
+    chunks = await _collect(stream_query(conn, "SELECT * FROM t", "geojsonseq"))
+
+    record = chunks[0]
+    assert record.startswith(b"\x1e")
+    assert json.loads(record[1:]) == {
+        "type": "Feature",
+        "geometry": point,
+        "properties": {"id": 1},
+    }
+
+
+async def test_geojsonseq_without_geometry_rejected(conn, monkeypatch):
+    _portal(monkeypatch, ["id"], [23])
+    monkeypatch.setattr(stream, "fetch_batches", _batches([(1,)]))
+
+    with pytest.raises(ValueError, match="geometry column"):
+        await _collect(stream_query(conn, "SELECT id FROM t", "geojsonseq"))
+
+
+async def test_truncated_stream_ends_with_marker(conn, monkeypatch):
+    _portal(monkeypatch, ["id"], [23])
+    monkeypatch.setattr(stream, "fetch_batches", _batches([(1,), (2,), (3,)]))
+
+    chunks = await _collect(stream_query(conn, "SELECT id FROM t", max_rows=2))
+
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert lines == [{"id": 1}, {"id": 2}, {"truncated": True, "row_count": 2}]
+
+
+async def test_error_after_first_chunk_ends_stream_with_record(conn, monkeypatch):
+    _portal(monkeypatch, ["id"], [23])
+    failure = psycopg.errors.DivisionByZero("division by zero")
+    monkeypatch.setattr(stream, "fetch_batches", _batches([(1,)], error=failure))
+
+    chunks = await _collect(stream_query(conn, "SELECT 1 / id FROM t"))
+
+    assert json.loads(chunks[-1]) == {"error": "division by zero"}
+
+
+async def test_error_before_first_chunk_raised(conn, monkeypatch):
+    _portal(monkeypatch, ["id"], [23])
+    failure = psycopg.errors.UndefinedColumn('column "x" does not exist')
+    monkeypatch.setattr(stream, "fetch_batches", _batches(error=failure))
+
+    with pytest.raises(psycopg.errors.UndefinedColumn):
+        await _collect(stream_query(conn, "SELECT x FROM t"))
+
+
+@pytest.mark.parametrize(
+    ("sql", "status"),
+    [
+        ("SELECT * FROM secret", 403),
+        ("DELETE FROM test_parcels", 400),
+    ],
+)
+async def test_stream_route_maps_error_types_to_status(
+    monkeypatch, mock_settings, sql, status
+):
+    @asynccontextmanager
+    async def acquire():
+        yield MagicMock()
+
+    async def receive():
+        body = json.dumps({"sql": sql}).encode()
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    monkeypatch.setattr(server, "_settings", mock_settings)
+    monkeypatch.setattr(server, "_acquire", acquire)
+    request = Request({"type": "http", "method": "POST", "headers": []}, receive)
+
+    response = await server.query_stream_route(request)
+
+    assert response.status_code == status
@@ -0,0 +1,128 @@
+"""Unit tests for src.services.tiles — tile addressing, TileCache and the route."""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from starlette.requests import Request
+
+import src.server as server
+from src.models.catalog import ColumnMetadata, TableMetadata
+from src.services import tiles
+from src.services.access_control import AccessDeniedError
+from src.services.catalog import TableNotFoundError
+from src.services.tiles import Tile, TileCache, build_tile, check_tile_coordinates
+
+TABLE = TableMetadata(
+    table_name="roads",
+    schema_="public",
+    estimated_rows=10,
+    columns=[
+        ColumnMetadata(
+            column_name="geom",
+            data_type="USER-DEFINED",
+            ordinal_position=1,
+            is_nullable=True,
+            column_default=None,
+            description=None,
+            geometry_type="LINESTRING",
+            srid=2039,
+        )
+    ],
+)
+
+
+@pytest.mark.parametrize(("z", "x", "y"), [(0, 0, 0), (3, 7, 7), (30, 0, 1)])
+def test_grid_coordinates_accepted(z, x, y):
+    check_tile_coordinates(z, x, y)
+
+
+@pytest.mark.parametrize(
+    ("z", "x", "y"), [(-1, 0, 0), (31, 0, 0), (3, 8, 0), (2, 0, -1)]
+)
+def test_off_grid_coordinates_rejected(z, x, y):
+    with pytest.raises(ValueError):
+        check_tile_coordinates(z, x, y)
+
+
+async def test_cached_tile_served_while_table_unchanged(monkeypatch):
+    versions = AsyncMock(return_value=(("public", "roads", 1, 5),))
+    build = AsyncMock(return_value=Tile(data=b"\x1a\x02", features=1))
+    monkeypatch.setattr(tiles, "table_versions", versions)
+    monkeypatch.setattr(tiles, "build_tile", build)
+    cache = TileCache(max_bytes=1 << 20, ttl=60)
+
+    first = await cache.get_or_build(None, TABLE, "geom", [], 3, 1, 2)
+    second = await cache.get_or_build(None, TABLE, "geom", [], 3, 1, 2)
+
+    assert first is second
+    build.assert_awaited_once()
+    assert cache.stats()["hits"] == 1
+
+
+async def test_modified_table_rebuilds_tile(monkeypatch):
+    versions = AsyncMock(
+        side_effect=[(("public", "roads", 1, 5),), (("public", "roads", 1, 6),)]
+    )
+    build = AsyncMock(return_value=Tile(data=b"\x1a\x02", features=1))
+    monkeypatch.setattr(tiles, "table_versions", versions)
+    monkeypatch.setattr(tiles, "build_tile", build)
+    cache = TileCache(max_bytes=1 << 20, ttl=60)
+
+    await cache.get_or_build(None, TABLE, "geom", [], 3, 1, 2)
+    await cache.get_or_build(None, TABLE, "geom", [], 3, 1, 2)
+
+    assert build.await_count == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+async def test_mvt_geometry_does_not_clash_with_a_geom_property():
+    cur = AsyncMock()
+    cur.fetchone.return_value = (b"", 0)
+    conn = MagicMock()
+    conn.cursor.return_value.__aenter__.return_value = cur
+    conn.transaction.return_value.__aenter__.return_value = None
+
+    await build_tile(conn, TABLE, "geom", ["geom"], 3, 1, 2)
+
+    query = cur.execute.await_args.args[0].as_string(None)
+    assert 'AS "__mvt_geom", t."geom"' in query
+    assert "ST_AsMVT(features.*, %(layer)s, 4096, '__mvt_geom')" in query
+    # Filtered by the envelope widened by the clip buffer, densified
+    # before it is transformed.
+    assert "margin => 0.0625" in query
+    assert "ST_Segmentize(" in query
+
+
+@pytest.mark.parametrize(
+    ("error", "status"),
+    [
+        (AccessDeniedError("Access denied: table 'x'."), 404),
+        (TableNotFoundError("Table 'x' does not exist in schema 'public'."), 404),
+        (ValueError("Table 'x' has no geometry column."), 400),
+    ],
+)
+async def test_tile_route_maps_error_types_to_status(
+    monkeypatch, mock_settings, error, status
+):
+    @asynccontextmanager
+    async def acquire():
+        yield None
+
+    monkeypatch.setattr(server, "_settings", mock_settings)
+    monkeypatch.setattr(server, "_acquire", acquire)
+    monkeypatch.setattr(server, "get_tile", AsyncMock(side_effect=error))
+    request = Request(
+        {
+            "type": "http",
+            "query_string": b"",
+            "path_params": {"table_name": "x", "z": 0, "x": 0, "y": 0},
+        }
+    )
+
+    response = await server.tile_route(request)
+
+    assert response.status_code == status
+    assert response.body == str(error).encode()